@@ -1,9 +1,80 @@
 import React, { createContext, useState, useEffect, useContext } from "react";
 import PropTypes from "prop-types"; // Import PropTypes
+import axios from "axios";
+
+const AUTH_API = "http://127.0.0.1:5000/api/auth";
 
 // Create a context for authentication
 const AuthContext = createContext(null);
 
+// Tokens of the signed-in user ({ access_token, refresh_token, ... } from signin/refresh),
+// kept outside React state so the axios interceptors always see the latest pair.
+let session = null;
+let refreshPromise = null;
+let onSessionExpired = () => {};
+// Signed stamp of this user's last save (X-Last-Write). Sending it back keeps the next reads on
+// the primary database for a few seconds, whichever server process answers them.
+let lastWrite = null;
+
+export const getAccessToken = () => (session ? session.access_token : null);
+
+// Exchanges the refresh token for a new token pair; concurrent callers share one request.
+export const refreshSession = () => {
+  if (!refreshPromise) {
+    refreshPromise = axios
+      .post(`${AUTH_API}/refresh`, { refresh_token: session && session.refresh_token })
+      .then((response) => {
+        session = { ...session, ...response.data };
+        localStorage.setItem("user", JSON.stringify(session));
+        return session.access_token;
+      })
+      .catch((error) => {
+        onSessionExpired();
+        throw error;
+      })
+      .finally(() => {
+        refreshPromise = null;
+      });
+  }
+  return refreshPromise;
+};
+
+// Every API call carries the access token; an expired token is refreshed once and the call retried.
+axios.interceptors.request.use((config) => {
+  const token = getAccessToken();
+  if (token && !config.url.endsWith("/auth/refresh")) {
+    config.headers.Authorization = `Bearer ${token}`;
+  }
+  if (lastWrite) {
+    config.headers["X-Last-Write"] = lastWrite;
+  }
+  return config;
+});
+
+axios.interceptors.response.use((response) => {
+  if (response.headers["x-last-write"]) {
+    lastWrite = response.headers["x-last-write"];
+  }
+  return response;
+});
+
+axios.interceptors.response.use(undefined, async (error) => {
+  const { config, response } = error;
+  if (
+    response &&
+    response.status === 401 &&
+    response.data &&
+    response.data.error === "token_expired" &&
+    !config.retriedAfterRefresh
+  ) {
+    const token = await refreshSession();
+    config.retriedAfterRefresh = true;
+    config.headers.Authorization = `Bearer ${token}`;
+    return axios(config);
+  }
+  throw error;
+});
+
 export const AuthProvider = ({ children }) => {
   const [isAuthenticated, setIsAuthenticated] = useState(false);
   const [user, setUser] = useState(null); // Stores user details like username, user_id from backend
@@ -14,8 +85,9 @@ export const AuthProvider = ({ children }) => {
     if (storedUser) {
       try {
         const parsedUser = JSON.parse(storedUser);
-        if (parsedUser && parsedUser.username && parsedUser.user_id) {
-          // Basic check for valid user data
+        if (parsedUser && parsedUser.username && parsedUser.user_id && parsedUser.refresh_token) {
+          // Basic check for valid user data (sessions stored before tokens existed must sign in again)
+          session = parsedUser;
           setUser(parsedUser);
           setIsAuthenticated(true);
           console.log("User found in localStorage, setting authenticated:", parsedUser.username);
@@ -35,6 +107,7 @@ export const AuthProvider = ({ children }) => {
 
   // Function to handle user login
   const login = (userData) => {
+    session = userData;
     setIsAuthenticated(true);
     setUser(userData);
     localStorage.setItem("user", JSON.stringify(userData)); // Store user info (e.g., username, user_id)
@@ -43,12 +116,27 @@ export const AuthProvider = ({ children }) => {
 
   // Function to handle user logout
   const logout = () => {
+    if (session) {
+      // Revokes the refresh token and the current access token on the server.
+      axios
+        .post(`${AUTH_API}/logout`, { refresh_token: session.refresh_token })
+        .catch((error) => console.error("Logout request failed:", error));
+    }
+    session = null;
     setIsAuthenticated(false);
     setUser(null);
     localStorage.removeItem("user"); // Clear stored info on logout
     console.log("User logged out.");
   };
 
+  // A failed refresh means the session is over (expired, revoked or signed out elsewhere).
+  onSessionExpired = () => {
+    session = null;
+    setIsAuthenticated(false);
+    setUser(null);
+    localStorage.removeItem("user");
+  };
+
   return (
     <AuthContext.Provider value={{ isAuthenticated, user, login, logout }}>
       {children}
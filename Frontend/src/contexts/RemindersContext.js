@@ -0,0 +1,139 @@
+import React, { createContext, useState, useEffect, useContext } from "react";
+import PropTypes from "prop-types";
+import axios from "axios";
+
+import { useAuth, getAccessToken, refreshSession } from "contexts/AuthContext";
+
+const API_BASE = "http://127.0.0.1:5000/api/notifications";
+
+// Shares one reminder connection per browser tab between the navbar badge and the
+// notifications page, instead of each of them calling get_reminders on every mount.
+const RemindersContext = createContext(null);
+
+// Reads "event: reminders" messages from the Server-Sent Events stream. fetch() is used
+// instead of EventSource so the Authorization header can be sent.
+async function readReminderStream(lastEventId, signal, onReminders) {
+  const headers = { Authorization: `Bearer ${getAccessToken()}` };
+  const response = await fetch(`${API_BASE}/stream`, {
+    headers: lastEventId ? { ...headers, "Last-Event-ID": lastEventId } : headers,
+    signal,
+  });
+  if (response.status === 401) {
+    // The access token expired; refresh it and reconnect right away.
+    await refreshSession();
+    return lastEventId;
+  }
+  if (response.status === 503 && response.headers.get("Retry-After")) {
+    // The server has no stream slot free; poll until it asks us to try again.
+    const error = new Error("Reminder stream busy");
+    error.retryAfter = Number(response.headers.get("Retry-After")) * 1000;
+    throw error;
+  }
+  if (!response.ok || !response.body) {
+    throw new Error(`Reminder stream unavailable (${response.status})`);
+  }
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let eventId = lastEventId;
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) return eventId;
+    buffer += decoder.decode(value, { stream: true });
+    let boundary = buffer.indexOf("\n\n");
+    while (boundary !== -1) {
+      const message = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let data = "";
+      message.split("\n").forEach((line) => {
+        if (line.startsWith("id: ")) eventId = line.slice(4);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      });
+      if (data) onReminders(JSON.parse(data));
+      boundary = buffer.indexOf("\n\n");
+    }
+  }
+}
+
+export const RemindersProvider = ({ children }) => {
+  const { isAuthenticated, user } = useAuth();
+  const [reminders, setReminders] = useState([]);
+  const [loading, setLoading] = useState(true);
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    if (!isAuthenticated || !user || !user.user_id) {
+      setReminders([]);
+      setLoading(false);
+      return undefined;
+    }
+    const controller = new AbortController();
+    const onReminders = (data) => {
+      setReminders(data);
+      setError(null);
+      setLoading(false);
+    };
+
+    const pollOnce = async () => {
+      try {
+        const response = await axios.get(`${API_BASE}/get_reminders`);
+        onReminders(response.data);
+      } catch (fetchError) {
+        setError(fetchError);
+        setLoading(false);
+      }
+    };
+
+    const run = async () => {
+      let lastEventId = null;
+      let failures = 0;
+      while (!controller.signal.aborted) {
+        try {
+          // The server closes the stream every few minutes; reconnect right away.
+          lastEventId = await readReminderStream(lastEventId, controller.signal, onReminders);
+          failures = 0;
+        } catch (err) {
+          if (controller.signal.aborted) return;
+          let delay;
+          if (err.retryAfter) {
+            // No stream slot free: poll get_reminders once per Retry-After, then try the stream again.
+            await pollOnce();
+            delay = err.retryAfter;
+          } else {
+            failures += 1;
+            if (failures === 1) {
+              // Fall back to a single fetch so the page still renders while the stream is down.
+              await pollOnce();
+            }
+            delay = Math.min(30000, 1000 * 2 ** failures);
+          }
+          await new Promise((resolve) => {
+            setTimeout(resolve, delay);
+          });
+        }
+      }
+    };
+
+    setLoading(true);
+    run();
+    return () => controller.abort();
+  }, [isAuthenticated, user]);
+
+  return (
+    <RemindersContext.Provider value={{ reminders, loading, error }}>
+      {children}
+    </RemindersContext.Provider>
+  );
+};
+
+RemindersProvider.propTypes = {
+  children: PropTypes.node.isRequired,
+};
+
+export const useReminders = () => {
+  const context = useContext(RemindersContext);
+  if (!context) {
+    throw new Error("useReminders must be used within a RemindersProvider");
+  }
+  return context;
+};
@@ -43,7 +43,7 @@ import {
 
 // Auth Context
 import { useAuth } from "contexts/AuthContext";
-import axios from "axios";
+import { useReminders } from "contexts/RemindersContext";
 
 // Image import for logo
 import myCustomLogo from "assets/images/1631340580623.jpg";
@@ -58,11 +58,12 @@ function DashboardNavbar({ absolute, light, isMini }) {
 
   const pathSegments = useLocation().pathname.split("/").filter(Boolean); // Still needed for path-based logic in title
 
-  const { isAuthenticated, logout, user } = useAuth();
+  const { isAuthenticated, logout } = useAuth();
   const navigate = useNavigate();
 
-  const [notificationCount, setNotificationCount] = useState(0);
-  const [notifications, setNotifications] = useState([]);
+  // Pushed by the reminder stream shared through RemindersProvider.
+  const { reminders: notifications } = useReminders();
+  const notificationCount = notifications.length;
 
   const [showSearchInput, setShowSearchInput] = useState(false);
   const [searchTerm, setSearchTerm] = useState("");
@@ -74,30 +75,6 @@ function DashboardNavbar({ absolute, light, isMini }) {
     }
   };
 
-  const fetchPasswordReminders = async () => {
-    if (!isAuthenticated || !user || !user.user_id) return;
-    try {
-      const response = await axios.get("http://127.0.0.1:5000/api/notifications/get_reminders", {
-        headers: {
-          "X-User-ID": user.user_id,
-        },
-      });
-      setNotifications(response.data);
-      setNotificationCount(response.data.length);
-    } catch (error) {
-      console.error("Error fetching password reminders:", error);
-    }
-  };
-
-  useEffect(() => {
-    if (isAuthenticated && user) {
-      fetchPasswordReminders();
-    } else {
-      setNotificationCount(0);
-      setNotifications([]);
-    }
-  }, [isAuthenticated, user]);
-
   useEffect(() => {
     if (fixedNavbar) {
       setNavbarType("sticky");
@@ -8,6 +8,7 @@ import { MaterialUIControllerProvider } from "context";
 
 // Import AuthProvider
 import { AuthProvider } from "./contexts/AuthContext"; // Add this import
+import { RemindersProvider } from "./contexts/RemindersContext";
 
 const container = document.getElementById("app");
 const root = createRoot(container);
@@ -19,7 +20,9 @@ root.render(
       <AuthProvider>
         {" "}
         {/* Add AuthProvider here */}
-        <App />
+        <RemindersProvider>
+          <App />
+        </RemindersProvider>
       </AuthProvider>
     </MaterialUIControllerProvider>
   </BrowserRouter>
@@ -260,41 +260,33 @@ function CreateItem() {
     }
 
     try {
-      const response = await axios.post(
-        "http://127.0.0.1:5000/api/items/create",
-        {
-          customer,
-          public_ip: publicIp,
-          private_ip: privateIp,
-          os_type: osType,
-          root_username: rootUsername,
-          root_password: rootPassword,
-          server_username: serverUsername,
-          server_password: serverPassword,
-          server_name: serverName,
-          core: core ? parseInt(core, 10) : null,
-          ram,
-          hdd,
-          ports,
-          location,
-          applications,
-          db_name: dbName,
-          db_password: dbPassword,
-          db_port: dbPort ? parseInt(dbPort, 10) : null,
-          dump_location: dumpLocation,
-          crontab_config: crontabConfig,
-          backup_location: backupLocation,
-          url,
-          login_name: loginName,
-          login_password: loginPassword,
-          db_password_set_at: dbPasswordSetAt, // Include in payload
-        },
-        {
-          headers: {
-            "X-User-ID": user.user_id,
-          },
-        }
-      );
+      const response = await axios.post("http://127.0.0.1:5000/api/items/create", {
+        customer,
+        public_ip: publicIp,
+        private_ip: privateIp,
+        os_type: osType,
+        root_username: rootUsername,
+        root_password: rootPassword,
+        server_username: serverUsername,
+        server_password: serverPassword,
+        server_name: serverName,
+        core: core ? parseInt(core, 10) : null,
+        ram,
+        hdd,
+        ports,
+        location,
+        applications,
+        db_name: dbName,
+        db_password: dbPassword,
+        db_port: dbPort ? parseInt(dbPort, 10) : null,
+        dump_location: dumpLocation,
+        crontab_config: crontabConfig,
+        backup_location: backupLocation,
+        url,
+        login_name: loginName,
+        login_password: loginPassword,
+        db_password_set_at: dbPasswordSetAt, // Include in payload
+      });
       openSnackbar(response.data.message, "success");
       setTimeout(() => {
         navigate("/tables");
@@ -58,6 +58,8 @@ function EditItem() {
   const [loginPassword, setLoginPassword] = useState("");
   // --- NEW FIELD STATE ---
   const [dbPasswordSetAt, setDbPasswordSetAt] = useState(""); // Default to empty, will be pre-filled
+  // The item as loaded (including its version), to send only the changed fields on save.
+  const [loadedItem, setLoadedItem] = useState(null);
 
   const [snackbarOpen, setSnackbarOpen] = useState(false);
   const [snackbarMessage, setSnackbarMessage] = useState("");
@@ -250,12 +252,13 @@ function EditItem() {
       return;
     }
     try {
-      const response = await axios.get(`http://127.0.0.1:5000/api/items/get/${item_id}`, {
-        headers: {
-          "X-User-ID": user.user_id,
-        },
-      });
-      const itemData = response.data;
+      // Credentials are not part of the item itself; they are decrypted on request only.
+      const [response, secretsResponse] = await Promise.all([
+        axios.get(`http://127.0.0.1:5000/api/items/get/${item_id}`),
+        axios.get(`http://127.0.0.1:5000/api/items/${item_id}/secrets`),
+      ]);
+      const itemData = { ...response.data, ...secretsResponse.data };
+      setLoadedItem(itemData);
       // Pre-fill existing fields
       setCustomer(itemData.customer || "");
       setPublicIp(itemData.public_ip || "");
@@ -314,48 +317,59 @@ function EditItem() {
       return;
     }
 
+    const payload = {
+      customer,
+      public_ip: publicIp,
+      private_ip: privateIp,
+      os_type: osType,
+      root_username: rootUsername,
+      root_password: rootPassword,
+      server_username: serverUsername,
+      server_password: serverPassword,
+      server_name: serverName,
+      core: core ? parseInt(core, 10) : null,
+      ram,
+      hdd,
+      ports,
+      location,
+      applications,
+      db_name: dbName,
+      db_password: dbPassword,
+      db_port: dbPort ? parseInt(dbPort, 10) : null,
+      dump_location: dumpLocation,
+      crontab_config: crontabConfig,
+      backup_location: backupLocation,
+      url,
+      login_name: loginName,
+      login_password: loginPassword,
+      db_password_set_at: dbPasswordSetAt, // <--- Include in payload
+    };
+    // Only the changed fields are sent, with the version the form was loaded at: the server
+    // refuses the update (409) if someone else saved the item in the meantime.
+    const changes = Object.fromEntries(
+      Object.entries(payload).filter(([field, value]) => value !== loadedItem[field])
+    );
+    if (Object.keys(changes).length === 0) {
+      openSnackbar("Nothing to update.", "info");
+      return;
+    }
+
     try {
-      const response = await axios.put(
-        `http://127.0.0.1:5000/api/items/update/${item_id}`,
-        {
-          customer,
-          public_ip: publicIp,
-          private_ip: privateIp,
-          os_type: osType,
-          root_username: rootUsername,
-          root_password: rootPassword,
-          server_username: serverUsername,
-          server_password: serverPassword,
-          server_name: serverName,
-          core: core ? parseInt(core, 10) : null,
-          ram,
-          hdd,
-          ports,
-          location,
-          applications,
-          db_name: dbName,
-          db_password: dbPassword,
-          db_port: dbPort ? parseInt(dbPort, 10) : null,
-          dump_location: dumpLocation,
-          crontab_config: crontabConfig,
-          backup_location: backupLocation,
-          url,
-          login_name: loginName,
-          login_password: loginPassword,
-          db_password_set_at: dbPasswordSetAt, // <--- Include in payload
-        },
-        {
-          headers: {
-            "X-User-ID": user.user_id,
-          },
-        }
-      );
+      const response = await axios.patch(`http://127.0.0.1:5000/api/items/update/${item_id}`, {
+        ...changes,
+        version: loadedItem.version,
+      });
       openSnackbar(response.data.message, "success");
       setTimeout(() => {
         navigate("/tables");
       }, 2000);
     } catch (error) {
-      if (error.response) {
+      if (error.response && error.response.status === 409) {
+        openSnackbar(
+          "This item was changed by someone else. Reload the page to see the latest version.",
+          "error"
+        );
+      } else if (error.response) {
         openSnackbar(`Error updating item: ${error.response.data.message}`, "error");
       } else if (error.request) {
         openSnackbar("Error: No response from server. Check if the backend is running.", "error");
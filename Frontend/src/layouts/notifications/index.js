@@ -2,7 +2,6 @@
 
 import { useState, useEffect } from "react";
 import { useNavigate } from "react-router-dom";
-import axios from "axios";
 
 // @mui material components
 import Grid from "@mui/material/Grid";
@@ -23,17 +22,15 @@ import DashboardNavbar from "examples/Navbars/DashboardNavbar";
 import Footer from "examples/Footer";
 import NotificationItem from "examples/Items/NotificationItem"; // Re-use NotificationItem
 
-// Auth Context
-import { useAuth } from "contexts/AuthContext";
+// Reminders pushed by the server (see RemindersProvider)
+import { useReminders } from "contexts/RemindersContext";
 
 function Notifications() {
   const navigate = useNavigate();
-  const { user, isAuthenticated } = useAuth();
-  const [notifications, setNotifications] = useState([]);
+  const { reminders: notifications, loading, error } = useReminders();
   const [snackbarOpen, setSnackbarOpen] = useState(false);
   const [snackbarMessage, setSnackbarMessage] = useState("");
   const [snackbarColor, setSnackbarColor] = useState("error");
-  const [loading, setLoading] = useState(true);
 
   const openSnackbar = (message, color) => {
     setSnackbarMessage(message);
@@ -43,36 +40,12 @@ function Notifications() {
 
   const closeSnackbar = () => setSnackbarOpen(false);
 
-  const fetchAllNotifications = async () => {
-    if (!isAuthenticated || !user || !user.user_id) {
-      setLoading(false);
-      return;
-    }
-    setLoading(true);
-    try {
-      const response = await axios.get("http://127.0.0.1:5000/api/notifications/get_reminders", {
-        headers: {
-          "X-User-ID": user.user_id,
-        },
-      });
-      setNotifications(response.data);
-    } catch (error) {
-      if (error.response) {
-        openSnackbar(`Error fetching notifications: ${error.response.data.message}`, "error");
-      } else if (error.request) {
-        openSnackbar("Error: No response from server when fetching notifications.", "error");
-      } else {
-        openSnackbar("An unexpected error occurred while fetching notifications.", "error");
-      }
+  useEffect(() => {
+    if (error) {
+      openSnackbar("Error: No response from server when fetching notifications.", "error");
       console.error("Fetch notifications error:", error);
-    } finally {
-      setLoading(false);
     }
-  };
-
-  useEffect(() => {
-    fetchAllNotifications();
-  }, [isAuthenticated, user]);
+  }, [error]);
 
   if (loading) {
     return (
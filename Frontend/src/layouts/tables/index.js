@@ -58,11 +58,7 @@ function Tables() {
       return;
     }
     try {
-      const response = await axios.get("http://127.0.0.1:5000/api/items/get_all", {
-        headers: {
-          "X-User-ID": user.user_id,
-        },
-      });
+      const response = await axios.get("http://127.0.0.1:5000/api/items/get_all");
       setItems(response.data);
     } catch (error) {
       if (error.response) {
@@ -93,11 +89,7 @@ function Tables() {
     if (!itemToDelete || !user || !user.user_id) return;
 
     try {
-      await axios.delete(`http://127.0.0.1:5000/api/items/delete/${itemToDelete.id}`, {
-        headers: {
-          "X-User-ID": user.user_id,
-        },
-      });
+      await axios.delete(`http://127.0.0.1:5000/api/items/delete/${itemToDelete.id}`);
       openSnackbar("Item deleted successfully!", "success");
       fetchItems(); // Refresh the list after deletion
     } catch (error) {
@@ -414,7 +406,7 @@ function Tables() {
                   </MDBox>
                   <MDBox component="td" p={1.5} px={3}>
                     <MDTypography variant="button" fontWeight="regular">
-                      {item.login_password ? "********" : "N/A"} {/* Hide password */}
+                      ******** {/* Credentials are never part of the listing */}
                     </MDTypography>
                   </MDBox>
                   <MDBox component="td" p={1.5} px={3}>
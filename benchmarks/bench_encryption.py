@@ -0,0 +1,132 @@
+"""Microbenchmark: item listing with encrypted credentials vs. plaintext storage.
+
+Seeds a throwaway SQLite database with two users holding N items each: one with
+credentials encrypted by EncryptedString, one with the same rows stored as
+plaintext (as before encryption). Times the get_all listing for both, which
+should be the same since listings never select or decrypt credentials, and
+the naive alternative that loads and decrypts every credential of the list.
+
+    python benchmarks/bench_encryption.py --rows 10000 --repeat 5
+"""
+import argparse
+import base64
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed(db, Item, User, rows):
+    from sqlalchemy import insert
+    user_ids = []
+    for name in ('encrypted', 'plaintext'):
+        user = User(username=name, email=f'{name}@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        user_ids.append(user.id)
+        now = datetime.utcnow()
+        db.session.execute(insert(Item), [dict(
+            user_id=user.id, customer=f'customer-{i % 50}', public_ip=f'203.0.113.{i % 250}',
+            private_ip=f'10.0.{i // 250 % 250}.{i % 250}', os_type='linux', root_username='root',
+            root_password=f'root-secret-{i}', server_username='admin', server_password=f'server-secret-{i}',
+            server_name=f'server-{i}', core=8, ram='32G', hdd='500G', ports='22,443',
+            location='eu-west', applications='nginx,postgres', db_name='app', db_password=f'db-secret-{i}',
+            db_port=5432, dump_location='/var/dumps', crontab_config='0 3 * * *',
+            backup_location='/var/backups', url=f'https://server-{i}.example.com', login_name='ops',
+            login_password=f'login-secret-{i}', db_password_set_at=date(2024, 1, 1), created_at=now,
+        ) for i in range(rows)])
+        db.session.commit()
+    # Overwrite the second user's credentials with raw text, bypassing EncryptedString.
+    db.session.execute(db.text(
+        "UPDATE item SET root_password = 'root-secret', server_password = 'server-secret', "
+        "db_password = 'db-secret', login_password = 'login-secret' WHERE user_id = :user_id"
+    ), {'user_id': user_ids[1]})
+    db.session.commit()
+    return user_ids
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ.setdefault('ITEM_ENCRYPTION_KEY', base64.urlsafe_b64encode(os.urandom(32)).decode())
+    os.environ.setdefault('REQUEST_LOG', 'false')
+    from sqlalchemy import select
+    from my_backend_app import create_app
+    from my_backend_app.models import db, Item, User, SECRET_FIELDS
+    from my_backend_app.cache import CachedUser
+    from my_backend_app.serializers import item_serializer
+    from my_backend_app.tokens import token_service
+
+    app = create_app()
+    try:
+        with app.app_context():
+            encrypted_id, plaintext_id = seed(db, Item, User, args.rows)
+            first_item_id = db.session.execute(
+                select(Item.id).where(Item.user_id == encrypted_id).limit(1)).scalar()
+            tokens = {user_id: token_service.issue_access(CachedUser(user_id, name, f'{name}@example.com'))
+                      for user_id, name in ((encrypted_id, 'encrypted'), (plaintext_id, 'plaintext'))}
+        client = app.test_client()
+
+        def auth(user_id):
+            return {'Authorization': f'Bearer {tokens[user_id]}'}
+
+        def get_all(user_id):
+            response = client.get('/api/items/get_all', headers=auth(user_id))
+            assert response.status_code == 200 and len(response.get_json()) == args.rows
+
+        def naive_decrypt_all():
+            with app.app_context():
+                rows = db.session.execute(
+                    select(*item_serializer.columns(), *(getattr(Item, f) for f in SECRET_FIELDS))
+                    .where(Item.user_id == encrypted_id)
+                ).all()
+                serialize = item_serializer.compile(item_serializer.fields)
+                count = len(item_serializer.fields)
+                item_serializer.dumps([
+                    {**serialize(row), **{f: v.reveal() for f, v in zip(SECRET_FIELDS, row[count:])}}
+                    for row in rows
+                ])
+
+        def get_secrets():
+            for _ in range(100):
+                client.get(f'/api/items/{first_item_id}/secrets', headers=auth(encrypted_id))
+
+        plaintext_s = timed(lambda: get_all(plaintext_id), args.repeat)
+        encrypted_s = timed(lambda: get_all(encrypted_id), args.repeat)
+        naive_s = timed(naive_decrypt_all, args.repeat)
+        secrets_s = timed(get_secrets, args.repeat) / 100
+    finally:
+        os.remove(db_path)
+
+    print(json.dumps({
+        'rows': args.rows,
+        'list_plaintext_ms': round(plaintext_s * 1000, 1),
+        'list_encrypted_ms': round(encrypted_s * 1000, 1),
+        'list_throughput_ratio': round(plaintext_s / encrypted_s, 2),
+        'naive_decrypt_all_ms': round(naive_s * 1000, 1),
+        'secrets_endpoint_ms': round(secrets_s * 1000, 3),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
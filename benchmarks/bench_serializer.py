@@ -0,0 +1,117 @@
+"""Microbenchmark: hand-written Item dicts + jsonify vs. the compiled row serializer.
+
+Seeds a throwaway SQLite database with N items and times serializing all of them
+the old way (ORM objects, per-field attribute lookups and isoformat, json) and the
+new way (Row tuples from select(), compiled serializer, orjson when installed).
+
+    python benchmarks/bench_serializer.py --rows 10000 --repeat 5
+"""
+import argparse
+import base64
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def legacy_item_dict(item):
+    # Credentials are left out on both sides: listings no longer return them.
+    return {
+        'id': item.id,
+        'customer': item.customer,
+        'public_ip': item.public_ip, 'private_ip': item.private_ip, 'os_type': item.os_type,
+        'root_username': item.root_username,
+        'server_username': item.server_username,
+        'server_name': item.server_name, 'core': item.core, 'ram': item.ram,
+        'hdd': item.hdd, 'ports': item.ports, 'location': item.location,
+        'applications': item.applications, 'db_name': item.db_name,
+        'db_port': item.db_port, 'dump_location': item.dump_location,
+        'crontab_config': item.crontab_config, 'backup_location': item.backup_location,
+        'url': item.url, 'login_name': item.login_name,
+        'created_at': item.created_at.isoformat(),
+        'db_password_set_at': item.db_password_set_at.isoformat()
+    }
+
+
+def seed(db, Item, User, rows):
+    from sqlalchemy import insert
+    user = User(username='bench', email='bench@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    now = datetime.utcnow()
+    db.session.execute(insert(Item), [dict(
+        user_id=user.id, customer=f'customer-{i % 50}', public_ip=f'203.0.113.{i % 250}',
+        private_ip=f'10.0.{i // 250 % 250}.{i % 250}', os_type='linux', root_username='root',
+        root_password='secret', server_username='admin', server_password='secret',
+        server_name=f'server-{i}', core=8, ram='32G', hdd='500G', ports='22,443',
+        location='eu-west', applications='nginx,postgres', db_name='app', db_password='secret',
+        db_port=5432, dump_location='/var/dumps', crontab_config='0 3 * * *',
+        backup_location='/var/backups', url=f'https://server-{i}.example.com', login_name='ops',
+        login_password='secret', db_password_set_at=date(2024, 1, 1), created_at=now,
+    ) for i in range(rows)])
+    db.session.commit()
+    return user.id
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ.setdefault('ITEM_ENCRYPTION_KEY', base64.urlsafe_b64encode(os.urandom(32)).decode())
+    from sqlalchemy import select
+    from my_backend_app import create_app
+    from my_backend_app.models import db, Item, User
+    from my_backend_app.serializers import item_serializer, orjson
+
+    app = create_app()
+    try:
+        with app.app_context():
+            user_id = seed(db, Item, User, args.rows)
+
+            def legacy():
+                db.session.expunge_all()
+                items = Item.query.filter_by(user_id=user_id).order_by(Item.created_at.desc()).all()
+                json.dumps([legacy_item_dict(item) for item in items])
+
+            def compiled():
+                serialize = item_serializer.compile(item_serializer.fields)
+                rows = db.session.execute(
+                    select(*item_serializer.columns()).where(Item.user_id == user_id).order_by(Item.created_at.desc())
+                ).all()
+                item_serializer.dumps([serialize(row) for row in rows])
+
+            legacy_s = timed(legacy, args.repeat)
+            compiled_s = timed(compiled, args.repeat)
+    finally:
+        os.remove(db_path)
+
+    print(json.dumps({
+        'rows': args.rows,
+        'encoder': 'orjson' if orjson is not None else 'json',
+        'legacy_ms': round(legacy_s * 1000, 1),
+        'compiled_ms': round(compiled_s * 1000, 1),
+        'speedup': round(legacy_s / compiled_s, 2),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,336 @@
+"""Latency / throughput benchmark for every blueprint endpoint.
+
+Seeds a throwaway database (SQLite by default, or any DATABASE_URL you pass with
+--database-url, e.g. a scratch Postgres) with users x items x login-history rows,
+then drives each endpoint through create_app() from concurrent clients and reports
+p50/p95/p99 latency, throughput, SQL statements per request, response bytes on the
+wire vs. decoded (gzip/brotli savings) and peak RSS. The *_revalidate cases send
+If-None-Match with a previously returned ETag and should answer 304.
+
+    python benchmarks/run_benchmarks.py --users 20 --items-per-user 2000 --clients 8
+    python benchmarks/run_benchmarks.py --output results/after.json --compare results/before.json
+
+Results are written as JSON so runs from different commits can be compared.
+"""
+import argparse
+import base64
+import gzip
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PASSWORD = 'benchmark-password'
+
+_local = threading.local()
+_tokens = {}
+_etags = {}
+_accept_encoding = None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', help='Database to seed (default: a temporary SQLite file).')
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--items-per-user', type=int, default=1000)
+    parser.add_argument('--logins-per-user', type=int, default=200)
+    parser.add_argument('--clients', type=int, default=4, help='Concurrent clients per endpoint.')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint.')
+    parser.add_argument('--endpoints', help='Comma-separated subset of endpoint names to run.')
+    parser.add_argument('--accept-encoding', default='gzip, br',
+                        help="Accept-Encoding sent with every request ('' for uncompressed responses).")
+    parser.add_argument('--output', help='Write results as JSON to this path.')
+    parser.add_argument('--compare', help='Previous results JSON to compare against.')
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    # Config reads the environment at import time, so this must run before importing the app.
+    os.environ['DATABASE_URL'] = args.database_url
+    # A throwaway key for the throwaway database; set ITEM_ENCRYPTION_KEY to reuse a seeded one.
+    os.environ.setdefault('ITEM_ENCRYPTION_KEY', base64.urlsafe_b64encode(os.urandom(32)).decode())
+    os.environ.setdefault('LOGIN_HISTORY_ASYNC', 'true')
+    os.environ.setdefault('LOGIN_THROTTLE_MAX_PER_IP', str(10 ** 9))
+    os.environ.setdefault('LOGIN_THROTTLE_MAX_PER_USERNAME', str(10 ** 9))
+    os.environ.setdefault('ACCESS_TOKEN_TTL', str(24 * 3600))
+
+
+def seed(db, args):
+    from sqlalchemy import insert
+    from my_backend_app.models import User, Item, LoginHistory
+    from my_backend_app.security import password_hasher
+
+    password_hash = password_hasher.hash(PASSWORD)
+    db.session.execute(insert(User), [
+        {'username': f'bench{u}', 'email': f'bench{u}@example.com', 'password_hash': password_hash}
+        for u in range(args.users)
+    ])
+    db.session.commit()
+    user_ids = [u.id for u in User.query.order_by(User.id)]
+
+    now = datetime.utcnow()
+    today = date.today()
+    for user_id in user_ids:
+        # Goes through the Item table, so EncryptedString and the db_password_fingerprint default
+        # apply as they do for rows the app writes.
+        db.session.execute(insert(Item), [dict(
+            user_id=user_id, customer=f'customer-{i % 50}', public_ip=f'203.0.{i // 250 % 250}.{i % 250}',
+            private_ip=f'10.0.{i // 250 % 250}.{i % 250}', os_type=('linux', 'windows')[i % 2],
+            root_username='root', root_password='secret', server_username='admin', server_password='secret',
+            server_name=f'server-{user_id}-{i}', core=1 + i % 32, ram='32G', hdd='500G', ports='22,443',
+            location=('eu-west', 'us-east', 'ap-south')[i % 3], applications='nginx,postgres', db_name='app',
+            db_password='secret', db_port=5432, dump_location='/var/dumps', crontab_config='0 3 * * *',
+            backup_location='/var/backups', url=f'https://server-{i}.example.com', login_name='ops',
+            login_password='secret', db_password_set_at=today - timedelta(days=i % 120),
+            created_at=now - timedelta(seconds=i),
+        ) for i in range(args.items_per_user)])
+        if args.logins_per_user:
+            db.session.execute(insert(LoginHistory), [
+                {'user_id': user_id, 'login_ip': '127.0.0.1', 'login_time': now - timedelta(minutes=i)}
+                for i in range(args.logins_per_user)
+            ])
+        db.session.commit()
+    return user_ids
+
+
+def issue_tokens(users):
+    from my_backend_app.cache import CachedUser
+    from my_backend_app.tokens import token_service
+    for user_id, username in users:
+        _tokens[user_id] = token_service.issue_access(CachedUser(user_id, username, f'{username}@example.com'))
+
+
+def auth_headers(client, user_id):
+    headers = {'Authorization': f'Bearer {_tokens[user_id]}'}
+    if _accept_encoding:
+        headers['Accept-Encoding'] = _accept_encoding
+    return headers
+
+
+def revalidate(client, user_id, path):
+    """GET with If-None-Match set to the ETag of this user's first response for path."""
+    etag = _etags.get((user_id, path))
+    if etag is None:
+        etag = _etags[(user_id, path)] = client.get(path, headers=auth_headers(client, user_id)).headers['ETag']
+    return client.get(path, headers={**auth_headers(client, user_id), 'If-None-Match': etag})
+
+
+def decoded_size(response, body):
+    encoding = response.headers.get('Content-Encoding')
+    if encoding == 'gzip':
+        return len(gzip.decompress(body))
+    if encoding == 'br' and brotli is not None:
+        return len(brotli.decompress(body))
+    return len(body)
+
+
+def endpoint_cases(first_item_ids):
+    """name -> function(client, user_id, username) performing one request and returning the response."""
+    def create_payload(username):
+        return {
+            'customer': 'bench', 'public_ip': '198.51.100.1', 'private_ip': '10.1.1.1', 'os_type': 'linux',
+            'root_username': 'root', 'root_password': 'x', 'server_username': 'admin', 'server_password': 'x',
+            'server_name': f'bench-{username}', 'core': 4, 'ram': '8G', 'hdd': '100G', 'ports': '22',
+            'location': 'eu-west', 'applications': 'nginx', 'db_name': 'app', 'db_password': 'x',
+            'db_port': 5432, 'dump_location': '/d', 'crontab_config': '*', 'backup_location': '/b',
+            'url': 'https://bench.example.com', 'login_name': 'ops', 'login_password': 'x',
+            'db_password_set_at': date.today().isoformat(),
+        }
+
+    item_versions = {}
+    versions_lock = threading.Lock()
+
+    def update_item(c, uid, name):
+        # Single-statement PATCH with the newest version any client has seen for the item. Clients
+        # sharing a user still race for it: those 409s are real contention and carry the current version.
+        with versions_lock:
+            version = item_versions.get(uid, 1)
+        response = c.patch(f'/api/items/update/{first_item_ids[uid]}',
+                           json={'customer': f'bench-{name}', 'version': version}, headers=auth_headers(c, uid))
+        seen = (response.get_json() or {}).get('version')
+        if seen is not None:
+            with versions_lock:
+                # A slower response must not move the version back.
+                item_versions[uid] = max(item_versions.get(uid, 1), seen)
+        return response
+
+    return {
+        'signin': lambda c, uid, name: c.post('/api/auth/signin', json={'username': name, 'password': PASSWORD}),
+        'get_all': lambda c, uid, name: c.get('/api/items/get_all', headers=auth_headers(c, uid)),
+        'get_all_page': lambda c, uid, name: c.get(
+            '/api/items/get_all?limit=50&fields=id,customer,server_name,public_ip,location,created_at',
+            headers=auth_headers(c, uid)),
+        'search': lambda c, uid, name: c.get(
+            '/api/items/search?location=eu-west&os_type=linux&q=server&limit=50', headers=auth_headers(c, uid)),
+        'stats': lambda c, uid, name: c.get('/api/items/stats', headers=auth_headers(c, uid)),
+        'get_single': lambda c, uid, name: c.get(f'/api/items/get/{first_item_ids[uid]}', headers=auth_headers(c, uid)),
+        'get_single_revalidate': lambda c, uid, name: revalidate(c, uid, f'/api/items/get/{first_item_ids[uid]}'),
+        'get_all_revalidate': lambda c, uid, name: revalidate(c, uid, '/api/items/get_all'),
+        'get_secrets': lambda c, uid, name: c.get(f'/api/items/{first_item_ids[uid]}/secrets',
+                                                  headers=auth_headers(c, uid)),
+        'get_reminders': lambda c, uid, name: c.get('/api/notifications/get_reminders', headers=auth_headers(c, uid)),
+        'login_history': lambda c, uid, name: c.get('/api/auth/login_history', headers=auth_headers(c, uid)),
+        'create_item': lambda c, uid, name: c.post('/api/items/create', json=create_payload(name),
+                                                   headers=auth_headers(c, uid)),
+        'update_item': update_item,
+    }
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_endpoint(app, case, users, args):
+    """Runs args.requests calls of one endpoint from args.clients threads."""
+    latencies = []
+    queries = []
+    statuses = {}
+    response_bytes = []
+    decoded_bytes = []
+    lock = threading.Lock()
+
+    def worker(worker_index):
+        client = app.test_client()
+        for n in range(worker_index, args.requests, args.clients):
+            user_id, username = users[n % len(users)]
+            _local.queries = 0
+            start = time.perf_counter()
+            response = case(client, user_id, username)
+            body = response.get_data()
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                queries.append(_local.queries)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                response_bytes.append(len(body))
+                decoded_bytes.append(decoded_size(response, body))
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        list(pool.map(worker, range(args.clients)))
+    wall = time.perf_counter() - wall_start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'statuses': {str(k): v for k, v in sorted(statuses.items())},
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        'throughput_rps': round(len(latencies) / wall, 2) if wall else 0.0,
+        'queries_per_request': round(statistics.fmean(queries), 2) if queries else 0.0,
+        'avg_response_bytes': round(statistics.fmean(response_bytes)) if response_bytes else 0,
+        'avg_decoded_bytes': round(statistics.fmean(decoded_bytes)) if decoded_bytes else 0,
+        'bytes_saved_pct': round((1 - sum(response_bytes) / sum(decoded_bytes)) * 100, 1) if sum(decoded_bytes) else 0.0,
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, previous_path):
+    with open(previous_path) as f:
+        previous = json.load(f)
+    print(f"\nCompared with {previous.get('commit')} ({previous_path}):")
+    for name, current in results['endpoints'].items():
+        before = previous.get('endpoints', {}).get(name)
+        if not before:
+            continue
+        deltas = []
+        for key in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'queries_per_request', 'avg_response_bytes'):
+            if before.get(key):
+                deltas.append(f"{key} {(current[key] - before[key]) / before[key] * 100:+.1f}%")
+        print(f"  {name:<22} " + ', '.join(deltas))
+
+
+def main():
+    args = parse_args()
+    temp_db = None
+    if not args.database_url:
+        fd, temp_db = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        args.database_url = f'sqlite:///{temp_db}'
+    configure_environment(args)
+    global _accept_encoding
+    _accept_encoding = args.accept_encoding
+
+    from sqlalchemy import event, func, select
+    from my_backend_app import create_app
+    from my_backend_app.models import db, Item
+    from my_backend_app.login_history import login_history_writer
+
+    app = create_app()
+    try:
+        with app.app_context():
+            seed_start = time.perf_counter()
+            user_ids = seed(db, args)
+            seed_seconds = time.perf_counter() - seed_start
+            first_item_ids = dict(db.session.execute(
+                select(Item.user_id, func.min(Item.id)).group_by(Item.user_id)).all())
+
+            @event.listens_for(db.engine, 'before_cursor_execute')
+            def count_queries(conn, cursor, statement, parameters, context, executemany):
+                _local.queries = getattr(_local, 'queries', 0) + 1
+
+            dialect = db.engine.dialect.name
+
+        users = [(user_id, f'bench{n}') for n, user_id in enumerate(user_ids)]
+        issue_tokens(users)
+        cases = endpoint_cases(first_item_ids)
+        selected = args.endpoints.split(',') if args.endpoints else list(cases)
+
+        results = {
+            'commit': git_commit(),
+            'timestamp': datetime.utcnow().isoformat(),
+            'database': dialect,
+            'params': {k: v for k, v in vars(args).items() if k not in ('output', 'compare', 'database_url')},
+            'seed_seconds': round(seed_seconds, 2),
+            'endpoints': {},
+        }
+        for name in selected:
+            results['endpoints'][name] = stats = run_endpoint(app, cases[name], users, args)
+            print(f"{name:<22} p50 {stats['p50_ms']:>8.2f} ms  p95 {stats['p95_ms']:>8.2f} ms  "
+                  f"p99 {stats['p99_ms']:>8.2f} ms  {stats['throughput_rps']:>8.1f} req/s  "
+                  f"{stats['queries_per_request']:>5.1f} q/req  {stats['avg_response_bytes']:>8} B "
+                  f"({stats['bytes_saved_pct']:>4.1f}% saved)  {stats['statuses']}")
+        results['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        login_history_writer.stop()
+    finally:
+        if temp_db and os.path.exists(temp_db):
+            os.remove(temp_db)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
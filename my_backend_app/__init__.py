@@ -3,21 +3,56 @@ from flask import Flask
 from flask_cors import CORS
 from .config import Config
 from .models import db # Import db from models.py
+from .cache import user_cache
+from .reminders import reminder_cache, reminder_broker, reminder_stream_slots
+from .security import password_hasher, login_throttle
+from .replicas import replica_router
+from .login_history import login_history_writer
+from .crypto import key_ring
+from .tokens import token_service
+from .serving import StartupTimer
+from . import pool, migrations, instrumentation, compression
 
 def create_app():
+    startup = StartupTimer()
     app = Flask(__name__)
     app.config.from_object(Config)
+    app.extensions['startup'] = startup
+    instrumentation.init_app(app)
 
     db.init_app(app)
+    key_ring.init_app(app)
+    replica_router.init_app(app)
+    user_cache.init_app(app)
+    token_service.init_app(app)
+    reminder_cache.init_app(app)
+    reminder_broker.init_app(app)
+    reminder_stream_slots.init_app(app)
+    password_hasher.init_app(app)
+    login_throttle.init_app(app)
+    login_history_writer.init_app(app)
+    pool.init_app(app)
+    compression.init_app(app)
+    migrations.init_app(app)
     CORS(app)
+    startup.lap('extensions')
 
     # Register blueprints
-    from .routes import auth_bp, items_bp, notifications_bp # <--- Ensure notifications_bp is imported
+    from .routes import auth_bp, items_bp, notifications_bp, internal_bp, health_bp # <--- Ensure notifications_bp is imported
     app.register_blueprint(auth_bp)
     app.register_blueprint(items_bp)
     app.register_blueprint(notifications_bp) # <--- ENSURE THIS LINE IS PRESENT AND UNCOMMENTED
+    app.register_blueprint(internal_bp)
+    app.register_blueprint(health_bp)
+    startup.lap('blueprints')
 
+    # Under Gunicorn (gunicorn.conf.py) this runs once in the master, before workers are forked.
     with app.app_context():
-        db.create_all()
+        key_ring.bind(db.engine)
+        startup.lap('encryption_keys')
+        if app.config['SCHEMA_CHECK_ON_STARTUP']:
+            migrations.sync_schema(db, auto_migrate=app.config['AUTO_MIGRATE'])
+            startup.lap('schema')
 
-    return app
\ No newline at end of file
+    startup.finish()
+    return app
@@ -0,0 +1,96 @@
+# my_backend_app/asgi.py
+"""ASGI entry point: SERVER_MODE=asgi in gunicorn.conf.py (Uvicorn workers).
+
+The reminder stream (/api/notifications/stream) is served on the event loop, so an
+open notification connection costs a coroutine instead of a worker thread. Every
+other request is passed unchanged to the Flask app on a2wsgi's thread pool.
+Requires the optional uvicorn and a2wsgi packages.
+"""
+import asyncio
+
+try:
+    from a2wsgi import WSGIMiddleware
+except ImportError:
+    WSGIMiddleware = None
+
+from . import create_app
+from .reminders import reminder_events_async
+from .serving import worker_settings
+from .tokens import TokenInvalid, token_service
+
+STREAM_PATH = '/api/notifications/stream'
+
+
+def _bearer_user(headers):
+    """The token's user, or None to let the Flask view answer (legacy header, 401 bodies)."""
+    authorization = headers.get(b'authorization', b'').decode('latin-1')
+    if not authorization.startswith('Bearer '):
+        return None
+    try:
+        return token_service.verify_access(authorization[7:])[0]
+    except TokenInvalid:
+        return None
+
+
+async def _reminder_stream(app, user, headers, receive, send):
+    config = app.config
+    response_headers = [(b'content-type', b'text/event-stream; charset=utf-8'), (b'cache-control', b'no-cache'),
+                        (b'x-accel-buffering', b'no')]
+    if b'origin' in headers:
+        # Same answer flask-cors gives the Flask route (CORS(app) allows any origin).
+        response_headers.append((b'access-control-allow-origin', b'*'))
+    last_event_id = headers.get(b'last-event-id')
+    events = reminder_events_async(app, user.id, last_event_id.decode('latin-1') if last_event_id else None,
+                                   heartbeat=config['REMINDER_STREAM_HEARTBEAT'],
+                                   max_seconds=config['REMINDER_STREAM_MAX_SECONDS'])
+
+    async def pump():
+        await send({'type': 'http.response.start', 'status': 200, 'headers': response_headers})
+        async for chunk in events:
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def disconnected():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    # Stop streaming as soon as the client goes away instead of at the next heartbeat.
+    tasks = [asyncio.ensure_future(pump()), asyncio.ensure_future(disconnected())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        if tasks[0].done():
+            tasks[0].result()  # Re-raise a failure of the stream itself.
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await events.aclose()
+
+
+def build_application(app):
+    if WSGIMiddleware is None:
+        raise RuntimeError('ASGI mode requires the a2wsgi package (pip install a2wsgi uvicorn).')
+    wsgi = WSGIMiddleware(app, workers=worker_settings()['threads'])
+
+    async def application(scope, receive, send):
+        if scope['type'] == 'lifespan':
+            # Startup work already happened in create_app(); worker_exit in gunicorn.conf.py handles shutdown.
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+        if scope['type'] == 'http' and scope['method'] == 'GET' and scope['path'] == STREAM_PATH:
+            headers = dict(scope['headers'])
+            user = _bearer_user(headers)
+            if user is not None:
+                return await _reminder_stream(app, user, headers, receive, send)
+        await wsgi(scope, receive, send)
+
+    application.flask_app = app
+    return application
+
+
+application = build_application(create_app())
@@ -0,0 +1,210 @@
+# my_backend_app/broker.py
+import asyncio
+import os
+import threading
+import time
+
+from .instrumentation import logger
+
+
+class Subscription:
+    """Wake-up handle for one listener. Notifications are coalesced: wait() only says something changed."""
+
+    def __init__(self, broker, key):
+        self.broker = broker
+        self.key = key
+        self._event = threading.Event()
+        self._waiter = None
+
+    def notify(self):
+        self._event.set()
+        waiter = self._waiter
+        if waiter is not None:
+            loop, event = waiter
+            loop.call_soon_threadsafe(event.set)
+
+    def wait(self, timeout):
+        """Blocks until notified or timeout seconds pass. Returns True if notified."""
+        notified = self._event.wait(timeout)
+        self._event.clear()
+        return notified
+
+    async def wait_async(self, timeout):
+        """wait() for asyncio code (asgi.py): suspends the coroutine instead of blocking a thread."""
+        if self._waiter is None:
+            self._waiter = (asyncio.get_running_loop(), asyncio.Event())
+        event = self._waiter[1]
+        notified = self._event.is_set()
+        if not notified:
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+                notified = True
+            except asyncio.TimeoutError:
+                pass
+        event.clear()
+        self._event.clear()
+        return notified
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MemoryBroker:
+    """In-process fan-out from publish(key) to every Subscription on that key."""
+
+    shared = False
+
+    def __init__(self):
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, key):
+        subscription = Subscription(self, str(key))
+        with self._lock:
+            self._subscriptions.setdefault(subscription.key, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscriptions.get(subscription.key)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscriptions[subscription.key]
+
+    def publish(self, key):
+        self.deliver(str(key))
+
+    def deliver(self, key):
+        with self._lock:
+            subscribers = list(self._subscriptions.get(key, ()))
+        for subscription in subscribers:
+            subscription.notify()
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._subscriptions.values())
+
+    def start(self):
+        """Starts receiving other processes' messages; nothing to do in-process."""
+
+
+class RedisBroker(MemoryBroker):
+    """Relays publishes through Redis pub/sub so listeners in every worker are woken (requires redis).
+
+    Each process keeps one pattern subscription, read by a background thread that
+    fans messages out to its local subscribers and calls on_message(key). With an
+    on_message callback the thread runs from the start (and again after fork), not
+    only once something subscribes, so every worker applies every message.
+    """
+
+    shared = True
+
+    def __init__(self, url, prefix, on_message=None):
+        import redis  # Optional dependency, only needed when this broker is selected.
+        super().__init__()
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.on_message = on_message
+        self._thread = None
+        self._thread_pid = None
+        self._thread_lock = threading.Lock()
+        if on_message is not None:
+            self.start()
+
+    def subscribe(self, key):
+        self.start()
+        return super().subscribe(key)
+
+    def publish(self, key):
+        try:
+            self.client.publish(f'{self.prefix}{key}', b'')
+        except Exception as e:
+            logger.warning("BROKER - Redis publish failed, notifying local subscribers only: %s", e)
+            self.deliver(str(key))
+
+    def start(self):
+        # Re-started in forked workers, where threads do not survive.
+        if self._thread is not None and self._thread_pid == os.getpid():
+            return
+        with self._thread_lock:
+            if self._thread is None or self._thread_pid != os.getpid():
+                self._thread = threading.Thread(target=self._listen, name='broker-listener', daemon=True)
+                self._thread_pid = os.getpid()
+                self._thread.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(f'{self.prefix}*')
+                for message in pubsub.listen():
+                    key = message['channel'].decode()[len(self.prefix):]
+                    if self.on_message is not None:
+                        self.on_message(key)
+                    self.deliver(key)
+            except Exception as e:
+                logger.error("BROKER - Redis subscription lost, reconnecting: %s", e)
+                time.sleep(1)
+
+
+_brokers = []
+
+
+class Broker:
+    """Per-key change notifications, in-process by default or shared through Redis.
+
+    on_message(key) is called once per process for every notification received from
+    Redis, so per-process caches can be invalidated for writes made by other workers.
+    """
+
+    def __init__(self, name, on_message=None):
+        self.name = name
+        self.on_message = on_message
+        self.backend = MemoryBroker()
+        _brokers.append(self)
+
+    def init_app(self, app):
+        backend = app.config.get('BROKER_BACKEND', 'memory')
+        if backend == 'redis':
+            self.backend = RedisBroker(app.config['BROKER_REDIS_URL'], f'{self.name}:',
+                                       self._remote_message if self.on_message else None)
+        elif backend == 'memory':
+            self.backend = MemoryBroker()
+        else:
+            raise ValueError(f"Unknown BROKER_BACKEND {backend!r}")
+        app.extensions[f'{self.name}_broker'] = self
+
+    @property
+    def shared(self):
+        return self.backend.shared
+
+    def subscribe(self, key):
+        return self.backend.subscribe(key)
+
+    def publish(self, key):
+        self.backend.publish(key)
+
+    def stats(self):
+        return {'backend': type(self.backend).__name__, 'subscribers': self.backend.subscriber_count()}
+
+    def _remote_message(self, key):
+        if self.on_message is not None:
+            self.on_message(key)
+
+
+def after_fork():
+    """Restarts the Redis listener threads in a forked worker (called from serving.after_fork)."""
+    for broker in _brokers:
+        broker.backend.start()
+
+
+def unshared_brokers():
+    """Names of the brokers whose messages stay inside the process that published them."""
+    return [broker.name for broker in _brokers if not broker.shared]
@@ -0,0 +1,184 @@
+# my_backend_app/cache.py
+import json
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from flask import g
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from .models import db, User
+
+# Lightweight identity snapshot stored in the cache instead of an ORM object,
+# so it can be shared across requests, sessions and (with Redis) processes.
+CachedUser = namedtuple('CachedUser', ['id', 'username', 'email'])
+
+
+class MemoryBackend:
+    """In-process LRU cache with a per-entry TTL. Safe to use from several threads."""
+
+    def __init__(self, maxsize=10000, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisBackend:
+    """Shared backend so every Gunicorn worker sees the same cache (requires the redis package)."""
+
+    def __init__(self, url, ttl=300, prefix='user_cache:'):
+        import redis  # Optional dependency, only needed when this backend is selected.
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + str(key))
+        if raw is None:
+            return None
+        return CachedUser(*json.loads(raw))
+
+    def set(self, key, value):
+        self.client.set(self.prefix + str(key), json.dumps(list(value)), ex=self.ttl)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + str(key))
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+    def __len__(self):
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + '*'))
+
+
+class UserCache:
+    """Identity cache used by login_required to skip the per-request User lookup.
+
+    Lookups are memoized on ``g`` for the current request and then served from the
+    configured backend. Entries are invalidated when a User row is inserted, updated
+    or deleted and the transaction commits.
+    """
+
+    def __init__(self):
+        self.backend = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        backend = app.config.get('USER_CACHE_BACKEND', 'memory')
+        ttl = app.config.get('USER_CACHE_TTL', 300)
+        if backend == 'redis':
+            self.backend = RedisBackend(app.config['USER_CACHE_REDIS_URL'], ttl=ttl)
+        elif backend == 'memory':
+            self.backend = MemoryBackend(maxsize=app.config.get('USER_CACHE_MAXSIZE', 10000), ttl=ttl)
+        else:
+            self.backend = None
+        app.extensions['user_cache'] = self
+
+    def get_user(self, user_id):
+        """Returns a CachedUser for user_id, or None if no such user exists."""
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return None
+
+        request_cache = g.setdefault('_user_cache', {})
+        if user_id in request_cache:
+            return request_cache[user_id]
+
+        cached = self.backend.get(user_id) if self.backend is not None else None
+        if cached is not None:
+            self._count(hit=True)
+        else:
+            self._count(hit=False)
+            user = db.session.get(User, user_id)
+            if user is not None:
+                cached = CachedUser(user.id, user.username, user.email)
+                if self.backend is not None:
+                    self.backend.set(user_id, cached)
+
+        request_cache[user_id] = cached
+        return cached
+
+    def invalidate(self, user_id):
+        if self.backend is not None:
+            self.backend.delete(int(user_id))
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'backend': type(self.backend).__name__ if self.backend is not None else None,
+            'size': len(self.backend) if self.backend is not None else 0,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+        }
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+user_cache = UserCache()
+
+
+# --- Invalidation: collect changed user ids at flush, drop them once the commit succeeded ---
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _mark_user_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('changed_user_ids', set()).add(target.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop('changed_user_ids', ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changed_users(session):
+    session.info.pop('changed_user_ids', None)
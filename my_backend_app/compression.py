@@ -0,0 +1,54 @@
+# my_backend_app/compression.py
+import gzip
+
+from flask import request
+
+from .instrumentation import timed
+
+try:
+    import brotli  # Optional: smaller bodies than gzip at a similar CPU cost for JSON.
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/csv')
+
+
+def choose_encoding(accept_encoding):
+    """Returns 'br', 'gzip' or None for an Accept-Encoding header value."""
+    if brotli is not None and accept_encoding['br']:
+        return 'br'
+    if accept_encoding['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(data, quality=level['br'])
+    return gzip.compress(data, compresslevel=level['gzip'], mtime=0)
+
+
+def init_app(app):
+    """Compresses buffered JSON/CSV responses of at least COMPRESS_MIN_SIZE bytes.
+
+    Streamed responses (NDJSON exports, SSE) are left alone: they are flushed row
+    by row and compressing them here would buffer the whole body.
+    """
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    level = {'gzip': app.config.get('COMPRESS_GZIP_LEVEL', 6), 'br': app.config.get('COMPRESS_BROTLI_QUALITY', 4)}
+    if not min_size:
+        return
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES or 'Content-Encoding' in response.headers):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None or response.calculate_content_length() < min_size:
+            return response
+        with timed('compress'):
+            response.set_data(compress(response.get_data(), encoding, level))
+        response.headers['Content-Encoding'] = encoding
+        return response
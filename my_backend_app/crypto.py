@@ -0,0 +1,217 @@
+# my_backend_app/crypto.py
+"""Field-level encryption for Item credentials.
+
+Envelope scheme: every value is encrypted with AES-256-GCM under a data key, and
+data keys are stored in the data_key table wrapped (AES-GCM) by the master key
+from ITEM_ENCRYPTION_KEY. Ciphertexts record the id of their data key, so keys
+can be rotated (rotate_data_key) without re-encrypting existing rows.
+
+ITEM_ENCRYPTION_KEY is required outside development and tests and is independent
+of SECRET_KEY, so SECRET_KEY can be rotated without losing stored credentials.
+Losing or changing ITEM_ENCRYPTION_KEY makes every stored credential unreadable.
+
+Unwrapped data keys are kept as ready AESGCM instances, so encrypting or
+decrypting a value costs one AES-GCM call. Loaded columns are EncryptedValue
+wrappers that only decrypt when reveal() is called.
+
+Every value is bound to its column: 'item.root_password' and the data key id are
+the AES-GCM associated data, so a ciphertext copied into another column, or given
+another key id, fails to decrypt. Values are not bound to their row, because the
+column type encrypts without seeing the row; a ciphertext copied to the same
+column of another row still decrypts. Guarding against that needs row-level
+write protection in the database, which is out of scope here.
+
+Ciphertexts use random nonces and never compare equal; fingerprint() gives a
+keyed HMAC of a value (key derived from the master key) for equality checks in SQL.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from datetime import datetime
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from sqlalchemy import MetaData, Table, Column, Integer, LargeBinary, DateTime, Text, insert, select
+from sqlalchemy.types import TypeDecorator
+
+from .instrumentation import logger
+
+PREFIX = 'enc1:'
+NONCE_SIZE = 12
+# Used when ITEM_ENCRYPTION_KEY is unset in debug or testing mode only. It is public, so it protects nothing.
+DEV_MASTER_KEY = b'my_backend_app insecure dev key!'
+
+_metadata = MetaData()
+data_keys = Table(
+    'data_key', _metadata,
+    Column('id', Integer, primary_key=True),
+    Column('wrapped_key', LargeBinary, nullable=False),
+    Column('created_at', DateTime, nullable=False),
+)
+
+
+class EncryptedValue:
+    """A stored secret that is decrypted on first reveal(), never implicitly.
+
+    context names the column the ciphertext belongs to ('item.root_password').
+    """
+
+    __slots__ = ('ciphertext', 'context', '_plaintext')
+
+    def __init__(self, ciphertext, context, plaintext=None):
+        self.ciphertext = ciphertext
+        self.context = context
+        self._plaintext = plaintext
+
+    def reveal(self):
+        if self._plaintext is None:
+            self._plaintext = key_ring.decrypt(self.ciphertext, self.context)
+        return self._plaintext
+
+    def __bool__(self):
+        return bool(self.ciphertext or self._plaintext)
+
+    def __repr__(self):
+        return '<EncryptedValue>'
+
+
+class EncryptedString(TypeDecorator):
+    """Text column holding 'enc1:<key id>:<base64 nonce+ciphertext>'.
+
+    context is the '<table>.<column>' name the values are bound to. Accepts str
+    (encrypted on write) or an EncryptedValue (stored as is if it belongs to this
+    column, re-encrypted otherwise) and loads as EncryptedValue. Rows written before
+    encryption was enabled load as already-revealed values until the migration
+    re-encrypts them.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def __init__(self, context):
+        super().__init__()
+        self.context = context
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, EncryptedValue):
+            if value.ciphertext is not None and value.context == self.context:
+                return value.ciphertext
+            value = value.reveal()
+        return key_ring.encrypt(value, self.context)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if value.startswith(PREFIX):
+            return EncryptedValue(value, self.context)
+        return EncryptedValue(None, self.context, value)
+
+
+def _associated_data(context, key_id):
+    return f'{context}:{key_id}'.encode()
+
+
+class KeyRing:
+    def __init__(self):
+        self.engine = None
+        self._master = None
+        self._fingerprint_key = None
+        self._ciphers = {}
+        self._active_id = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        key = app.config.get('ITEM_ENCRYPTION_KEY')
+        if key:
+            master = base64.urlsafe_b64decode(key + '=' * (-len(key) % 4))
+            if len(master) != 32:
+                raise ValueError('ITEM_ENCRYPTION_KEY must be 32 bytes, urlsafe base64 encoded.')
+        elif app.debug or app.testing:
+            logger.warning("ITEM_ENCRYPTION_KEY is not set; using the public development key. "
+                           "Stored credentials are not protected.")
+            master = DEV_MASTER_KEY
+        else:
+            raise RuntimeError(
+                'ITEM_ENCRYPTION_KEY is not set. Generate one with: python -c "import base64, os; '
+                'print(base64.urlsafe_b64encode(os.urandom(32)).decode())" and keep it with your backups.')
+        self._master = AESGCM(master)
+        self._fingerprint_key = HKDF(algorithm=hashes.SHA256(), length=32, salt=None,
+                                     info=b'my_backend_app secret fingerprint').derive(master)
+        self._ciphers.clear()
+        self._active_id = None
+        app.extensions['key_ring'] = self
+
+    def bind(self, engine):
+        """Creates the data_key table if needed and loads (or creates) the active data key."""
+        self.engine = engine
+        _metadata.create_all(engine)
+        with engine.begin() as conn:
+            row = conn.execute(select(data_keys).order_by(data_keys.c.id.desc()).limit(1)).first()
+        if row is None:
+            self.rotate_data_key()
+        else:
+            self._active_id = self._load(row)
+
+    def rotate_data_key(self):
+        """Generates a new data key; new values are encrypted with it from now on."""
+        key = AESGCM.generate_key(bit_length=256)
+        nonce = os.urandom(NONCE_SIZE)
+        with self.engine.begin() as conn:
+            key_id = conn.execute(insert(data_keys).values(
+                wrapped_key=nonce + self._master.encrypt(nonce, key, b'data_key'),
+                created_at=datetime.utcnow())).inserted_primary_key[0]
+        with self._lock:
+            self._ciphers[key_id] = AESGCM(key)
+            self._active_id = key_id
+        return key_id
+
+    def encrypt(self, plaintext, context):
+        """Encrypts plaintext for the column named by context ('item.root_password')."""
+        if self._active_id is None:
+            raise RuntimeError('Encryption keys are not loaded; call key_ring.bind(engine) first.')
+        key_id = self._active_id
+        nonce = os.urandom(NONCE_SIZE)
+        ciphertext = self._ciphers[key_id].encrypt(nonce, plaintext.encode(), _associated_data(context, key_id))
+        return f'{PREFIX}{key_id}:' + base64.b64encode(nonce + ciphertext).decode()
+
+    def fingerprint(self, plaintext):
+        return hmac.new(self._fingerprint_key, plaintext.encode(), hashlib.sha256).hexdigest()
+
+    def decrypt(self, value, context):
+        key_id, payload = value[len(PREFIX):].split(':', 1)
+        key_id = int(key_id)
+        raw = base64.b64decode(payload)
+        return self._cipher(key_id).decrypt(raw[:NONCE_SIZE], raw[NONCE_SIZE:],
+                                            _associated_data(context, key_id)).decode()
+
+    def _cipher(self, key_id):
+        cipher = self._ciphers.get(key_id)
+        if cipher is None:
+            # A key created by another worker after this one started.
+            with self.engine.connect() as conn:
+                row = conn.execute(select(data_keys).where(data_keys.c.id == key_id)).one()
+            self._load(row)
+            cipher = self._ciphers[key_id]
+        return cipher
+
+    def _load(self, row):
+        wrapped = row.wrapped_key
+        try:
+            key = self._master.decrypt(wrapped[:NONCE_SIZE], wrapped[NONCE_SIZE:], b'data_key')
+        except InvalidTag:
+            raise RuntimeError(
+                f'Data key {row.id} cannot be unwrapped: ITEM_ENCRYPTION_KEY is not the key the stored data '
+                'keys were created with. Restore the original key; stored credentials cannot be read without it.'
+            ) from None
+        with self._lock:
+            self._ciphers[row.id] = AESGCM(key)
+        return row.id
+
+
+key_ring = KeyRing()
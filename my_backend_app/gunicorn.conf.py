@@ -0,0 +1,79 @@
+# my_backend_app/gunicorn.conf.py
+"""Production server settings. Run from the repository root:
+
+    gunicorn -c my_backend_app/gunicorn.conf.py
+    SERVER_MODE=asgi gunicorn -c my_backend_app/gunicorn.conf.py   # needs uvicorn and a2wsgi
+
+The app is preloaded: create_app() - encryption keys and the schema check - runs
+once in the master and workers are forked from it (post_fork drops the inherited
+database connections). Worker and thread counts come from serving.worker_settings()
+(WEB_CONCURRENCY, WEB_THREADS, DB_POOL_SIZE, DB_POOL_MAX_OVERFLOW, DB_MAX_CONNECTIONS,
+DATABASE_REPLICA_URLS); when_ready logs the resulting database connection budget.
+
+In the default gthread mode every open /api/notifications/stream connection holds
+a worker thread, so a worker serves at most REMINDER_STREAM_MAX_PER_WORKER streams
+(a third of its threads by default) and answers 503 with Retry-After beyond that;
+clients then poll get_reminders. SERVER_MODE=asgi serves those streams on an event
+loop instead.
+
+Graceful reload: `kill -HUP <master>` replaces the workers, letting in-flight
+requests finish within graceful_timeout. A preloaded app keeps its code across HUP,
+so deploying new code takes a new master: `kill -USR2 <master>`, then
+`kill -WINCH <old master>` and `kill -QUIT <old master>` once the new one is ready.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from my_backend_app.serving import (after_fork, log_connection_budget, release_connections, warn_unshared_state,
+                                    worker_settings, worker_shutdown)
+
+_sizing = worker_settings()
+
+bind = os.getenv('BIND', '0.0.0.0:5000')
+preload_app = True
+workers = _sizing['workers']
+if os.getenv('SERVER_MODE', 'wsgi') == 'asgi':
+    wsgi_app = 'my_backend_app.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'my_backend_app.wsgi:app'
+    worker_class = 'gthread'
+    threads = _sizing['threads']
+timeout = int(os.getenv('WEB_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('WEB_KEEPALIVE', '5'))
+
+
+def _flask_app(application):
+    # In ASGI mode the loaded callable wraps the Flask app.
+    return getattr(application, 'flask_app', application)
+
+
+def when_ready(server):
+    app = _flask_app(server.app.wsgi())
+    server.log.info("Preloaded app (%s ms), starting %s workers x %s threads",
+                    app.extensions['startup'].total_ms, workers, _sizing['threads'])
+    log_connection_budget(_sizing)
+    hash_workers = app.config['PASSWORD_HASH_WORKERS']
+    server.log.info("Password hashing: %s processes per worker, %s on this host", hash_workers, hash_workers * workers)
+    warn_unshared_state(workers)
+    release_connections(app)
+
+
+def pre_fork(server, worker):
+    worker.forked_at = time.time()
+
+
+def post_fork(server, worker):
+    after_fork(_flask_app(server.app.wsgi()))
+
+
+def post_worker_init(worker):
+    _flask_app(worker.wsgi).extensions['startup'].worker_ready(worker.forked_at)
+
+
+def worker_exit(server, worker):
+    worker_shutdown()
@@ -0,0 +1,208 @@
+# my_backend_app/instrumentation.py
+import atexit
+import collections
+import contextlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('my_backend_app')
+request_logger = logging.getLogger('my_backend_app.request')
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; fields passed via extra={'fields': {...}} are merged in."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.utcfromtimestamp(record.created).isoformat() + 'Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(app):
+    """Routes the app loggers through a queue so request threads never block on stderr."""
+    global _listener
+    level = getattr(logging, app.config.get('LOG_LEVEL', 'INFO').upper(), logging.INFO)
+    logger.setLevel(level)
+    logger.propagate = False
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    if app.config.get('LOG_FORMAT', 'text') == 'json':
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def restart_log_listener():
+    """Starts a new log writer thread in a forked worker; the master's thread does not survive fork()."""
+    global _listener
+    if _listener is None:
+        return
+    _listener = logging.handlers.QueueListener(_listener.queue, *_listener.handlers)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+# --- SQL statement count and time, accumulated per request ---
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    if has_request_context() and 'request_start' in g:
+        g.db_queries += 1
+        g.db_time += elapsed
+
+
+@contextlib.contextmanager
+def timed(name):
+    """Adds the time spent in the block to the named Server-Timing metric of the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if has_request_context() and 'request_start' in g:
+            g.timings[name] = g.timings.get(name, 0.0) + time.perf_counter() - start
+
+
+class SamplingProfiler:
+    """Samples the stacks of in-flight request threads at a fixed interval.
+
+    When a request takes longer than PROFILE_SLOW_REQUEST_MS its samples are written
+    in collapsed-stack format (one "frame;frame;frame count" line per stack), ready
+    for flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, interval, output_dir):
+        self.interval = interval
+        self.output_dir = output_dir
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start_request(self):
+        with self._lock:
+            self._active[threading.get_ident()] = collections.Counter()
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+            self._thread.start()
+
+    def finish_request(self):
+        with self._lock:
+            return self._active.pop(threading.get_ident(), None)
+
+    def dump(self, samples, method, path, duration_ms):
+        os.makedirs(self.output_dir, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', path).strip('_') or 'root'
+        filename = os.path.join(
+            self.output_dir, f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{method}-{slug}-{int(duration_ms)}ms.folded")
+        with open(filename, 'w') as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return filename
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, counter in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        counter[_collapse(frame)] += 1
+
+
+def _collapse(frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ';'.join(reversed(stack))
+
+
+def init_app(app):
+    configure_logging(app)
+    log_requests = app.config.get('REQUEST_LOG', True)
+    server_timing = app.config.get('SERVER_TIMING', True)
+    slow_ms = app.config.get('PROFILE_SLOW_REQUEST_MS', 0)
+    profiler = None
+    if slow_ms:
+        profiler = SamplingProfiler(app.config.get('PROFILE_SAMPLE_INTERVAL_MS', 5) / 1000,
+                                    app.config.get('PROFILE_DIR', 'profiles'))
+
+    @app.before_request
+    def start_request_metrics():
+        g.request_start = time.perf_counter()
+        g.db_queries = 0
+        g.db_time = 0.0
+        g.timings = {}
+        if profiler is not None:
+            profiler.start_request()
+
+    @app.after_request
+    def finish_request_metrics(response):
+        if 'request_start' not in g:
+            return response
+        duration = time.perf_counter() - g.request_start
+        if server_timing:
+            metrics = [f'app;dur={duration * 1000:.2f}',
+                       f'db;dur={g.db_time * 1000:.2f};desc="{g.db_queries} queries"']
+            metrics.extend(f'{name};dur={value * 1000:.2f}' for name, value in g.timings.items())
+            response.headers.add('Server-Timing', ', '.join(metrics))
+        if log_requests and request_logger.isEnabledFor(logging.INFO):
+            request_logger.info('%s %s %s %.2fms db=%d/%.2fms', request.method, request.path, response.status_code,
+                                duration * 1000, g.db_queries, g.db_time * 1000, extra={'fields': {
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 2),
+                'db_queries': g.db_queries,
+                'db_ms': round(g.db_time * 1000, 2),
+                'serialize_ms': round(g.timings.get('serialize', 0.0) * 1000, 2),
+                'bytes': response.calculate_content_length(),
+                'user_id': g.user.id if 'user' in g else None,
+            }})
+        if profiler is not None:
+            samples = profiler.finish_request()
+            if samples and duration * 1000 >= slow_ms:
+                filename = profiler.dump(samples, request.method, request.path, duration * 1000)
+                logger.warning('Slow request %s %s (%.0f ms), profile written to %s',
+                               request.method, request.path, duration * 1000, filename)
+        return response
+
+    if profiler is not None:
+        @app.teardown_request
+        def discard_profile_samples(exc):
+            profiler.finish_request()
@@ -0,0 +1,147 @@
+# my_backend_app/login_history.py
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select
+
+from .models import db, LoginHistory
+from .instrumentation import logger
+
+_STOP = object()
+
+
+class LoginHistoryWriter:
+    """Buffers sign-in events and writes them in multi-row batches off the request path.
+
+    Events are flushed when LOGIN_HISTORY_BATCH_SIZE rows are queued or every
+    LOGIN_HISTORY_FLUSH_INTERVAL seconds, and once more at interpreter shutdown.
+    The same background thread prunes rows older than LOGIN_HISTORY_RETENTION_DAYS.
+    With LOGIN_HISTORY_ASYNC disabled (or a full queue) rows are written inline.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self.batch_size = 500
+        self.flush_interval = 1.0
+        self.retention_days = 90
+        self.prune_interval = 3600
+        self.prune_chunk = 5000
+        self._queue = None
+        self._thread = None
+        self._thread_pid = None
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('LOGIN_HISTORY_ASYNC', self.enabled)
+        self.batch_size = app.config.get('LOGIN_HISTORY_BATCH_SIZE', self.batch_size)
+        self.flush_interval = app.config.get('LOGIN_HISTORY_FLUSH_INTERVAL', self.flush_interval)
+        self.retention_days = app.config.get('LOGIN_HISTORY_RETENTION_DAYS', self.retention_days)
+        self.prune_interval = app.config.get('LOGIN_HISTORY_PRUNE_INTERVAL', self.prune_interval)
+        self._queue = queue.Queue(maxsize=app.config.get('LOGIN_HISTORY_QUEUE_SIZE', 10000))
+        app.extensions['login_history_writer'] = self
+
+    def record(self, user_id, login_ip, login_time=None):
+        row = {'user_id': user_id, 'login_ip': login_ip, 'login_time': login_time or datetime.utcnow()}
+        if self.enabled:
+            self._ensure_thread()
+            try:
+                self._queue.put_nowait(row)
+                return
+            except queue.Full:
+                logger.warning("LOGIN_HISTORY - Queue full, writing login event inline.")
+        self._write([row])
+
+    def flush(self):
+        """Writes everything queued so far from the calling thread."""
+        rows = []
+        while True:
+            try:
+                row = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is not _STOP:
+                rows.append(row)
+        if rows:
+            self._write(rows)
+
+    def stop(self, timeout=5):
+        if self._queue is None:
+            return
+        if self._thread is not None and self._thread.is_alive() and self._thread_pid == os.getpid():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+        self.flush()
+
+    def prune(self, now=None):
+        """Deletes rows older than the retention window in bounded chunks. Returns rows deleted."""
+        if not self.retention_days:
+            return 0
+        cutoff = (now or datetime.utcnow()) - timedelta(days=self.retention_days)
+        deleted = 0
+        with self.app.app_context():
+            while True:
+                ids = select(LoginHistory.id).where(LoginHistory.login_time < cutoff).limit(self.prune_chunk)
+                result = db.session.execute(delete(LoginHistory).where(LoginHistory.id.in_(ids)))
+                db.session.commit()
+                deleted += result.rowcount
+                if result.rowcount < self.prune_chunk:
+                    break
+            db.session.remove()
+        return deleted
+
+    def _ensure_thread(self):
+        # Started lazily and re-started in forked workers, where threads do not survive.
+        if self._thread is not None and self._thread_pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._thread_pid != os.getpid():
+                self._thread = threading.Thread(target=self._run, name='login-history-writer', daemon=True)
+                self._thread_pid = os.getpid()
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            rows = []
+            deadline = time.monotonic() + self.flush_interval
+            stopping = False
+            while len(rows) < self.batch_size:
+                try:
+                    row = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if row is _STOP:
+                    stopping = True
+                    break
+                rows.append(row)
+            if rows:
+                self._write(rows)
+            if stopping:
+                return
+            if self.prune_interval and time.monotonic() - self._last_prune >= self.prune_interval:
+                self._last_prune = time.monotonic()
+                try:
+                    self.prune()
+                except Exception as e:
+                    logger.error("LOGIN_HISTORY - Pruning failed: %s", e)
+
+    def _write(self, rows):
+        with self.app.app_context():
+            try:
+                db.session.execute(insert(LoginHistory), rows)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error("LOGIN_HISTORY - Failed to write %s login events: %s", len(rows), e)
+            finally:
+                db.session.remove()
+
+
+login_history_writer = LoginHistoryWriter()
+atexit.register(login_history_writer.stop)
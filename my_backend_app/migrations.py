@@ -0,0 +1,202 @@
+# my_backend_app/migrations.py
+"""Versioned schema migrations for existing databases.
+
+db.create_all() only creates missing tables, so every schema change made to
+models.py after a table exists is also written here as a numbered step.
+Applied versions are recorded in the schema_migrations table; steps are written
+to be idempotent so a partially applied step can simply be re-run.
+
+    flask --app my_backend_app db-upgrade     # apply pending migrations
+    flask --app my_backend_app db-status      # show applied / pending migrations
+"""
+from datetime import datetime
+
+import click
+from sqlalchemy import (MetaData, Table, Column, Integer, String, DateTime, Text, bindparam, inspect, insert,
+                        or_, select, type_coerce, update)
+
+from .instrumentation import logger
+
+_metadata = MetaData()
+schema_migrations = Table(
+    'schema_migrations', _metadata,
+    Column('version', Integer, primary_key=True),
+    Column('name', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+MIGRATIONS = []
+
+
+def migration(version, name):
+    def register(fn):
+        MIGRATIONS.append((version, name, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return register
+
+
+def create_index(conn, name, table, columns, using=None):
+    # On Postgres the index is built CONCURRENTLY so large tables stay writable.
+    concurrently = 'CONCURRENTLY ' if conn.dialect.name == 'postgresql' else ''
+    using = f'USING {using} ' if using else ''
+    conn.exec_driver_sql(f'CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} {using}({columns})')
+
+
+def add_column(conn, table, name, ddl):
+    if name not in {c['name'] for c in inspect(conn).get_columns(table)}:
+        conn.exec_driver_sql(f'ALTER TABLE {table} ADD COLUMN {name} {ddl}')
+
+
+# --- Migrations ---
+@migration(1, 'indexes for item listing, password reminders and login history')
+def _hot_query_indexes(conn):
+    create_index(conn, 'ix_item_user_id_created_at_id', 'item', 'user_id, created_at DESC, id DESC')
+    create_index(conn, 'ix_item_user_id_db_password_set_at', 'item', 'user_id, db_password_set_at')
+    create_index(conn, 'ix_login_history_user_id_login_time', 'login_history', 'user_id, login_time DESC')
+
+
+@migration(2, 'item.updated_at and item_tombstone for incremental sync')
+def _incremental_sync(conn):
+    from .models import ItemTombstone
+    add_column(conn, 'item', 'updated_at', 'TIMESTAMP')
+    conn.exec_driver_sql('UPDATE item SET updated_at = created_at WHERE updated_at IS NULL')
+    if conn.dialect.name == 'postgresql':
+        conn.exec_driver_sql('ALTER TABLE item ALTER COLUMN updated_at SET NOT NULL')
+    create_index(conn, 'ix_item_user_id_updated_at', 'item', 'user_id, updated_at')
+    ItemTombstone.__table__.create(conn, checkfirst=True)
+
+
+@migration(3, 'indexes for item search filters and trigram text search')
+def _search_indexes(conn):
+    for column in ('customer', 'location', 'os_type'):
+        create_index(conn, f'ix_item_user_id_{column}', 'item', f'user_id, {column}')
+    if conn.dialect.name == 'postgresql':
+        conn.exec_driver_sql('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for column in ('customer', 'server_name', 'applications', 'url'):
+            create_index(conn, f'ix_item_{column}_trgm', 'item', f'{column} gin_trgm_ops', using='gin')
+
+
+@migration(4, 'encrypt item credentials')
+def _encrypt_item_secrets(conn):
+    from .crypto import PREFIX, EncryptedValue
+    from .models import Item, SECRET_FIELDS
+    if conn.dialect.name == 'postgresql':
+        for field in SECRET_FIELDS:
+            conn.exec_driver_sql(f'ALTER TABLE item ALTER COLUMN {field} TYPE TEXT')
+    table = Item.__table__
+    # Read the stored text as is (type_coerce skips EncryptedString) to find plaintext rows.
+    raw = {field: type_coerce(table.c[field], Text) for field in SECRET_FIELDS}
+    stmt = (
+        select(table.c.id, *(column.label(field) for field, column in raw.items()))
+        .where(or_(*(~column.startswith(PREFIX) for column in raw.values())))
+        .order_by(table.c.id)
+        .limit(1000)
+    )
+    encrypt = update(table).where(table.c.id == bindparam('_id')).values(
+        {field: bindparam(field) for field in SECRET_FIELDS})
+    last_id = 0
+    while True:
+        rows = conn.execute(stmt.where(table.c.id > last_id)).all()
+        if not rows:
+            break
+        # Plain strings are encrypted by EncryptedString; already encrypted values are kept as they are.
+        conn.execute(encrypt, [
+            {'_id': row.id, **{field: EncryptedValue(value, f'item.{field}') if value.startswith(PREFIX) else value
+                               for field, value in zip(SECRET_FIELDS, row[1:])}}
+            for row in rows
+        ])
+        last_id = rows[-1].id
+
+
+@migration(5, 'refresh_token table for signed access tokens')
+def _refresh_tokens(conn):
+    from .models import RefreshToken
+    RefreshToken.__table__.create(conn, checkfirst=True)
+
+
+@migration(6, 'item.version and item.db_password_fingerprint for conditional updates')
+def _item_versions(conn):
+    from .models import Item, store_db_password_fingerprints
+    add_column(conn, 'item', 'version', 'INTEGER NOT NULL DEFAULT 1')
+    add_column(conn, 'item', 'db_password_fingerprint', 'VARCHAR(64)')
+    table = Item.__table__
+    stmt = select(table.c.id, table.c.user_id, table.c.db_password).order_by(table.c.id).limit(1000)
+    last_id = 0
+    while True:
+        rows = conn.execute(stmt.where(table.c.id > last_id)).all()
+        if not rows:
+            break
+        store_db_password_fingerprints(conn, rows)
+        last_id = rows[-1].id
+
+
+# --- Runner ---
+def _log(message):
+    logger.info("MIGRATIONS - %s", message)
+
+
+def applied_versions(engine):
+    """Versions recorded in schema_migrations; read-only, so /readyz can call it."""
+    with engine.connect() as conn:
+        if not inspect(conn).has_table('schema_migrations'):
+            return set()
+        return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def pending_migrations(engine):
+    applied = applied_versions(engine)
+    return [m for m in MIGRATIONS if m[0] not in applied]
+
+
+def upgrade(engine, echo=_log):
+    """Applies pending migrations in order. Returns the number applied."""
+    _metadata.create_all(engine)
+    pending = pending_migrations(engine)
+    for version, name, fn in pending:
+        echo(f"Applying migration {version}: {name}")
+        # Autocommit: some statements (CREATE INDEX CONCURRENTLY) cannot run inside a transaction.
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            fn(conn)
+            conn.execute(insert(schema_migrations).values(
+                version=version, name=name, applied_at=datetime.utcnow()))
+    return len(pending)
+
+
+def stamp(engine):
+    """Records every migration as applied without running it (for freshly created schemas)."""
+    _metadata.create_all(engine)
+    applied = applied_versions(engine)
+    with engine.begin() as conn:
+        for version, name, _ in MIGRATIONS:
+            if version not in applied:
+                conn.execute(insert(schema_migrations).values(
+                    version=version, name=name, applied_at=datetime.utcnow()))
+
+
+def sync_schema(db, auto_migrate=True, echo=_log):
+    """Creates missing tables; a brand-new schema is stamped, an existing one upgraded."""
+    fresh = not inspect(db.engine).has_table('item')
+    db.create_all()
+    if fresh:
+        stamp(db.engine)
+    elif auto_migrate:
+        upgrade(db.engine, echo=echo)
+
+
+def init_app(app):
+    @app.cli.command('db-upgrade')
+    def db_upgrade_command():
+        """Apply pending schema migrations."""
+        from .models import db
+        applied = upgrade(db.engine, echo=click.echo)
+        click.echo(f"{applied} migration(s) applied.")
+
+    @app.cli.command('db-status')
+    def db_status_command():
+        """List applied and pending schema migrations."""
+        from .models import db
+        applied = applied_versions(db.engine)
+        for version, name, _ in MIGRATIONS:
+            state = 'applied' if version in applied else 'pending'
+            click.echo(f"{version:>4}  {state:<8} {name}")
@@ -1,9 +1,12 @@
 # my_backend_app/models.py
 from flask_sqlalchemy import SQLAlchemy
-from passlib.hash import pbkdf2_sha256
+from sqlalchemy import DDL, bindparam, event, update
+from .security import password_hasher
+from .replicas import RoutingSession
+from .crypto import EncryptedString, EncryptedValue, key_ring
 from datetime import datetime, date, timedelta
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -17,9 +20,25 @@ class User(db.Model):
         return f'<User {self.username}>'
 
     def set_password(self, password):
-        self.password_hash = pbkdf2_sha256.hash(password)
+        self.password_hash = password_hasher.hash(password)
     def check_password(self, password):
-        return pbkdf2_sha256.verify(password, self.password_hash)
+        # Rehashes transparently when PASSWORD_HASH_ROUNDS changed; the caller commits.
+        valid, new_hash = password_hasher.verify_and_update(password, self.password_hash)
+        if valid and new_hash:
+            self.password_hash = new_hash
+        return valid
+
+class RefreshToken(db.Model):
+    # Server-side half of the sign-in session; only a SHA-256 of the token is stored.
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    token_hash = db.Column(db.String(64), unique=True, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    revoked_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<RefreshToken User:{self.user_id}>'
 
 class LoginHistory(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -27,9 +46,28 @@ class LoginHistory(db.Model):
     login_time = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     login_ip = db.Column(db.String(45), nullable=True)
 
+    __table_args__ = (
+        db.Index('ix_login_history_user_id_login_time', user_id, login_time.desc()),
+    )
+
     def __repr__(self):
         return f'<LoginHistory User:{self.user_id} Time:{self.login_time}>'
 
+# Credentials encrypted at rest; excluded from listings and served by /api/items/<id>/secrets.
+SECRET_FIELDS = ('root_password', 'server_password', 'db_password', 'login_password')
+
+def db_password_fingerprint(user_id, password):
+    # Scoped to the owner, so equal passwords of different users do not share a fingerprint.
+    # Only values the INSERT already has go in (unlike the id), so it is written with the row.
+    if isinstance(password, EncryptedValue):
+        password = password.reveal()
+    return key_ring.fingerprint(f'{user_id}:{password}')
+
+def _default_db_password_fingerprint(context):
+    # Column default, so ORM and Core inserts (bulk import, benchmark seeds) all get one.
+    params = context.get_current_parameters()
+    return db_password_fingerprint(params['user_id'], params['db_password'])
+
 class Item(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -39,9 +77,9 @@ class Item(db.Model):
     private_ip = db.Column(db.String(45), nullable=False)
     os_type = db.Column(db.String(50), nullable=False)
     root_username = db.Column(db.String(50), nullable=False)
-    root_password = db.Column(db.String(100), nullable=False)
+    root_password = db.Column(EncryptedString('item.root_password'), nullable=False)
     server_username = db.Column(db.String(50), nullable=False)
-    server_password = db.Column(db.String(100), nullable=False)
+    server_password = db.Column(EncryptedString('item.server_password'), nullable=False)
     server_name = db.Column(db.String(100), nullable=False)
     core = db.Column(db.Integer, nullable=False)
     ram = db.Column(db.String(50), nullable=False)
@@ -50,18 +88,67 @@ class Item(db.Model):
     location = db.Column(db.String(100), nullable=False)
     applications = db.Column(db.Text, nullable=False)
     db_name = db.Column(db.String(100), nullable=False)
-    db_password = db.Column(db.String(100), nullable=False)
+    db_password = db.Column(EncryptedString('item.db_password'), nullable=False)
+    # Keyed hash of user_id and db_password, so an UPDATE can tell in SQL whether the password changed.
+    db_password_fingerprint = db.Column(db.String(64), default=_default_db_password_fingerprint)
     db_port = db.Column(db.Integer, nullable=False)
     dump_location = db.Column(db.String(255), nullable=False)
     crontab_config = db.Column(db.Text, nullable=False)
     backup_location = db.Column(db.String(255), nullable=False)
     url = db.Column(db.String(255), nullable=False)
     login_name = db.Column(db.String(50), nullable=False)
-    login_password = db.Column(db.String(100), nullable=False)
+    login_password = db.Column(EncryptedString('item.login_password'), nullable=False)
 
     db_password_set_at = db.Column(db.Date, nullable=False, default=date.today) # <--- Default changed from date.today() to date.today (function reference)
     
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow) 
+    # Bumped on every write; drives the incremental sync endpoint (/api/items/changes).
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Optimistic concurrency: every update must match and bump it (ORM updates check it automatically).
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+
+    __table_args__ = (
+        # Item listings filter on the owner and page newest-first on (created_at, id).
+        db.Index('ix_item_user_id_created_at_id', user_id, created_at.desc(), id.desc()),
+        # Password-expiry reminders filter on the owner and a range over db_password_set_at.
+        db.Index('ix_item_user_id_db_password_set_at', user_id, db_password_set_at),
+        db.Index('ix_item_user_id_updated_at', user_id, updated_at),
+        # Exact-match filters of /api/items/search and the /api/items/stats groupings.
+        db.Index('ix_item_user_id_customer', user_id, customer),
+        db.Index('ix_item_user_id_location', user_id, location),
+        db.Index('ix_item_user_id_os_type', user_id, os_type),
+        # Substring search (?q=) on Postgres; other databases scan the user's rows.
+        *(db.Index(f'ix_item_{name}_trgm', name, postgresql_using='gin',
+                   postgresql_ops={name: 'gin_trgm_ops'}).ddl_if(dialect='postgresql')
+          for name in ('customer', 'server_name', 'applications', 'url')),
+    )
+
+    __mapper_args__ = {'version_id_col': version}
+
+    def __repr__(self):
+        return f'<Item {self.customer} - {self.server_name}>'
+
+event.listen(Item.__table__, 'before_create',
+             DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'))
+
+def store_db_password_fingerprints(connection, rows):
+    """Writes the fingerprints of (item_id, user_id, db_password) rows, leaving version and updated_at alone."""
+    table = Item.__table__
+    stmt = update(table).where(table.c.id == bindparam('_id')).values(
+        db_password_fingerprint=bindparam('_fingerprint'), updated_at=table.c.updated_at)
+    connection.execute(stmt, [{'_id': item_id, '_fingerprint': db_password_fingerprint(user_id, password)}
+                              for item_id, user_id, password in rows])
+
+class ItemTombstone(db.Model):
+    # Records deleted items so sync clients can drop them; pruned after SYNC_RETENTION_DAYS.
+    id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_item_tombstone_user_id_deleted_at', user_id, deleted_at),
+    )
 
     def __repr__(self):
-        return f'<Item {self.customer} - {self.server_name}>'
\ No newline at end of file
+        return f'<ItemTombstone Item:{self.item_id} User:{self.user_id}>'
@@ -0,0 +1,84 @@
+# my_backend_app/pool.py
+import threading
+import time
+
+from flask import g, has_request_context
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+class PoolMetrics:
+    """Process-wide counters for connection checkouts and the time spent waiting for them."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+
+    def record(self, wait, timed_out=False):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            if timed_out:
+                self.timeouts += 1
+        # Per-request accumulator, read back by the after_request hook below.
+        if has_request_context():
+            g.db_pool_wait = g.get('db_pool_wait', 0.0) + wait
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'total_wait_ms': round(self.total_wait * 1000, 3),
+                'avg_wait_ms': round(self.total_wait * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                'max_wait_ms': round(self.max_wait * 1000, 3),
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that measures how long each checkout waits for a free connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_metrics.record(time.perf_counter() - start)
+        return connection
+
+
+def pool_status(engine):
+    """Current occupancy of the engine's pool plus the accumulated wait metrics."""
+    pool = engine.pool
+    status = {'class': type(pool).__name__}
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        method = getattr(pool, name, None)
+        if method is not None:
+            status[name] = method()
+    if isinstance(pool, QueuePool):
+        status['max_overflow'] = pool._max_overflow
+        status['timeout'] = pool.timeout()
+    status['metrics'] = pool_metrics.snapshot()
+    return status
+
+
+def init_app(app):
+    @app.after_request
+    def add_pool_wait_header(response):
+        wait = g.get('db_pool_wait')
+        if wait is not None:
+            response.headers.add('Server-Timing', f'db-pool;dur={wait * 1000:.2f}')
+        return response
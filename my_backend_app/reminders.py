@@ -0,0 +1,260 @@
+# my_backend_app/reminders.py
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event, select, or_, and_
+from sqlalchemy.orm import Session, object_session
+
+from .models import db, Item
+from .broker import Broker
+
+PASSWORD_EXPIRY_DAYS = 90
+# Reminders start the day after the password was set and stop after this many days.
+EXPIRING_SOON_WINDOW_DAYS = 7
+
+
+def _thresholds(today):
+    expired_before = today - timedelta(days=PASSWORD_EXPIRY_DAYS)
+    soon_from = today - timedelta(days=EXPIRING_SOON_WINDOW_DAYS - 1)
+    soon_to = today - timedelta(days=1)
+    return expired_before, soon_from, soon_to
+
+
+def reminders_query(user_id, today):
+    """Rows needing a reminder, served by ix_item_user_id_db_password_set_at."""
+    expired_before, soon_from, soon_to = _thresholds(today)
+    return (
+        select(Item.id, Item.server_name, Item.db_password_set_at)
+        .where(Item.user_id == user_id)
+        .where(or_(
+            Item.db_password_set_at.is_(None),
+            Item.db_password_set_at <= expired_before,
+            and_(Item.db_password_set_at >= soon_from, Item.db_password_set_at <= soon_to),
+        ))
+        .order_by(Item.id)
+    )
+
+
+def compute_reminders(user_id, today=None):
+    """Builds the reminder list for a user with a single indexed query.
+
+    The expiry buckets are expressed as date ranges on db_password_set_at so the
+    database only returns the rows that actually need a reminder, and only the
+    columns needed to build the message.
+    """
+    today = today or date.today()
+    expired_before = _thresholds(today)[0]
+    stmt = reminders_query(user_id, today)
+
+    reminders = []
+    for item_id, server_name, set_at in db.session.execute(stmt):
+        if set_at is None:
+            reminder_type = 'db_password_no_date'
+            message = f"DB password for server '{server_name}' has no set date. Please update password and set date."
+        elif set_at <= expired_before:
+            reminder_type = 'db_password_expired'
+            message = f"DB password for server '{server_name}' has EXPIRED! Please change immediately."
+        else:
+            days_since_set = (today - set_at).days
+            reminder_type = 'db_password_expiry'
+            message = f"Change DB password for server '{server_name}'. It expires in {PASSWORD_EXPIRY_DAYS - days_since_set} days!"
+        reminders.append({
+            'id': item_id,
+            'message': message,
+            'item_id': item_id,
+            'server_name': server_name,
+            'type': reminder_type,
+            'date': today.isoformat()
+        })
+    return reminders
+
+
+class ReminderCache:
+    """Per-user cache of the serialized reminder payload and its ETag.
+
+    An entry is valid until the day changes, one of the user's items is written in
+    this process, or REMINDER_CACHE_TTL seconds pass (which bounds staleness when
+    another worker performed the write).
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config.get('REMINDER_CACHE_TTL', self.ttl)
+        app.extensions['reminder_cache'] = self
+
+    def get(self, user_id):
+        """Returns (body, etag) for the user's reminders, computing them on a miss."""
+        today = date.today()
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry is not None:
+            day, expires_at, body, etag = entry
+            if day == today and expires_at > time.monotonic():
+                return body, etag
+
+        body = json.dumps(compute_reminders(user_id, today)).encode()
+        etag = hashlib.sha1(body).hexdigest()
+        with self._lock:
+            self._entries[user_id] = (today, time.monotonic() + self.ttl, body, etag)
+        return body, etag
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class StreamSlots:
+    """Caps the reminder streams one worker serves at a time.
+
+    Under the threaded server every open stream holds a worker thread for up to
+    REMINDER_STREAM_MAX_SECONDS, so without a cap a few browser tabs per thread
+    would leave none for API requests. Beyond the cap /stream answers 503 with
+    Retry-After and clients poll get_reminders until a slot frees up.
+    """
+
+    def __init__(self, limit=5):
+        self.limit = limit
+        self._open = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.limit = app.config.get('REMINDER_STREAM_MAX_PER_WORKER', self.limit)
+        app.extensions['reminder_stream_slots'] = self
+
+    def acquire(self):
+        """Takes a slot if one is free; returns False when the worker is at its limit."""
+        with self._lock:
+            if self._open >= self.limit:
+                return False
+            self._open += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self._open -= 1
+
+    def stats(self):
+        return {'open': self._open, 'limit': self.limit}
+
+
+reminder_cache = ReminderCache()
+reminder_stream_slots = StreamSlots()
+# Woken whenever a user's items change; with a Redis broker, writes made in other
+# workers also drop this process's cached reminders for that user.
+reminder_broker = Broker('reminders', on_message=lambda key: reminder_cache.invalidate(int(key)))
+
+
+def _seconds_until_tomorrow():
+    now = datetime.now()
+    return (datetime.combine(now.date() + timedelta(days=1), datetime.min.time()) - now).total_seconds()
+
+
+def reminder_events(user_id, last_etag=None, heartbeat=25, max_seconds=300):
+    """Server-Sent Events stream of a user's reminder list.
+
+    Sends the list once (unless last_etag is already current), then again only when
+    its ETag changes: after a write to one of the user's items, at midnight, and -
+    with an in-process broker, which cannot see other workers' writes - when the
+    cached list expires. Idle time is spent waiting on the subscription with no
+    database connection checked out. The stream ends after max_seconds; EventSource
+    clients reconnect with Last-Event-ID and receive nothing new if nothing changed.
+    """
+    deadline = time.monotonic() + max_seconds
+    # Subscribe before the first read so a write landing in between is not missed.
+    subscription = reminder_broker.subscribe(user_id)
+    check = True
+    try:
+        yield b'retry: 3000\n\n'
+        while True:
+            if check:
+                body, etag = reminder_cache.get(user_id)
+                db.session.remove()
+                if etag != last_etag:
+                    last_etag = etag
+                    yield _reminders_event(body, etag)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            timeout = min(heartbeat, remaining, _seconds_until_tomorrow() + 1)
+            notified = subscription.wait(timeout)
+            check = notified or not reminder_broker.shared or timeout < heartbeat
+            if not notified:
+                yield b': keepalive\n\n'
+    finally:
+        subscription.close()
+
+
+async def reminder_events_async(app, user_id, last_etag=None, heartbeat=25, max_seconds=300):
+    """reminder_events() for the ASGI server (asgi.py).
+
+    Waiting happens on the event loop, so an idle stream holds no thread; only
+    computing the list runs in a worker thread, inside its own app context.
+    """
+    def load():
+        with app.app_context():
+            return reminder_cache.get(user_id)
+
+    deadline = time.monotonic() + max_seconds
+    subscription = reminder_broker.subscribe(user_id)
+    check = True
+    try:
+        yield b'retry: 3000\n\n'
+        while True:
+            if check:
+                body, etag = await asyncio.to_thread(load)
+                if etag != last_etag:
+                    last_etag = etag
+                    yield _reminders_event(body, etag)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            timeout = min(heartbeat, remaining, _seconds_until_tomorrow() + 1)
+            notified = await subscription.wait_async(timeout)
+            check = notified or not reminder_broker.shared or timeout < heartbeat
+            if not notified:
+                yield b': keepalive\n\n'
+    finally:
+        subscription.close()
+
+
+def _reminders_event(body, etag):
+    return b'event: reminders\nid: ' + etag.encode() + b'\ndata: ' + body + b'\n\n'
+
+
+# --- Invalidation on item writes (mirrors the user cache invalidation in cache.py) ---
+@event.listens_for(Item, 'after_insert')
+@event.listens_for(Item, 'after_update')
+@event.listens_for(Item, 'after_delete')
+def _mark_items_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        mark_items_changed(session, target.user_id)
+
+
+def mark_items_changed(session, user_id):
+    """Invalidates user_id's reminders when session commits. Core writes, which skip the events above, call it directly."""
+    session.info.setdefault('changed_item_owner_ids', set()).add(user_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_reminders(session):
+    for user_id in session.info.pop('changed_item_owner_ids', ()):
+        reminder_cache.invalidate(user_id)
+        reminder_broker.publish(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changed_items(session):
+    session.info.pop('changed_item_owner_ids', None)
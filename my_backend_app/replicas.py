@@ -0,0 +1,161 @@
+# my_backend_app/replicas.py
+import functools
+import itertools
+import threading
+import time
+
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session as FlaskSession
+from itsdangerous import BadSignature, TimestampSigner
+from sqlalchemy import create_engine, event, exc, text
+
+# Response header carrying a signed "user wrote at" stamp, echoed back by the client.
+LAST_WRITE_HEADER = 'X-Last-Write'
+
+
+class ReplicaRouter:
+    """Round-robin pool of read replicas with health tracking and read-your-writes stickiness.
+
+    Replicas that raise connection errors are skipped for REPLICA_RETRY_AFTER seconds
+    (per process). After a user's own write, their reads stay on the primary for
+    READ_YOUR_WRITES_SECONDS: the worker that took the write remembers it, and the
+    response carries a signed X-Last-Write stamp that the client sends back, so the
+    other workers (and servers) honour it too.
+    """
+
+    def __init__(self):
+        self.engines = []
+        self.sticky_seconds = 5
+        self.retry_after = 30
+        self._unhealthy_until = {}
+        self._last_write = {}
+        self._cycle = None
+        self._signer = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        from .config import engine_options
+        self.sticky_seconds = app.config.get('READ_YOUR_WRITES_SECONDS', self.sticky_seconds)
+        self.retry_after = app.config.get('REPLICA_RETRY_AFTER', self.retry_after)
+        self.engines = [create_engine(uri, **engine_options(uri)) for uri in app.config.get('SQLALCHEMY_REPLICA_URIS', [])]
+        for engine in self.engines:
+            event.listen(engine, 'handle_error', self._on_error)
+        self._cycle = itertools.cycle(self.engines) if self.engines else None
+        self._signer = TimestampSigner(app.config['SECRET_KEY'], salt='last-write')
+        app.after_request(self._stamp_write)
+        app.extensions['replica_router'] = self
+
+    def choose(self):
+        """Next healthy replica engine, or None when all are down (fall back to the primary)."""
+        if self._cycle is None:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            for _ in range(len(self.engines)):
+                engine = next(self._cycle)
+                if self._unhealthy_until.get(engine, 0) <= now:
+                    return engine
+        return None
+
+    def mark_unhealthy(self, engine):
+        with self._lock:
+            self._unhealthy_until[engine] = time.monotonic() + self.retry_after
+
+    def note_write(self, user_id):
+        with self._lock:
+            self._last_write[user_id] = time.monotonic()
+            if len(self._last_write) > 10000:
+                cutoff = time.monotonic() - self.sticky_seconds
+                self._last_write = {k: v for k, v in self._last_write.items() if v > cutoff}
+
+    def is_sticky(self, user_id):
+        last_write = self._last_write.get(user_id)
+        if last_write is not None and time.monotonic() - last_write < self.sticky_seconds:
+            return True
+        stamp = request.headers.get(LAST_WRITE_HEADER) if has_request_context() else None
+        if not stamp:
+            return False
+        try:
+            return self._signer.unsign(stamp, max_age=self.sticky_seconds).decode() == str(user_id)
+        except BadSignature:
+            return False
+
+    def _stamp_write(self, response):
+        if self.engines and g.get('wrote') and g.get('user') is not None:
+            response.headers[LAST_WRITE_HEADER] = self._signer.sign(str(g.user.id)).decode()
+        return response
+
+    def dispose(self):
+        for engine in self.engines:
+            engine.dispose()
+
+    def status(self):
+        now = time.monotonic()
+        return [
+            {'url': engine.url.render_as_string(hide_password=True),
+             'healthy': self._unhealthy_until.get(engine, 0) <= now}
+            for engine in self.engines
+        ]
+
+    def _on_error(self, context):
+        if context.is_disconnect or isinstance(context.sqlalchemy_exception, exc.OperationalError):
+            self.mark_unhealthy(context.engine)
+
+
+replica_router = ReplicaRouter()
+
+
+def read_only(view):
+    """Marks a view as read-only so its queries may be served by a replica.
+
+    If the chosen replica fails with a connection-level error the view is run once
+    more against the primary; read-only views are safe to repeat. A streamed body
+    reads its rows after the view has returned, out of reach of that retry, so the
+    replica is checked before the response is handed over.
+    """
+    @functools.wraps(view)
+    def wrapped_view(**kwargs):
+        g.read_only = True
+        try:
+            response = view(**kwargs)
+            if getattr(response, 'is_streamed', False) and g.get('replica_engine') is None and _use_replica():
+                from .models import db
+                db.session.execute(text('SELECT 1'))
+            return response
+        except exc.OperationalError:
+            if g.get('replica_engine') is None:
+                raise
+            from .models import db
+            replica_router.mark_unhealthy(g.replica_engine)
+            db.session.rollback()
+            g.read_only = False
+            g.replica_engine = None
+            return view(**kwargs)
+    return wrapped_view
+
+
+class RoutingSession(FlaskSession):
+    """Session that sends reads of read_only views to a replica and everything else to the primary."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _use_replica():
+            engine = g.get('replica_engine')
+            if engine is None:
+                engine = g.replica_engine = replica_router.choose()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _use_replica():
+    if not replica_router.engines or not has_request_context() or not g.get('read_only'):
+        return False
+    user = g.get('user')
+    return user is None or not replica_router.is_sticky(user.id)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _remember_write(session):
+    if has_request_context() and not g.get('read_only') and g.get('user') is not None:
+        replica_router.note_write(g.user.id)
+        g.wrote = True
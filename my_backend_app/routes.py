@@ -1,27 +1,75 @@
 
-from flask import Blueprint, request, jsonify, g
-from .models import db, User, LoginHistory, Item
+from flask import Blueprint, request, jsonify, g, Response, stream_with_context, current_app
+from .models import db, User, LoginHistory, Item, ItemTombstone, SECRET_FIELDS, db_password_fingerprint
+from .cache import user_cache
+from .reminders import reminder_cache, reminder_broker, reminder_events, reminder_stream_slots, mark_items_changed
+from .security import HashingBusy, login_throttle
+from .serializers import item_serializer
+from .pool import pool_status
+from .replicas import read_only, replica_router
+from .login_history import login_history_writer
+from .tokens import TokenExpired, TokenInvalid, token_service
+from .sync import deleted_item_ids, maybe_prune_tombstones, retention_cutoff
+from .search import build_filters, item_stats, STATS_GROUPS
+from .serving import readiness
 from flask_cors import cross_origin
 from datetime import datetime, date, timedelta
+from sqlalchemy import select, insert, update, case, func, tuple_
+import base64
+import csv
 import functools
+import hashlib
+import hmac
+import io
+import json
+from .instrumentation import logger, timed
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 items_bp = Blueprint('items', __name__, url_prefix='/api/items')
 notifications_bp = Blueprint('notifications', __name__, url_prefix='/api/notifications')
+internal_bp = Blueprint('internal', __name__, url_prefix='/api/_internal')
+health_bp = Blueprint('health', __name__)
 
 # --- Authentication Decorator (MUST BE DEFINED BEFORE USE) ---
 def login_required(view):
     @functools.wraps(view)
     def wrapped_view(**kwargs):
+        # Identity comes from a signed access token (signin/refresh), verified without touching the database.
+        auth_header = request.headers.get('Authorization', '')
+        if auth_header.startswith('Bearer '):
+            try:
+                g.user, g.token_id = token_service.verify_access(auth_header[7:])
+            except TokenExpired:
+                return jsonify({'message': 'Access token expired.', 'error': 'token_expired'}), 401
+            except TokenInvalid:
+                return jsonify({'message': 'Invalid access token.', 'error': 'invalid_token'}), 401
+            return view(**kwargs)
+
+        # Legacy X-User-ID header, only for deployments that still need it (AUTH_ALLOW_USER_ID_HEADER).
         user_id = request.headers.get('X-User-ID')
-        if not user_id:
-            return jsonify({'message': 'Authentication required. X-User-ID header missing.'}), 401
-        
-        user = User.query.get(user_id)
-        if not user:
-            return jsonify({'message': 'Invalid user ID.'}), 401
-        
-        g.user = user
+        if user_id and current_app.config['AUTH_ALLOW_USER_ID_HEADER']:
+            user = user_cache.get_user(user_id)
+            if not user:
+                return jsonify({'message': 'Invalid user ID.'}), 401
+            g.user = user
+            return view(**kwargs)
+
+        return jsonify({'message': 'Authentication required. Authorization header missing.'}), 401
+    return wrapped_view
+
+def internal_only(view):
+    # The source address proves nothing: behind a reverse proxy on the same host every
+    # request comes from loopback. Access needs the shared token or an explicit opt-in.
+    @functools.wraps(view)
+    def wrapped_view(**kwargs):
+        config = current_app.config
+        token = config.get('INTERNAL_API_TOKEN')
+        if token:
+            allowed = hmac.compare_digest(request.headers.get('X-Internal-Token', '').encode(), token.encode())
+        else:
+            allowed = config.get('INTERNAL_API_ENABLED')
+        if not allowed:
+            return jsonify({'message': 'Not found.'}), 404
         return view(**kwargs)
     return wrapped_view
 
@@ -43,7 +91,10 @@ def signup():
         return jsonify({'message': 'Email already exists'}), 409
 
     new_user = User(username=username, email=email)
-    new_user.set_password(password)
+    try:
+        new_user.set_password(password)
+    except HashingBusy:
+        return _busy_response()
 
     try:
         db.session.add(new_user)
@@ -61,325 +112,859 @@ def signin():
     password = data.get('password')
 
     if not username or not password:
-        print("DEBUG: SIGNIN - Username or password missing from request.")
+        logger.debug("SIGNIN - Username or password missing from request.")
         return jsonify({'message': 'Username and password are required!'}), 400
 
+    login_ip = request.remote_addr
+    retry_after = login_throttle.retry_after(login_ip, username)
+    if retry_after:
+        logger.debug("SIGNIN - Too many failed attempts for user '%s' from %s.", username, login_ip)
+        response = jsonify({'message': 'Too many failed login attempts. Please try again later.'})
+        response.headers['Retry-After'] = str(retry_after)
+        return response, 429
+
     user = User.query.filter_by(username=username).first()
 
-    if user and user.check_password(password):
-        print(f"DEBUG: SIGNIN - User '{username}' authenticated successfully.")
-        
+    try:
+        authenticated = user is not None and user.check_password(password)
+    except HashingBusy:
+        return _busy_response()
+
+    if authenticated:
+        logger.debug("SIGNIN - User '%s' authenticated successfully.", username)
+        login_throttle.reset(username)
+
+        if db.session.is_modified(user):
+            # check_password upgraded an outdated hash; persist it.
+            try:
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error("SIGNIN - Failed to store rehashed password for user '%s': %s", username, e)
+
+        # Written in batches by a background thread, off the login latency path.
+        login_history_writer.record(user.id, login_ip)
+
         try:
-            login_ip = request.remote_addr
-            new_login_entry = LoginHistory(
-                user_id=user.id,
-                login_time=datetime.utcnow(),
-                login_ip=login_ip
-            )
-
-            db.session.add(new_login_entry)
+            refresh_token = token_service.issue_refresh(user.id)
+            token_service.maybe_prune()
             db.session.commit()
-            print("DEBUG: SIGNIN - LoginHistory entry committed successfully.")
-
         except Exception as e:
             db.session.rollback()
-            print(f"ERROR: SIGNIN - Failed to record login history for user '{username}': {e}")
-            pass
-
-        return jsonify({'message': 'Login successful!', 'user_id': user.id, 'username': user.username}), 200
+            logger.error("SIGNIN - Failed to store refresh token for user '%s': %s", username, e)
+            return jsonify({'message': 'An error occurred during sign in', 'error': str(e)}), 500
+
+        return jsonify({
+            'message': 'Login successful!',
+            'user_id': user.id,
+            'username': user.username,
+            **_token_pair(user, refresh_token),
+        }), 200
     else:
-        print(f"DEBUG: SIGNIN - Invalid credentials for user '{username}'.")
+        login_throttle.record_failure(login_ip, username)
+        logger.debug("SIGNIN - Invalid credentials for user '%s'.", username)
         return jsonify({'message': 'Invalid username or password'}), 401
+
+def _token_pair(user, refresh_token):
+    return {
+        'access_token': token_service.issue_access(user),
+        'token_type': 'Bearer',
+        'expires_in': token_service.access_ttl,
+        'refresh_token': refresh_token,
+    }
+
+@auth_bp.route('/refresh', methods=['POST'])
+@cross_origin()
+def refresh():
+    # Exchanges a refresh token for a new access token and a new refresh token (the old one is revoked).
+    data = request.get_json(silent=True) or {}
+    token = data.get('refresh_token')
+    if not token:
+        return jsonify({'message': 'refresh_token is required.'}), 400
+    try:
+        user_id = token_service.rotate_refresh(token)
+        user = db.session.get(User, user_id) if user_id is not None else None
+        if user is None:
+            db.session.commit()  # keeps a reuse-triggered revocation
+            return jsonify({'message': 'Invalid or expired refresh token.', 'error': 'invalid_grant'}), 401
+        new_refresh_token = token_service.issue_refresh(user.id)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error("REFRESH - Failed to rotate refresh token: %s", e)
+        return jsonify({'message': 'An error occurred during token refresh', 'error': str(e)}), 500
+    return jsonify(_token_pair(user, new_refresh_token)), 200
+
+@auth_bp.route('/logout', methods=['POST'])
+@cross_origin()
+@login_required
+def logout():
+    data = request.get_json(silent=True) or {}
+    if 'token_id' in g:
+        token_service.revoke_access(g.token_id)
+    try:
+        if data.get('all_sessions'):
+            token_service.revoke_all(g.user.id)
+        elif data.get('refresh_token'):
+            token_service.revoke_refresh(data['refresh_token'])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error("LOGOUT - Failed to revoke refresh tokens for user %s: %s", g.user.username, e)
+        return jsonify({'message': 'An error occurred during logout', 'error': str(e)}), 500
+    return jsonify({'message': 'Logged out.'}), 200
+
+@auth_bp.route('/login_history', methods=['GET'])
+@cross_origin()
+@read_only
+@login_required
+def get_login_history():
+    limit = request.args.get('limit', 20)
+    try:
+        limit = min(max(int(limit), 1), 100)
+    except ValueError:
+        return jsonify({'message': 'limit must be a number.'}), 400
+    # Reads only the newest rows through ix_login_history_user_id_login_time.
+    rows = db.session.execute(
+        select(LoginHistory.login_time, LoginHistory.login_ip)
+        .where(LoginHistory.user_id == g.user.id)
+        .order_by(LoginHistory.login_time.desc())
+        .limit(limit)
+    ).all()
+    return jsonify([
+        {'login_time': login_time.isoformat(), 'login_ip': login_ip} for login_time, login_ip in rows
+    ]), 200
+
+def _busy_response():
+    response = jsonify({'message': 'Server is busy, please retry shortly.'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
     
 # --- ITEM ENDPOINTS ---
 @items_bp.route('/create', methods=['POST'])
 @cross_origin()
 @login_required
 def create_item():
-    print("DEBUG: CREATE_ITEM - Endpoint accessed.")
+    logger.debug("CREATE_ITEM - Endpoint accessed.")
     data = request.get_json()
-    
-    customer = data.get('customer')
-    public_ip = data.get('public_ip')
-    private_ip = data.get('private_ip')
-    os_type = data.get('os_type')
-    root_username = data.get('root_username')
-    root_password = data.get('root_password')
-    server_username = data.get('server_username')
-    server_password = data.get('server_password')
-    server_name = data.get('server_name')
-    core = data.get('core')
-    ram = data.get('ram')
-    hdd = data.get('hdd')
-    ports = data.get('ports')
-    location = data.get('location')
-    applications = data.get('applications')
-    db_name = data.get('db_name')
-    db_password = data.get('db_password')
-    db_port = data.get('db_port')
-    dump_location = data.get('dump_location')
-    crontab_config = data.get('crontab_config')
-    backup_location = data.get('backup_location')
-    url = data.get('url')
-    login_name = data.get('login_name')
-    login_password = data.get('login_password')
-
-    db_password_set_at_str = data.get('db_password_set_at')
-
-
-    if not all([
-        customer, server_name, public_ip, private_ip, os_type, root_username, root_password,
-        server_username, server_password, core, ram, hdd, ports, location, applications, db_name,
-        db_password, db_port, dump_location, crontab_config, backup_location, url, login_name, login_password,
-        db_password_set_at_str
-    ]):
-        return jsonify({'message': 'All mandatory fields must be filled.'}), 400
 
-    try:
-        core_int = int(core)
-        db_port_int = int(db_port)
-        db_password_set_at = datetime.strptime(db_password_set_at_str, '%Y-%m-%d').date()
-    except ValueError as ve:
-        print(f"ERROR: CREATE_ITEM - Integer/Date parsing error: {ve}")
-        return jsonify({'message': 'Core and DB Port must be numbers. DB Password Set At must be YYYY-MM-DD.'}), 400
-
-    new_item = Item(
-        user_id=g.user.id,
-        customer=customer,
-        public_ip=public_ip,
-        private_ip=private_ip,
-        os_type=os_type,
-        root_username=root_username,
-        root_password=root_password,
-        server_username=server_username,
-        server_password=server_password,
-        server_name=server_name,
-        core=core_int,
-        ram=ram,
-        hdd=hdd,
-        ports=ports,
-        location=location,
-        applications=applications,
-        db_name=db_name,
-        db_password=db_password,
-        db_port=db_port_int,
-        dump_location=dump_location,
-        crontab_config=crontab_config,
-        backup_location=backup_location,
-        url=url,
-        login_name=login_name,
-        login_password=login_password,
-        db_password_set_at=db_password_set_at
-    )
+    values, error = _validate_item_payload(data)
+    if error:
+        logger.warning("CREATE_ITEM - Invalid payload: %s", error)
+        return jsonify({'message': error}), 400
+
+    new_item = Item(user_id=g.user.id, **values)
 
     try:
         db.session.add(new_item)
         db.session.commit()
-        print(f"DEBUG: CREATE_ITEM - Item '{new_item.customer}' created successfully with ID: {new_item.id}")
-        item_data = {
-            'id': new_item.id,
-            'customer': new_item.customer,
-            'public_ip': new_item.public_ip, 'private_ip': new_item.private_ip, 'os_type': new_item.os_type,
-            'root_username': new_item.root_username, 'root_password': new_item.root_password,
-            'server_username': new_item.server_username, 'server_password': new_item.server_password,
-            'server_name': new_item.server_name, 'core': new_item.core, 'ram': new_item.ram,
-            'hdd': new_item.hdd, 'ports': new_item.ports, 'location': new_item.location,
-            'applications': new_item.applications, 'db_name': new_item.db_name, 'db_password': new_item.db_password,
-            'db_port': new_item.db_port, 'dump_location': new_item.dump_location,
-            'crontab_config': new_item.crontab_config, 'backup_location': new_item.backup_location,
-            'url': new_item.url, 'login_name': new_item.login_name, 'login_password': new_item.login_password,
-            'created_at': new_item.created_at.isoformat(),
-            'db_password_set_at': new_item.db_password_set_at.isoformat()
-        }
-        return jsonify({'message': 'Item created successfully!', 'item': item_data}), 201
+        logger.debug("CREATE_ITEM - Item '%s' created successfully with ID: %s", new_item.customer, new_item.id)
+        item_data = item_serializer.serialize_object(new_item)
+        return item_serializer.response({'message': 'Item created successfully!', 'item': item_data}, 201)
     except Exception as e:
         db.session.rollback()
-        print(f"ERROR: CREATE_ITEM - Failed to create item for user {g.user.username}: {e}")
+        logger.error("CREATE_ITEM - Failed to create item for user %s: %s", g.user.username, e)
         return jsonify({'message': 'An error occurred during item creation', 'error': str(e)}), 500
 
+# --- Item helpers (validation, pagination, projection, streaming) ---
+# Public fields of an Item, generated from the model's columns.
+ITEM_FIELDS = item_serializer.fields
+# Fields a client supplies when creating an item (everything except id, timestamps and version).
+ITEM_INPUT_FIELDS = tuple(f for f in ITEM_FIELDS if f not in ('id', 'created_at', 'updated_at', 'version')) + SECRET_FIELDS
+MAX_PAGE_SIZE = 1000
+SEARCH_DEFAULT_LIMIT = 100
+STREAM_BATCH_SIZE = 500
+BULK_BATCH_SIZE = 1000
+BULK_MAX_REPORTED_ERRORS = 1000
+
+
+def _validate_item_payload(data):
+    """Applies the create_item rules to one payload. Returns (values, None) or (None, error)."""
+    if not isinstance(data, dict):
+        return None, 'Item payload must be a JSON object.'
+    values = {field: data.get(field) for field in ITEM_INPUT_FIELDS}
+    if not all(values.values()):
+        return None, 'All mandatory fields must be filled.'
+    try:
+        values['core'] = int(values['core'])
+        values['db_port'] = int(values['db_port'])
+        values['db_password_set_at'] = datetime.strptime(values['db_password_set_at'], '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None, 'Core and DB Port must be numbers. DB Password Set At must be YYYY-MM-DD.'
+    return values, None
+
+
+def _validate_item_changes(data):
+    """Applies the create_item rules to the fields present in an update payload.
+
+    Returns (values, None) or (None, error). Absent fields keep their stored (already
+    valid) values; a null db_password_set_at is ignored, as the edit page may send one.
+    """
+    if not isinstance(data, dict):
+        return None, 'Item payload must be a JSON object.'
+    values = {field: data[field] for field in ITEM_INPUT_FIELDS if field in data}
+    if values.get('db_password_set_at', '') is None:
+        del values['db_password_set_at']
+    if not values:
+        return None, 'No item fields to update.'
+    if not all(values.values()):
+        return None, 'All mandatory fields must be filled.'
+    try:
+        for field in ('core', 'db_port'):
+            if field in values:
+                values[field] = int(values[field])
+        if 'db_password_set_at' in values:
+            values['db_password_set_at'] = datetime.strptime(values['db_password_set_at'], '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None, 'Core and DB Port must be numbers. DB Password Set At must be YYYY-MM-DD.'
+    return values, None
+
+
+def _parse_fields(raw):
+    """Returns the list of requested item fields, or None if any name is unknown."""
+    if not raw:
+        return list(ITEM_FIELDS)
+    fields = [f.strip() for f in raw.split(',') if f.strip()]
+    if not fields or any(f not in ITEM_FIELDS for f in fields):
+        return None
+    return fields
+
+
+def _encode_cursor(created_at, item_id):
+    raw = f"{created_at.isoformat()}|{item_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_cursor(token):
+    padded = token + '=' * (-len(token) % 4)
+    created_at_str, item_id_str = base64.urlsafe_b64decode(padded.encode()).decode().split('|', 1)
+    return datetime.fromisoformat(created_at_str), int(item_id_str)
+
+
+def item_list_query(user_id, columns, cursor=None):
+    """Newest-first item listing for a user, optionally after a (created_at, id) keyset cursor.
+
+    Served by ix_item_user_id_created_at_id; see scripts/check_query_plans.py.
+    """
+    stmt = (
+        select(*columns)
+        .where(Item.user_id == user_id)
+        .order_by(Item.created_at.desc(), Item.id.desc())
+    )
+    if cursor is not None:
+        stmt = stmt.where(tuple_(Item.created_at, Item.id) < tuple_(*cursor))
+    return stmt
+
+
+def item_update_query(item_id, user_id, values, version=None):
+    """One UPDATE applying the supplied columns, bumping version and returning the new one.
+
+    With a version it only matches that version of the row (optimistic concurrency).
+    A supplied db_password moves db_password_set_at to today unless its fingerprint
+    matches the stored one; that comparison happens in SQL, so no row is loaded first.
+    A row without a fingerprint (written around the column default) keeps its date,
+    since whether the password changed cannot be told.
+    """
+    values = dict(values)
+    set_at = values.pop('db_password_set_at', None)
+    if 'db_password' in values:
+        values['db_password_fingerprint'] = fingerprint = db_password_fingerprint(user_id, values['db_password'])
+        unchanged = set_at if set_at is not None else Item.db_password_set_at
+        values['db_password_set_at'] = case((Item.db_password_fingerprint == fingerprint, unchanged),
+                                            (Item.db_password_fingerprint.is_(None), unchanged),
+                                            else_=date.today())
+    elif set_at is not None:
+        values['db_password_set_at'] = set_at
+    stmt = update(Item).where(Item.id == item_id, Item.user_id == user_id)
+    if version is not None:
+        stmt = stmt.where(Item.version == version)
+    return (stmt.values(version=Item.version + 1, **values)
+            .returning(Item.version)
+            .execution_options(synchronize_session=False))
+
+
+def _parse_limit(raw, default):
+    """Returns (limit, None) or (None, error) for a ?limit= value."""
+    if raw is None:
+        return default, None
+    try:
+        limit = int(raw)
+    except ValueError:
+        return None, 'limit must be a number.'
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        return None, f'limit must be between 1 and {MAX_PAGE_SIZE}.'
+    return limit, None
+
+
+def item_collection_version(user_id):
+    """Changes whenever one of the user's items is created, updated or deleted."""
+    count, last_updated = db.session.execute(
+        select(func.count(Item.id), func.max(Item.updated_at)).where(Item.user_id == user_id)
+    ).one()
+    return f"{count}-{last_updated.isoformat() if last_updated else ''}"
+
+
+def _not_modified(etag):
+    """A 304 response if the client's If-None-Match already names this weak ETag, else None."""
+    if request.if_none_match.contains_weak(etag):
+        return _cache_headers(Response(status=304), etag)
+    return None
+
+
+def _cache_headers(response, etag):
+    # Weak ETags: the same entity stays valid whether it is sent gzip/br compressed or not.
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _stream_items(stmt, fields, fmt, serialize=None):
+    """Yields serialized rows straight from a server-side cursor."""
+    serialize = serialize or item_serializer.compile(tuple(fields))
+    dumps = item_serializer.dumps
+    result = db.session.execute(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+    if fmt == 'ndjson':
+        for row in result:
+            yield dumps(serialize(row)) + b'\n'
+        return
+    yield b'['
+    first = True
+    for row in result:
+        yield (b'' if first else b',') + dumps(serialize(row))
+        first = False
+    yield b']'
+
+
 @items_bp.route('/get_all', methods=['GET'])
 @cross_origin()
+@read_only
 @login_required
 def get_all_items():
-    print(f"DEBUG: GET_ALL_ITEMS - Endpoint accessed for user {g.user.username}.")
-    items = Item.query.filter_by(user_id=g.user.id).order_by(Item.created_at.desc()).all()
-    
-    items_data = []
-    for item in items:
-        item_data = {
-            'id': item.id, 
-            'customer': item.customer,
-            'public_ip': item.public_ip, 'private_ip': item.private_ip, 'os_type': item.os_type,
-            'root_username': item.root_username, 'root_password': item.root_password,
-            'server_username': item.server_username, 'server_password': item.server_password,
-            'server_name': item.server_name, 'core': item.core, 'ram': item.ram,
-            'hdd': item.hdd, 'ports': item.ports, 'location': item.location,
-            'applications': item.applications, 'db_name': item.db_name, 'db_password': item.db_password,
-            'db_port': item.db_port, 'dump_location': item.dump_location,
-            'crontab_config': item.crontab_config, 'backup_location': item.backup_location,
-            'url': item.url, 'login_name': item.login_name, 'login_password': item.login_password,
-            'created_at': item.created_at.isoformat(),
-            'db_password_set_at': item.db_password_set_at.isoformat()
-        }
-        items_data.append(item_data)
-    print(f"DEBUG: GET_ALL_ITEMS - Returning {len(items_data)} items for user {g.user.username}.")
-    return jsonify(items_data), 200
+    logger.debug("GET_ALL_ITEMS - Endpoint accessed for user %s.", g.user.username)
+    # Query parameters (all optional, without them the full list is returned as before):
+    #   fields=id,customer,...  -> only select and return these columns
+    #   limit=N&cursor=TOKEN    -> keyset page on (created_at, id), newest first
+    #   format=ndjson|stream    -> stream rows (NDJSON or chunked JSON array)
+    fields = _parse_fields(request.args.get('fields'))
+    if fields is None:
+        return jsonify({'message': f"Unknown field requested. Allowed fields: {', '.join(ITEM_FIELDS)}."}), 400
+
+    fmt = request.args.get('format')
+    if fmt not in (None, 'json', 'ndjson', 'stream'):
+        return jsonify({'message': 'format must be one of json, ndjson or stream.'}), 400
+
+    limit, error = _parse_limit(request.args.get('limit'), None)
+    if error:
+        return jsonify({'message': error}), 400
+
+    # created_at and id are always selected: they form the keyset cursor.
+    # Requested fields come first so the compiled serializer can read them by position.
+    selected = list(dict.fromkeys(fields + ['created_at', 'id']))
+    serialize = item_serializer.compile(tuple(fields))
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            cursor = _decode_cursor(cursor)
+        except (ValueError, UnicodeDecodeError):
+            return jsonify({'message': 'Invalid cursor.'}), 400
+
+    # The ETag covers the user's collection version and the query string (fields, page, format).
+    # It is computed before the rows are read, so it can only be older than the body, never newer.
+    version = f"{g.user.id}:{item_collection_version(g.user.id)}:{request.query_string.decode()}"
+    etag = hashlib.sha1(version.encode()).hexdigest()
+    not_modified = _not_modified(etag)
+    if not_modified is not None:
+        return not_modified
+    stmt = item_list_query(g.user.id, item_serializer.columns(selected), cursor or None)
+
+    if fmt in ('ndjson', 'stream'):
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'application/json'
+        return _cache_headers(Response(stream_with_context(_stream_items(stmt, fields, fmt)), mimetype=mimetype), etag)
+
+    if limit is None:
+        rows = db.session.execute(stmt).all()
+        with timed('serialize'):
+            items_data = [serialize(row) for row in rows]
+            response = item_serializer.response(items_data)
+        logger.debug("GET_ALL_ITEMS - Returning %s items for user %s.", len(items_data), g.user.username)
+        return _cache_headers(response, etag)
+
+    # Fetch one extra row to know whether another page exists.
+    rows = db.session.execute(stmt.limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1].created_at, rows[-1].id)
+    with timed('serialize'):
+        items_data = [serialize(row) for row in rows]
+        response = item_serializer.response({'items': items_data, 'next_cursor': next_cursor})
+    logger.debug("GET_ALL_ITEMS - Returning page of %s items for user %s.", len(items_data), g.user.username)
+    return _cache_headers(response, etag)
+
+@items_bp.route('/search', methods=['GET'])
+@cross_origin()
+@read_only
+@login_required
+def search_items():
+    # Filters (all optional, combined with AND; comma-separated values are OR-ed):
+    #   customer=, location=, os_type=   -> exact match
+    #   application=nginx,redis           -> entry of the comma-separated applications list
+    #   q=text                            -> substring of customer, server_name, applications or url
+    #                                        (prefix match for fewer than 3 characters)
+    #   public_ip=, private_ip=           -> address or IPv4 CIDR, e.g. 10.0.16.0/20
+    # Results are paged newest first like get_all: fields=, limit= (default 100), cursor=.
+    fields = _parse_fields(request.args.get('fields'))
+    if fields is None:
+        return jsonify({'message': f"Unknown field requested. Allowed fields: {', '.join(ITEM_FIELDS)}."}), 400
+    limit, error = _parse_limit(request.args.get('limit'), SEARCH_DEFAULT_LIMIT)
+    if error:
+        return jsonify({'message': error}), 400
+    conditions, error = build_filters(request.args)
+    if error:
+        return jsonify({'message': error}), 400
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            cursor = _decode_cursor(cursor)
+        except (ValueError, UnicodeDecodeError):
+            return jsonify({'message': 'Invalid cursor.'}), 400
+
+    selected = list(dict.fromkeys(fields + ['created_at', 'id']))
+    stmt = item_list_query(g.user.id, item_serializer.columns(selected), cursor or None).where(*conditions)
+    rows = db.session.execute(stmt.limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1].created_at, rows[-1].id)
+    with timed('serialize'):
+        serialize = item_serializer.compile(tuple(fields))
+        items_data = [serialize(row) for row in rows]
+        response = item_serializer.response({'items': items_data, 'next_cursor': next_cursor})
+    logger.debug("SEARCH_ITEMS - Returning %s items for user %s.", len(items_data), g.user.username)
+    return response
+
+
+@items_bp.route('/stats', methods=['GET'])
+@cross_origin()
+@read_only
+@login_required
+def get_item_stats():
+    # Item counts and total cores per location / os_type for dashboards. Accepts the
+    # /search filters; group_by= limits the breakdowns (default: all of them).
+    groups = [grp.strip() for grp in request.args.get('group_by', ','.join(STATS_GROUPS)).split(',') if grp.strip()]
+    if any(grp not in STATS_GROUPS for grp in groups):
+        return jsonify({'message': f"group_by must be one of {', '.join(STATS_GROUPS)}."}), 400
+    conditions, error = build_filters(request.args)
+    if error:
+        return jsonify({'message': error}), 400
+    return jsonify(item_stats(g.user.id, conditions, groups)), 200
+
+def _iter_bulk_payloads(content_type):
+    """Yields (row_number, payload) from an NDJSON or CSV request body without buffering it."""
+    text = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+    if content_type == 'text/csv':
+        for row_number, row in enumerate(csv.DictReader(text), start=1):
+            yield row_number, row
+        return
+    for row_number, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield row_number, json.loads(line)
+        except ValueError:
+            yield row_number, None
+
+
+def _insert_items(rows):
+    """Inserts rows with one multi-row INSERT and commits."""
+    db.session.execute(insert(Item), rows)
+    # Core inserts bypass the ORM events that normally invalidate the reminder cache.
+    mark_items_changed(db.session, g.user.id)
+    db.session.commit()
+
+
+def _insert_item_batch(batch, errors):
+    """Inserts one chunk in its own transaction. Returns rows inserted.
+
+    If the chunk is rejected its rows are retried one at a time, so a single bad row
+    only fails itself and is reported with its own error.
+    """
+    try:
+        _insert_items([values for _, values in batch])
+        return len(batch)
+    except Exception as e:
+        db.session.rollback()
+        logger.warning("BULK_ITEMS - Batch insert failed for user %s, retrying row by row: %s", g.user.username, e)
+    inserted = 0
+    for row_number, values in batch:
+        try:
+            _insert_items([values])
+            inserted += 1
+        except Exception as e:
+            db.session.rollback()
+            errors.append({'row': row_number, 'error': f'Insert failed: {e}'})
+    return inserted
+
+
+@items_bp.route('/bulk', methods=['POST'])
+@cross_origin()
+@login_required
+def bulk_import_items():
+    content_type = request.mimetype
+    if content_type not in ('application/x-ndjson', 'text/csv'):
+        return jsonify({'message': 'Content-Type must be application/x-ndjson or text/csv.'}), 415
+    logger.debug("BULK_ITEMS - Import started for user %s (%s).", g.user.username, content_type)
+
+    inserted = 0
+    failed = 0
+    errors = []
+    batch = []
+    row_number = 0
+    unreadable = None
+    try:
+        for row_number, data in _iter_bulk_payloads(content_type):
+            values, error = _validate_item_payload(data)
+            if error:
+                failed += 1
+                errors.append({'row': row_number, 'error': error})
+                continue
+            values['user_id'] = g.user.id
+            batch.append((row_number, values))
+            if len(batch) >= BULK_BATCH_SIZE:
+                batch_inserted = _insert_item_batch(batch, errors)
+                inserted += batch_inserted
+                failed += len(batch) - batch_inserted
+                batch = []
+    except (UnicodeDecodeError, csv.Error) as e:
+        # The rest of the body cannot be read; keep what was read before it and stop there.
+        reason = 'not valid UTF-8' if isinstance(e, UnicodeDecodeError) else f'malformed CSV ({e})'
+        unreadable = f'Import stopped after row {row_number}: the rest of the body is {reason}.'
+        errors.append({'row': row_number + 1, 'error': unreadable})
+    if batch:
+        batch_inserted = _insert_item_batch(batch, errors)
+        inserted += batch_inserted
+        failed += len(batch) - batch_inserted
+
+    logger.debug("BULK_ITEMS - Inserted %s items, %s failed for user %s.", inserted, failed, g.user.username)
+    body = {
+        'inserted': inserted,
+        'failed': failed,
+        'errors': errors[:BULK_MAX_REPORTED_ERRORS],
+        'errors_truncated': len(errors) > BULK_MAX_REPORTED_ERRORS
+    }
+    if unreadable:
+        # Rows before the unreadable part were imported; 'inserted' says how many.
+        return jsonify({'message': unreadable, **body}), 400
+    return jsonify(body), 200
+
+
+def _with_secrets(serialize, count):
+    """Wraps a serializer for rows that end with the SECRET_FIELDS columns, revealing them."""
+    def serialize_with_secrets(row):
+        values = serialize(row)
+        values.update((field, value.reveal()) for field, value in zip(SECRET_FIELDS, row[count:]))
+        return values
+    return serialize_with_secrets
+
+
+def _stream_items_csv(stmt, fields, include_secrets=False):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    serialize = item_serializer.compile(tuple(fields), text_dates=True)
+    if include_secrets:
+        serialize = _with_secrets(serialize, len(fields))
+        writer.writerow(list(fields) + list(SECRET_FIELDS))
+    else:
+        writer.writerow(fields)
+    for row in db.session.execute(stmt.execution_options(yield_per=STREAM_BATCH_SIZE)):
+        writer.writerow(serialize(row).values())
+        if buffer.tell() > 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+@items_bp.route('/export', methods=['GET'])
+@cross_origin()
+@read_only
+@login_required
+def export_items():
+    # By default the export leaves out the credentials (SECRET_FIELDS), so it is a lossy
+    # listing that /bulk rejects row by row. ?include_secrets=true adds them, decrypted,
+    # which makes the file a backup that /bulk can import again.
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({'message': 'format must be ndjson or csv.'}), 400
+    include_secrets = request.args.get('include_secrets', 'false').lower() in ('1', 'true', 'yes')
+    logger.debug("EXPORT_ITEMS - Export (%s) started for user %s.", fmt, g.user.username)
+
+    fields = list(ITEM_FIELDS)
+    columns = item_serializer.columns(fields)
+    if include_secrets:
+        logger.info("EXPORT_ITEMS - Credentials of all items exported for user %s.", g.user.username)
+        columns += [getattr(Item, f) for f in SECRET_FIELDS]
+    stmt = item_list_query(g.user.id, columns)
+    if fmt == 'csv':
+        response = Response(stream_with_context(_stream_items_csv(stmt, fields, include_secrets)), mimetype='text/csv')
+    else:
+        serialize = item_serializer.compile(tuple(fields))
+        if include_secrets:
+            serialize = _with_secrets(serialize, len(fields))
+        response = Response(stream_with_context(_stream_items(stmt, fields, 'ndjson', serialize)),
+                            mimetype='application/x-ndjson')
+    response.headers['Content-Disposition'] = f'attachment; filename=items.{fmt}'
+    if include_secrets:
+        response.headers['Cache-Control'] = 'no-store'
+    return response
 
 @items_bp.route('/get/<int:item_id>', methods=['GET'])
 @cross_origin()
+@read_only
 @login_required
 def get_single_item(item_id):
-    print(f"DEBUG: GET_SINGLE_ITEM - Endpoint accessed for item_id={item_id}, user={g.user.username}.")
-    item = Item.query.filter_by(id=item_id, user_id=g.user.id).first()
-    if not item:
+    logger.debug("GET_SINGLE_ITEM - Endpoint accessed for item_id=%s, user=%s.", item_id, g.user.username)
+    row = db.session.execute(
+        select(*item_serializer.columns()).where(Item.id == item_id, Item.user_id == g.user.id)
+    ).first()
+    if not row:
         return jsonify({'message': 'Item not found or unauthorized.'}), 404
-    
-    item_data = {
-        'id': item.id, 
-        'customer': item.customer,
-        'public_ip': item.public_ip, 'private_ip': item.private_ip, 'os_type': item.os_type,
-        'root_username': item.root_username, 'root_password': item.root_password,
-        'server_username': item.server_username, 'server_password': item.server_password,
-        'server_name': item.server_name, 'core': item.core, 'ram': item.ram,
-        'hdd': item.hdd, 'ports': item.ports, 'location': item.location,
-        'applications': item.applications, 'db_name': item.db_name, 'db_password': item.db_password,
-        'db_port': item.db_port, 'dump_location': item.dump_location,
-        'crontab_config': item.crontab_config, 'backup_location': item.backup_location,
-        'url': item.url, 'login_name': item.login_name, 'login_password': item.login_password,
-        'created_at': item.created_at.isoformat(),
-        'db_password_set_at': item.db_password_set_at.isoformat()
-    }
-    return jsonify(item_data), 200
+    # Every write bumps updated_at, so (id, updated_at) identifies this version of the row.
+    etag = f"item-{row.id}-{row.updated_at:%Y%m%d%H%M%S%f}"
+    not_modified = _not_modified(etag)
+    if not_modified is not None:
+        return not_modified
+    with timed('serialize'):
+        return _cache_headers(item_serializer.response(item_serializer.serialize_row(row)), etag)
+
+@items_bp.route('/<int:item_id>/secrets', methods=['GET'])
+@cross_origin()
+@read_only
+@login_required
+def get_item_secrets(item_id):
+    # The only endpoint that decrypts credentials; listings and get/<id> never include them.
+    row = db.session.execute(
+        select(*(getattr(Item, f) for f in SECRET_FIELDS)).where(Item.id == item_id, Item.user_id == g.user.id)
+    ).first()
+    if not row:
+        return jsonify({'message': 'Item not found or unauthorized.'}), 404
+    logger.info("ITEM_SECRETS - Credentials of item %s revealed to user %s.", item_id, g.user.username)
+    response = jsonify({field: value.reveal() for field, value in zip(SECRET_FIELDS, row)})
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@items_bp.route('/changes', methods=['GET'])
+@cross_origin()
+@read_only
+@login_required
+def get_item_changes():
+    # Incremental sync. Clients keep a local copy and pass back the 'token' of the previous
+    # response as ?since=. Without since (or with a token older than SYNC_RETENTION_DAYS)
+    # the response asks for a full resync via get_all and carries a fresh token.
+    # Rows changed within SYNC_OVERLAP_SECONDS of a caught-up token are sent again, so
+    # writes committed late or from a worker with a slightly skewed clock are not missed.
+    config = current_app.config
+    now = datetime.utcnow()
+    fresh_token = _encode_cursor(now - timedelta(seconds=config['SYNC_OVERLAP_SECONDS']), 0)
+
+    token = request.args.get('since')
+    if not token:
+        return jsonify({'changed': [], 'deleted': [], 'token': fresh_token, 'has_more': False,
+                        'resync_required': True}), 200
+    try:
+        since, since_id = _decode_cursor(token)
+    except (ValueError, UnicodeDecodeError):
+        return jsonify({'message': 'Invalid since token.'}), 400
+    if since < retention_cutoff(config['SYNC_RETENTION_DAYS'], now):
+        return jsonify({'message': 'Change token expired, a full resync is required.', 'changed': [],
+                        'deleted': [], 'token': fresh_token, 'has_more': False, 'resync_required': True}), 410
+
+    fields = _parse_fields(request.args.get('fields'))
+    if fields is None:
+        return jsonify({'message': f"Unknown field requested. Allowed fields: {', '.join(ITEM_FIELDS)}."}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', MAX_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'message': 'limit must be a number.'}), 400
+
+    selected = list(dict.fromkeys(fields + ['updated_at', 'id']))
+    rows = db.session.execute(
+        select(*item_serializer.columns(selected))
+        .where(Item.user_id == g.user.id, tuple_(Item.updated_at, Item.id) > tuple_(since, since_id))
+        .order_by(Item.updated_at, Item.id)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    if has_more:
+        rows = rows[:limit]
+        next_token = _encode_cursor(rows[-1].updated_at, rows[-1].id)
+    else:
+        next_token = fresh_token
+
+    with timed('serialize'):
+        serialize = item_serializer.compile(tuple(fields))
+        response = item_serializer.response({
+            'changed': [serialize(row) for row in rows],
+            'deleted': deleted_item_ids(g.user.id, since),
+            'token': next_token,
+            'has_more': has_more,
+            'resync_required': False,
+        })
+    logger.debug("ITEM_CHANGES - %s changed rows for user %s since %s.", len(rows), g.user.username, since)
+    return response
 
 @items_bp.route('/update/<int:item_id>', methods=['PUT'])
 @cross_origin()
 @login_required
 def update_item(item_id):
-    print(f"DEBUG: UPDATE_ITEM - Endpoint accessed for item_id={item_id}, user={g.user.username}.")
-    item = Item.query.filter_by(id=item_id, user_id=g.user.id).first()
-    if not item:
-        return jsonify({'message': 'Item not found or unauthorized.'}), 404
+    # Kept for existing clients: applies the supplied fields like it always did. A version
+    # makes it conditional like PATCH; without one the last writer wins, so new clients
+    # should use PATCH.
+    logger.debug("UPDATE_ITEM - Endpoint accessed for item_id=%s, user=%s.", item_id, g.user.username)
+    return _update_item(item_id, request.get_json(), version_required=False)
 
-    data = request.get_json()
-    
-    # Update fields based on payload, using existing value as fallback
-    item.customer = data.get('customer', item.customer)
-    item.public_ip = data.get('public_ip', item.public_ip)
-    item.private_ip = data.get('private_ip', item.private_ip)
-    item.os_type = data.get('os_type', item.os_type)
-    item.root_username = data.get('root_username', item.root_username)
-    item.root_password = data.get('root_password', item.root_password)
-    item.server_username = data.get('server_username', item.server_username)
-    item.server_password = data.get('server_password', item.server_password)
-    item.server_name = data.get('server_name', item.server_name)
-    item.core = int(data.get('core')) if data.get('core') is not None else item.core
-    item.ram = data.get('ram', item.ram)
-    item.hdd = data.get('hdd', item.hdd)
-    item.ports = data.get('ports', item.ports)
-    item.location = data.get('location', item.location)
-    item.applications = data.get('applications', item.applications)
-    item.db_name = data.get('db_name', item.db_name)
-    item.db_password = data.get('db_password', item.db_password)
-    item.db_port = int(data.get('db_port')) if data.get('db_port') is not None else item.db_port
-    item.dump_location = data.get('dump_location', item.dump_location)
-    item.crontab_config = data.get('crontab_config', item.crontab_config)
-    item.backup_location = data.get('backup_location', item.backup_location)
-    item.url = data.get('url', item.url)
-    item.login_name = data.get('login_name', item.login_name)
-    item.login_password = data.get('login_password', item.login_password)
-
-    # --- NEW: Handle db_password_set_at if db_password changes ---
-    # Check if 'db_password' is present in the incoming data AND if its value has actually changed
-    if 'db_password' in data and data['db_password'] != item.db_password:
-        item.db_password_set_at = date.today() # Update to today's date
-        print(f"DEBUG: UPDATE_ITEM - DB password changed for item {item.id}. db_password_set_at updated to {item.db_password_set_at}.")
-    elif 'db_password_set_at' in data and data['db_password_set_at'] is not None:
-        # Allow manual update of db_password_set_at if provided
-        try:
-            item.db_password_set_at = datetime.strptime(data['db_password_set_at'], '%Y-%m-%d').date()
-        except ValueError:
-            return jsonify({'message': 'Invalid db_password_set_at date format. Use YYYY-MM-DD.'}), 400
-
-    required_fields_on_update = [
-        item.customer, item.server_name, 
-        item.public_ip, item.private_ip, item.os_type, item.root_username, item.root_password,
-        item.server_username, item.server_password,
-        item.core, item.ram, item.hdd, item.ports, item.location, item.applications, item.db_name, item.db_password, item.db_port,
-        item.dump_location, item.crontab_config, item.backup_location, item.url, item.login_name, item.login_password,
-        item.db_password_set_at # Add this to the validation list
-    ]
-    if not all(required_fields_on_update):
-        return jsonify({'message': 'All mandatory fields must be filled.'}), 400
+@items_bp.route('/update/<int:item_id>', methods=['PATCH'])
+@cross_origin()
+@login_required
+def patch_item(item_id):
+    # Partial update: only the supplied fields change, and only if the item is still at the
+    # given version. 409 means someone else saved it first; reload and re-apply the edit.
+    logger.debug("PATCH_ITEM - Endpoint accessed for item_id=%s, user=%s.", item_id, g.user.username)
+    return _update_item(item_id, request.get_json(), version_required=True)
+
+def _update_item(item_id, data, version_required):
+    version = data.get('version') if isinstance(data, dict) else None
+    if version is None:
+        if version_required:
+            return jsonify({'message': 'version is required: send the version the item was loaded with.'}), 400
+    elif isinstance(version, bool) or not isinstance(version, int):
+        return jsonify({'message': 'version must be an integer.'}), 400
+    values, error = _validate_item_changes(data)
+    if error:
+        return jsonify({'message': error}), 400
 
     try:
+        new_version = db.session.execute(item_update_query(item_id, g.user.id, values, version)).scalar()
+        if new_version is None:
+            current_version = db.session.execute(
+                select(Item.version).where(Item.id == item_id, Item.user_id == g.user.id)).scalar()
+            if current_version is None:
+                return jsonify({'message': 'Item not found or unauthorized.'}), 404
+            logger.debug("UPDATE_ITEM - Version conflict on item %s: expected %s, found %s.",
+                         item_id, version, current_version)
+            return jsonify({'message': 'Item was changed by someone else. Reload it and try again.',
+                            'error': 'version_conflict', 'version': current_version}), 409
+        mark_items_changed(db.session, g.user.id)
         db.session.commit()
-        print(f"DEBUG: UPDATE_ITEM - Item '{item.customer}' with ID: {item.id} updated successfully.")
-        return jsonify({'message': 'Item updated successfully!'}), 200
+        logger.debug("UPDATE_ITEM - Item %s updated to version %s.", item_id, new_version)
+        return jsonify({'message': 'Item updated successfully!', 'version': new_version}), 200
     except Exception as e:
         db.session.rollback()
-        print(f"ERROR: UPDATE_ITEM - Failed to update item {item_id} for user {g.user.username}: {e}")
+        logger.error("UPDATE_ITEM - Failed to update item %s for user %s: %s", item_id, g.user.username, e)
         return jsonify({'message': 'An error occurred during item update', 'error': str(e)}), 500
 
 @items_bp.route('/delete/<int:item_id>', methods=['DELETE'])
 @cross_origin()
 @login_required
 def delete_item(item_id):
-    print(f"DEBUG: DELETE_ITEM - Endpoint accessed for item_id={item_id}, user={g.user.username}.")
+    logger.debug("DELETE_ITEM - Endpoint accessed for item_id=%s, user=%s.", item_id, g.user.username)
     item = Item.query.filter_by(id=item_id, user_id=g.user.id).first()
     if not item:
         return jsonify({'message': 'Item not found or unauthorized.'}), 404
 
     try:
         db.session.delete(item)
+        db.session.add(ItemTombstone(item_id=item.id, user_id=item.user_id))
         db.session.commit()
-        print(f"DEBUG: DELETE_ITEM - Item '{item.customer}' with ID: {item.id} deleted successfully.")
+        logger.debug("DELETE_ITEM - Item '%s' with ID: %s deleted successfully.", item.customer, item.id)
+        maybe_prune_tombstones(current_app.config['SYNC_RETENTION_DAYS'], current_app.config['SYNC_PRUNE_INTERVAL'])
         return jsonify({'message': 'Item deleted successfully!'}), 200
     except Exception as e:
         db.session.rollback()
-        print(f"ERROR: DELETE_ITEM - Failed to delete item {item_id} for user {g.user.username}: {e}")
+        logger.error("DELETE_ITEM - Failed to delete item %s for user %s: %s", item_id, g.user.username, e)
         return jsonify({'message': 'An error occurred during item deletion', 'error': str(e)}), 500
 
 # --- NOTIFICATIONS ENDPOINT ---
 @notifications_bp.route('/get_reminders', methods=['GET'])
 @cross_origin()
+@read_only
 @login_required
 def get_password_reminders():
-    print(f"DEBUG: NOTIFICATIONS - Checking password reminders for user {g.user.username}.")
-    reminders = []
-    today = date.today()
-    
-    user_items = Item.query.filter_by(user_id=g.user.id).all()
-
-    for item in user_items:
-        if item.db_password_set_at:
-            days_since_set = (today - item.db_password_set_at).days
-            
-            if days_since_set >= (7 - 6) and days_since_set < 7:
-                reminders.append({
-                    'id': item.id,
-                    'message': f"Change DB password for server '{item.server_name}'. It expires in {90 - days_since_set} days!",
-                    'item_id': item.id,
-                    'server_name': item.server_name,
-                    'type': 'db_password_expiry',
-                    'date': today.isoformat()
-                })
-            elif days_since_set >= 90:
-                 reminders.append({
-                    'id': item.id,
-                    'message': f"DB password for server '{item.server_name}' has EXPIRED! Please change immediately.",
-                    'item_id': item.id,
-                    'server_name': item.server_name,
-                    'type': 'db_password_expired',
-                    'date': today.isoformat()
-                })
-        else: # This case should ideally not happen if db_password_set_at is nullable=False
-             reminders.append({
-                    'id': item.id,
-                    'message': f"DB password for server '{item.server_name}' has no set date. Please update password and set date.",
-                    'item_id': item.id,
-                    'server_name': item.server_name,
-                    'type': 'db_password_no_date',
-                    'date': today.isoformat()
-                })
-    print(f"DEBUG: NOTIFICATIONS - Found {len(reminders)} reminders for user {g.user.username}.")
-    return jsonify(reminders), 200
\ No newline at end of file
+    logger.debug("NOTIFICATIONS - Checking password reminders for user %s.", g.user.username)
+    body, etag = reminder_cache.get(g.user.id)
+    not_modified = _not_modified(etag)
+    if not_modified is not None:
+        return not_modified
+    return _cache_headers(Response(body, status=200, mimetype='application/json'), etag)
+
+@notifications_bp.route('/stream', methods=['GET'])
+@cross_origin()
+@login_required
+def stream_reminders():
+    # Server-Sent Events replacement for polling get_reminders: one connection per tab,
+    # an 'event: reminders' message (same JSON as get_reminders, id = its ETag) whenever
+    # the list changes, and a comment line as keepalive. Not marked read_only: a
+    # notification follows a write on the primary that a replica may not have yet.
+    # Each stream holds a thread, so past REMINDER_STREAM_MAX_PER_WORKER clients are told
+    # to poll get_reminders and retry the stream after Retry-After seconds.
+    config = current_app.config
+    if not reminder_stream_slots.acquire():
+        logger.info("NOTIFICATIONS - Reminder stream refused for user %s: %s streams already open.",
+                    g.user.username, reminder_stream_slots.limit)
+        response = jsonify({'message': 'Too many open reminder streams. Poll get_reminders instead.',
+                            'error': 'streams_exhausted'})
+        response.headers['Retry-After'] = str(config['REMINDER_STREAM_RETRY_AFTER'])
+        return response, 503
+    logger.debug("NOTIFICATIONS - Reminder stream opened for user %s.", g.user.username)
+    events = reminder_events(g.user.id, request.headers.get('Last-Event-ID'),
+                             heartbeat=config['REMINDER_STREAM_HEARTBEAT'],
+                             max_seconds=config['REMINDER_STREAM_MAX_SECONDS'])
+    response = Response(stream_with_context(events), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Runs when the server closes the response, also if the client left before the first byte.
+    response.call_on_close(reminder_stream_slots.release)
+    return response
+
+# --- INTERNAL ENDPOINTS ---
+@internal_bp.route('/user_cache', methods=['GET'])
+@internal_only
+def user_cache_stats():
+    return jsonify(user_cache.stats()), 200
+
+@internal_bp.route('/pool', methods=['GET'])
+@internal_only
+def pool_stats():
+    status = pool_status(db.engine)
+    status['replicas'] = replica_router.status()
+    return jsonify(status), 200
+
+@internal_bp.route('/broker', methods=['GET'])
+@internal_only
+def broker_stats():
+    return jsonify({**reminder_broker.stats(), 'reminder_streams': reminder_stream_slots.stats()}), 200
+
+@internal_bp.route('/tokens', methods=['GET'])
+@internal_only
+def token_stats():
+    return jsonify(token_service.stats()), 200
+
+@internal_bp.route('/startup', methods=['GET'])
+@internal_only
+def startup_stats():
+    return jsonify(current_app.extensions['startup'].snapshot()), 200
+
+# --- HEALTH CHECKS (load balancer / orchestrator probes) ---
+@health_bp.route('/healthz', methods=['GET'])
+def healthz():
+    # Liveness: the worker answers requests. Deliberately touches nothing else, so a
+    # database outage does not get every worker restarted.
+    return jsonify({'status': 'ok'}), 200
+
+@health_bp.route('/readyz', methods=['GET'])
+def readyz():
+    # Readiness: the primary database answers and the schema is up to date.
+    ready, checks = readiness.check(db)
+    return jsonify({'status': 'ready' if ready else 'unavailable', 'checks': checks}), 200 if ready else 503
@@ -9,6 +9,10 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 
+# Development server: debug mode (set before the app is created) also allows the public
+# development encryption key when ITEM_ENCRYPTION_KEY is not set.
+os.environ.setdefault('FLASK_DEBUG', '1')
+
 # Now, import create_app from the my_backend_app package
 from my_backend_app import create_app
 
@@ -16,5 +20,5 @@ app = create_app()
 
 if __name__ == '__main__':
     # When running with 'python run.py', debug should be True for development
-    # In production, set debug=False and use a production WSGI server like Gunicorn
+    # In production use Gunicorn instead: gunicorn -c my_backend_app/gunicorn.conf.py
     app.run(debug=True, port=5000)
\ No newline at end of file
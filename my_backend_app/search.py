@@ -0,0 +1,109 @@
+# my_backend_app/search.py
+import ipaddress
+
+from sqlalchemy import func, literal, or_, select
+
+from .models import db, Item
+
+# Exact-match filters (comma-separated values are OR-ed), each backed by a (user_id, column) index.
+EXACT_FILTERS = ('customer', 'location', 'os_type')
+# Columns covered by the free-text ?q= search (pg_trgm GIN indexes on Postgres).
+TEXT_SEARCH_FIELDS = ('customer', 'server_name', 'applications', 'url')
+IP_FILTERS = ('public_ip', 'private_ip')
+STATS_GROUPS = ('location', 'os_type')
+# pg_trgm cannot use its index for patterns shorter than one trigram; fall back to prefix matching.
+MIN_SUBSTRING_LENGTH = 3
+# A CIDR filter expands to at most 2**7 patterns (one per value of the partial octet).
+MAX_IP_VALUES = 20
+
+
+def _split(raw):
+    return [v.strip() for v in raw.split(',') if v.strip()]
+
+
+def _ipv4_patterns(network):
+    """LIKE patterns matching the dotted-quad strings inside an IPv4 network.
+
+    IPs are stored as text, so a CIDR is expanded on octet boundaries: 10.0.16.0/20
+    becomes '10.0.16.%' .. '10.0.31.%'. Host-level prefixes (/25 and up) become
+    exact addresses instead of patterns.
+    """
+    if network.prefixlen == 0:
+        return ['%'], []
+    octets = str(network.network_address).split('.')
+    full, partial_bits = divmod(network.prefixlen, 8)
+    if full == 4:
+        return [], [str(network.network_address)]
+    if partial_bits == 0:
+        return ['.'.join(octets[:full]) + '.%'], []
+    start = int(octets[full])
+    values = range(start, start + 2 ** (8 - partial_bits))
+    if full == 3:
+        return [], ['.'.join(octets[:3] + [str(v)]) for v in values]
+    return ['.'.join(octets[:full] + [str(v)]) + '.%' for v in values], []
+
+
+def _ip_condition(column, raw):
+    """Condition for a comma-separated list of addresses and CIDR networks."""
+    patterns, exact = [], []
+    for value in _split(raw)[:MAX_IP_VALUES]:
+        network = ipaddress.ip_network(value, strict=False)
+        if '/' not in value or network.num_addresses == 1:
+            exact.append(str(network.network_address))
+        elif network.version == 4:
+            more_patterns, more_exact = _ipv4_patterns(network)
+            patterns.extend(more_patterns)
+            exact.extend(more_exact)
+        else:
+            raise ValueError('IPv6 networks are not supported, use exact addresses.')
+    conditions = [column.like(p) for p in patterns]
+    if exact:
+        conditions.append(column.in_(exact))
+    return or_(*conditions)
+
+
+def _text_condition(q):
+    if len(q) < MIN_SUBSTRING_LENGTH:
+        return or_(*(getattr(Item, f).istartswith(q, autoescape=True) for f in TEXT_SEARCH_FIELDS))
+    return or_(*(getattr(Item, f).icontains(q, autoescape=True) for f in TEXT_SEARCH_FIELDS))
+
+
+def _application_condition(raw):
+    # applications is a comma-separated list; match whole entries, not substrings.
+    normalized = literal(',') + func.replace(Item.applications, ' ', '') + literal(',')
+    return or_(*(normalized.like(f'%,{name.replace(" ", "")},%') for name in _split(raw)))
+
+
+def build_filters(args):
+    """Translates search query parameters into WHERE conditions. Returns (conditions, None) or (None, error)."""
+    conditions = []
+    for field in EXACT_FILTERS:
+        if args.get(field):
+            conditions.append(getattr(Item, field).in_(_split(args[field])))
+    if args.get('application'):
+        conditions.append(_application_condition(args['application']))
+    q = (args.get('q') or '').strip()
+    if q:
+        conditions.append(_text_condition(q))
+    for field in IP_FILTERS:
+        if args.get(field):
+            try:
+                conditions.append(_ip_condition(getattr(Item, field), args[field]))
+            except ValueError as e:
+                return None, f'Invalid {field} filter: {e}'
+    return conditions, None
+
+
+def item_stats(user_id, conditions=(), groups=STATS_GROUPS):
+    """Item counts and total cores, overall and per group column, computed in SQL."""
+    measures = (func.count(Item.id).label('items'), func.coalesce(func.sum(Item.core), 0).label('cores'))
+    base = select(*measures).where(Item.user_id == user_id, *conditions)
+    items, cores = db.session.execute(base).one()
+    stats = {'total': {'items': items, 'cores': cores}}
+    for group in groups:
+        column = getattr(Item, group)
+        rows = db.session.execute(
+            base.add_columns(column).group_by(column).order_by(func.count(Item.id).desc(), column)
+        ).all()
+        stats[f'by_{group}'] = [{group: row[2], 'items': row.items, 'cores': row.cores} for row in rows]
+    return stats
@@ -0,0 +1,193 @@
+# my_backend_app/security.py
+import functools
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from passlib.context import CryptContext
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool is saturated; callers should answer 503."""
+
+
+# --- Worker side: these run inside the pool processes and must stay picklable ---
+@functools.lru_cache(maxsize=8)
+def _context(rounds):
+    return CryptContext(schemes=['pbkdf2_sha256'], pbkdf2_sha256__rounds=rounds)
+
+
+def _hash(password, rounds):
+    return _context(rounds).hash(password)
+
+
+def _verify_and_update(password, password_hash, rounds):
+    # Returns (valid, new_hash); new_hash is set when the stored hash uses outdated parameters.
+    return _context(rounds).verify_and_update(password, password_hash)
+
+
+class PasswordHasher:
+    """Runs PBKDF2 hashing/verification on a bounded process pool.
+
+    At most PASSWORD_HASH_MAX_PENDING operations may be queued or running at once;
+    beyond that HashingBusy is raised immediately instead of piling up requests
+    behind a saturated CPU. With PASSWORD_HASH_WORKERS = 0 the work runs inline on
+    the request thread (useful for the dev server and scripts).
+
+    Pool processes are started by a forkserver where available: forking a worker
+    that already runs request and logging threads can deadlock the child. As with
+    spawn, they import the __main__ module, so scripts that hash passwords must
+    keep their work under `if __name__ == '__main__':`.
+    """
+
+    def __init__(self):
+        self.rounds = 29000
+        self.workers = 0
+        self.max_pending = 0
+        self.timeout = 10
+        self._executor = None
+        self._executor_pid = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.rounds = app.config.get('PASSWORD_HASH_ROUNDS', self.rounds)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', self.workers)
+        self.max_pending = app.config.get('PASSWORD_HASH_MAX_PENDING') or self.workers * 4
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', self.timeout)
+        app.extensions['password_hasher'] = self
+
+    def hash(self, password):
+        return self._run(_hash, password, self.rounds)
+
+    def verify_and_update(self, password, password_hash):
+        return self._run(_verify_and_update, password, password_hash, self.rounds)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HashingBusy()
+            self._pending += 1
+        executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self._release()
+            self._discard_executor(executor)
+            raise HashingBusy()
+        except BaseException:
+            self._release()
+            raise
+        # The slot is held until the work is done, not just until this caller stops waiting.
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()  # Drops it if still queued; a running hash cannot be interrupted.
+            raise HashingBusy()
+        except BrokenProcessPool:
+            # A pool process died (e.g. OOM-killed); the executor cannot be used again.
+            self._discard_executor(executor)
+            raise HashingBusy()
+
+    def _release(self, future=None):
+        with self._lock:
+            self._pending -= 1
+
+    def _get_executor(self):
+        # The pool is created lazily and re-created after a fork (e.g. Gunicorn preload) or a crash.
+        if self._executor is None or self._executor_pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._executor_pid != os.getpid():
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_pool_context())
+                    self._executor_pid = os.getpid()
+        return self._executor
+
+    def _discard_executor(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _pool_context():
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context()  # Windows: spawn
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload([__name__])
+    return context
+
+
+class LoginThrottle:
+    """Sliding-window counter of failed sign-ins per client IP and per username.
+
+    Checked before any hashing happens, so a flood of bad passwords is rejected
+    without paying for a PBKDF2 run each time.
+    """
+
+    def __init__(self):
+        self.window = 300
+        self.max_per_ip = 20
+        self.max_per_username = 5
+        self.max_keys = 100000
+        self._failures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.window = app.config.get('LOGIN_THROTTLE_WINDOW', self.window)
+        self.max_per_ip = app.config.get('LOGIN_THROTTLE_MAX_PER_IP', self.max_per_ip)
+        self.max_per_username = app.config.get('LOGIN_THROTTLE_MAX_PER_USERNAME', self.max_per_username)
+        app.extensions['login_throttle'] = self
+
+    def retry_after(self, ip, username):
+        """Returns the number of seconds the caller must wait, or 0 if the attempt may proceed."""
+        now = time.monotonic()
+        with self._lock:
+            wait = 0
+            for key, limit in ((('ip', ip), self.max_per_ip), (('user', username), self.max_per_username)):
+                failures = self._recent(key, now)
+                if failures is not None and len(failures) >= limit:
+                    wait = max(wait, int(failures[0] + self.window - now) + 1)
+            return wait
+
+    def record_failure(self, ip, username):
+        now = time.monotonic()
+        with self._lock:
+            for key in (('ip', ip), ('user', username)):
+                failures = self._failures.get(key)
+                if failures is None:
+                    failures = self._failures[key] = deque()
+                failures.append(now)
+                self._failures.move_to_end(key)
+            while len(self._failures) > self.max_keys:
+                self._failures.popitem(last=False)
+
+    def reset(self, username):
+        with self._lock:
+            self._failures.pop(('user', username), None)
+
+    def _recent(self, key, now):
+        failures = self._failures.get(key)
+        if failures is None:
+            return None
+        while failures and failures[0] <= now - self.window:
+            failures.popleft()
+        if not failures:
+            del self._failures[key]
+            return None
+        return failures
+
+
+password_hasher = PasswordHasher()
+login_throttle = LoginThrottle()
@@ -0,0 +1,79 @@
+# my_backend_app/serializers.py
+import functools
+import json
+from datetime import date, datetime
+
+from flask import Response
+
+from .models import Item, SECRET_FIELDS
+
+try:
+    import orjson  # Optional: a much faster encoder that handles dates natively.
+except ImportError:
+    orjson = None
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+class RowSerializer:
+    """Serializer generated once from a model's columns.
+
+    Rows are expected to be plain SQLAlchemy Row tuples selected with columns(fields),
+    so no ORM objects are hydrated. For every field subset a small function building
+    the dict by position is compiled and cached.
+    """
+
+    def __init__(self, model, exclude=()):
+        self.model = model
+        self.fields = tuple(c.name for c in model.__table__.columns if c.name not in exclude)
+        self._converters = {
+            c.name: _isoformat for c in model.__table__.columns
+            if c.name in self.fields and c.type.python_type in (date, datetime)
+        }
+
+    def columns(self, fields=None):
+        """Model attributes to pass to select() for the given fields (all fields by default)."""
+        return [getattr(self.model, f) for f in (fields or self.fields)]
+
+    def serialize_row(self, row, fields=None):
+        return self.compile(tuple(fields or self.fields))(row)
+
+    def serialize_object(self, obj, fields=None):
+        fields = tuple(fields or self.fields)
+        return self.compile(fields)(tuple(getattr(obj, f) for f in fields))
+
+    @functools.lru_cache(maxsize=64)
+    def compile(self, fields, text_dates=False):
+        """Returns a function turning a row (tuple) into a dict of the given fields.
+
+        Date columns are left as date/datetime objects when orjson is available
+        (it encodes them natively) unless text_dates is set, e.g. for CSV output.
+        """
+        namespace = {}
+        items = []
+        for index, field in enumerate(fields):
+            converter = self._converters.get(field)
+            if converter is not None and (text_dates or orjson is None):
+                namespace[f'_convert{index}'] = converter
+                items.append(f'{field!r}: _convert{index}(row[{index}])')
+            else:
+                items.append(f'{field!r}: row[{index}]')
+        source = 'def serialize(row):\n    return {' + ', '.join(items) + '}\n'
+        exec(source, namespace)
+        return namespace['serialize']
+
+    @staticmethod
+    def dumps(obj):
+        """Encodes obj as JSON bytes."""
+        if orjson is not None:
+            return orjson.dumps(obj)
+        return json.dumps(obj, separators=(',', ':')).encode()
+
+    def response(self, obj, status=200):
+        return Response(self.dumps(obj), status=status, mimetype='application/json')
+
+
+# Secrets are never selected for listings, so list endpoints never decrypt anything.
+item_serializer = RowSerializer(Item, exclude=('user_id', 'db_password_fingerprint') + SECRET_FIELDS)
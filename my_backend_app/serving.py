@@ -0,0 +1,160 @@
+# my_backend_app/serving.py
+"""Production serving: worker sizing, fork safety, startup timing and readiness.
+
+Used by gunicorn.conf.py. The app is created once in the Gunicorn master
+(preload), so the schema check and key loading run once per deployment instead
+of once per worker; workers are forked from it and only have to drop the
+inherited database connections.
+"""
+import os
+import threading
+import time
+
+from sqlalchemy import text
+
+from .instrumentation import logger, restart_log_listener
+
+
+def worker_settings(env=None, cpu_count=None):
+    """Gunicorn workers/threads derived from the CPU count and the database pool size.
+
+    threads: one per connection the pool can hand out (DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW),
+        so a worker never waits for a connection; override with WEB_THREADS.
+    workers: 2 x cores + 1, or WEB_CONCURRENCY; lowered so that the connections all workers
+        may open stay within DB_MAX_CONNECTIONS. Each worker has a pool for the primary and
+        one per DATABASE_REPLICA_URLS entry. The default of 90 leaves headroom under
+        Postgres' default max_connections of 100; set it to what the server (or PgBouncer)
+        allows this deployment, or 0 to turn the cap off.
+    """
+    env = os.environ if env is None else env
+    cores = cpu_count or os.cpu_count() or 1
+    pool_capacity = int(env.get('DB_POOL_SIZE', '5')) + int(env.get('DB_POOL_MAX_OVERFLOW', '10'))
+    threads = int(env.get('WEB_THREADS', '0')) or pool_capacity
+    workers = int(env.get('WEB_CONCURRENCY', '0')) or cores * 2 + 1
+    replicas = len([url for url in env.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()])
+    connections_per_worker = pool_capacity * (1 + replicas)
+    max_connections = int(env.get('DB_MAX_CONNECTIONS', '90'))
+    if max_connections:
+        workers = max(1, min(workers, max_connections // connections_per_worker))
+    return {'workers': workers, 'threads': threads, 'pool_capacity': pool_capacity, 'replicas': replicas,
+            'connections_per_worker': connections_per_worker, 'max_connections': max_connections,
+            'max_total_connections': workers * connections_per_worker}
+
+
+def log_connection_budget(sizing):
+    """Logs how many database connections the workers may open, against DB_MAX_CONNECTIONS."""
+    logger.info("STARTUP - Database connections: up to %s (%s workers x %s: primary pool%s), DB_MAX_CONNECTIONS=%s",
+                sizing['max_total_connections'], sizing['workers'], sizing['connections_per_worker'],
+                f" and {sizing['replicas']} replica pools" if sizing['replicas'] else '',
+                sizing['max_connections'] or 'unlimited')
+    if sizing['max_connections'] and sizing['max_total_connections'] > sizing['max_connections']:
+        logger.warning("STARTUP - Even one worker can exceed DB_MAX_CONNECTIONS; lower DB_POOL_SIZE / "
+                       "DB_POOL_MAX_OVERFLOW or raise the limit.")
+
+
+class StartupTimer:
+    """Wall time of each create_app() phase, logged once and kept for /api/_internal/startup."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._start = self._last = time.perf_counter()
+        self.phases = {}
+        self.total_ms = None
+        self.worker_ready_ms = None
+
+    def lap(self, name):
+        """Records the time since the previous lap (or the start) as phase name."""
+        now = time.perf_counter()
+        self.phases[name] = round((now - self._last) * 1000, 2)
+        self._last = now
+
+    def finish(self):
+        self.total_ms = round((time.perf_counter() - self._start) * 1000, 2)
+        logger.info("STARTUP - create_app took %.0f ms (%s)", self.total_ms,
+                    ', '.join(f'{name} {ms:.0f} ms' for name, ms in self.phases.items()))
+
+    def worker_ready(self, forked_at):
+        """Records a forked worker's cold start: time from fork until it can take requests."""
+        self.worker_ready_ms = round((time.time() - forked_at) * 1000, 2)
+        logger.info("STARTUP - Worker %s ready %.0f ms after fork.", os.getpid(), self.worker_ready_ms)
+
+    def snapshot(self):
+        # With preload, create_app ran in the master; worker_ready_ms is this worker's own cold start.
+        return {'pid': os.getpid(), 'create_app_ms': self.total_ms, 'phases': self.phases,
+                'worker_ready_ms': self.worker_ready_ms}
+
+
+def warn_unshared_state(workers):
+    """Logs which notifications will not reach other workers when several of them run.
+
+    Access token revocation and reminder invalidation only travel between workers
+    through a shared (Redis) broker; with BROKER_BACKEND=memory a token revoked in one
+    worker keeps working in the others until it expires.
+    """
+    from .broker import unshared_brokers
+    names = unshared_brokers()
+    if workers > 1 and names:
+        logger.warning("STARTUP - %s workers with BROKER_BACKEND=memory: %s messages stay in the worker that "
+                       "sent them. Set BROKER_BACKEND=redis.", workers, ', '.join(names))
+        return names
+    return []
+
+
+def after_fork(app):
+    """Makes a forked worker safe to serve: restarts the log writer and broker listener
+    threads and drops the database connections inherited from the master without
+    closing the master's sockets."""
+    from . import broker
+    from .models import db
+    from .replicas import replica_router
+    restart_log_listener()
+    broker.after_fork()
+    with app.app_context():
+        db.engine.dispose(close=False)
+    for engine in replica_router.engines:
+        engine.dispose(close=False)
+
+
+def release_connections(app):
+    """Closes the master's own connections once preloading is done; it never serves requests."""
+    from .models import db
+    from .replicas import replica_router
+    with app.app_context():
+        db.engine.dispose()
+    replica_router.dispose()
+
+
+def worker_shutdown():
+    """Flushes queued login events and stops the hashing pool before a worker exits."""
+    from .login_history import login_history_writer
+    from .security import password_hasher
+    login_history_writer.stop()
+    password_hasher.shutdown()
+
+
+class Readiness:
+    """Result of the checks behind /readyz: the primary answers and no migration is pending."""
+
+    def __init__(self):
+        self._schema_current = False
+        self._lock = threading.Lock()
+
+    def check(self, db):
+        checks = {}
+        try:
+            db.session.execute(text('SELECT 1'))
+            checks['database'] = 'ok'
+        except Exception as e:
+            logger.warning("READYZ - Database check failed: %s", e)
+            checks['database'] = 'unavailable'
+            return False, checks
+        # Once the schema is current it stays current for the life of this process.
+        if not self._schema_current:
+            from .migrations import pending_migrations
+            with self._lock:
+                self._schema_current = not pending_migrations(db.engine)
+        checks['schema'] = 'ok' if self._schema_current else 'migrations pending'
+        return all(v == 'ok' for v in checks.values()), checks
+
+
+readiness = Readiness()
@@ -0,0 +1,53 @@
+# my_backend_app/sync.py
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select
+
+from .models import db, ItemTombstone
+from .instrumentation import logger
+
+_prune_lock = threading.Lock()
+_last_prune = 0.0
+
+
+def retention_cutoff(retention_days, now=None):
+    """Change tokens older than this can no longer be served incrementally."""
+    return (now or datetime.utcnow()) - timedelta(days=retention_days)
+
+
+def deleted_item_ids(user_id, since):
+    stmt = (
+        select(ItemTombstone.item_id)
+        .where(ItemTombstone.user_id == user_id, ItemTombstone.deleted_at > since)
+        .order_by(ItemTombstone.deleted_at)
+    )
+    return list(dict.fromkeys(db.session.execute(stmt).scalars()))
+
+
+def maybe_prune_tombstones(retention_days, interval=3600, chunk=5000):
+    """Deletes tombstones past the retention window, at most once per interval per process."""
+    global _last_prune
+    if time.monotonic() - _last_prune < interval or not _prune_lock.acquire(blocking=False):
+        return 0
+    try:
+        _last_prune = time.monotonic()
+        cutoff = retention_cutoff(retention_days)
+        deleted = 0
+        while True:
+            ids = select(ItemTombstone.id).where(ItemTombstone.deleted_at < cutoff).limit(chunk)
+            result = db.session.execute(delete(ItemTombstone).where(ItemTombstone.id.in_(ids)))
+            db.session.commit()
+            deleted += result.rowcount
+            if result.rowcount < chunk:
+                break
+        if deleted:
+            logger.info("SYNC - Pruned %s tombstones older than %s.", deleted, cutoff)
+        return deleted
+    except Exception as e:
+        db.session.rollback()
+        logger.error("SYNC - Tombstone pruning failed: %s", e)
+        return 0
+    finally:
+        _prune_lock.release()
@@ -0,0 +1,151 @@
+# my_backend_app/tokens.py
+import hashlib
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta
+
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from sqlalchemy import delete, update
+
+from .broker import Broker
+from .cache import CachedUser
+from .instrumentation import logger
+from .models import db, RefreshToken
+
+
+class TokenInvalid(Exception):
+    """The access token is malformed, forged or revoked."""
+
+
+class TokenExpired(TokenInvalid):
+    """The access token was valid but is older than ACCESS_TOKEN_TTL; the client should refresh."""
+
+
+def _hash(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class RevocationSet:
+    """Ids of revoked, not yet expired access tokens. Entries drop out once the token would have expired anyway."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def add(self, jti, expires_at):
+        now = time.time()
+        with self._lock:
+            self._entries[jti] = expires_at
+            if len(self._entries) > 1000:
+                self._entries = {k: v for k, v in self._entries.items() if v > now}
+
+    def __contains__(self, jti):
+        with self._lock:
+            expires_at = self._entries.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TokenService:
+    """Signed access tokens verified without a database round trip, plus server-side refresh tokens.
+
+    Access tokens are itsdangerous-signed payloads carrying the user's id, username
+    and email, valid for ACCESS_TOKEN_TTL seconds. Refresh tokens are random strings
+    stored hashed in refresh_token, rotated on every use; presenting an already
+    rotated one revokes all of the user's sessions. Logging out revokes the access
+    token in an in-memory set, shared between workers through the broker.
+    """
+
+    def __init__(self):
+        self.access_ttl = 900
+        self.refresh_ttl = 30 * 24 * 3600
+        self.revoked = RevocationSet()
+        self.broker = Broker('revoked_tokens', on_message=self._remote_revocation)
+        self._serializer = None
+        self._last_prune = 0.0
+
+    def init_app(self, app):
+        self.access_ttl = app.config.get('ACCESS_TOKEN_TTL', self.access_ttl)
+        self.refresh_ttl = app.config.get('REFRESH_TOKEN_TTL', self.refresh_ttl)
+        if app.config['SECRET_KEY'] == 'default_secret_key_if_not_set':
+            logger.warning("SECRET_KEY is not set; access tokens are signed with the built-in default key.")
+        self._serializer = URLSafeTimedSerializer(app.config['SECRET_KEY'], salt='access-token')
+        self.broker.init_app(app)
+        app.extensions['token_service'] = self
+
+    # --- Access tokens ---
+    def issue_access(self, user):
+        payload = {'sub': user.id, 'name': user.username, 'email': user.email, 'jti': secrets.token_urlsafe(12)}
+        return self._serializer.dumps(payload)
+
+    def verify_access(self, token):
+        """Returns (CachedUser, jti) for a valid token; raises TokenExpired or TokenInvalid."""
+        try:
+            payload = self._serializer.loads(token, max_age=self.access_ttl)
+        except SignatureExpired:
+            raise TokenExpired()
+        except BadSignature:
+            raise TokenInvalid()
+        if payload['jti'] in self.revoked:
+            raise TokenInvalid()
+        return CachedUser(payload['sub'], payload['name'], payload['email']), payload['jti']
+
+    def revoke_access(self, jti):
+        self.revoked.add(jti, time.time() + self.access_ttl)
+        self.broker.publish(jti)
+
+    def _remote_revocation(self, jti):
+        self.revoked.add(jti, time.time() + self.access_ttl)
+
+    # --- Refresh tokens (the caller commits) ---
+    def issue_refresh(self, user_id):
+        token = secrets.token_urlsafe(32)
+        db.session.add(RefreshToken(user_id=user_id, token_hash=_hash(token),
+                                    expires_at=datetime.utcnow() + timedelta(seconds=self.refresh_ttl)))
+        return token
+
+    def rotate_refresh(self, token):
+        """Revokes a refresh token and returns its user id, or None if it cannot be used."""
+        now = datetime.utcnow()
+        row = RefreshToken.query.filter_by(token_hash=_hash(token)).first()
+        if row is None or row.expires_at <= now:
+            return None
+        if row.revoked_at is not None:
+            # A rotated token was presented again: it may have been stolen, end every session of the user.
+            logger.warning("TOKENS - Reuse of a revoked refresh token for user %s; revoking all sessions.", row.user_id)
+            self.revoke_all(row.user_id)
+            return None
+        # Conditional update so two concurrent refreshes with the same token cannot both succeed.
+        result = db.session.execute(
+            update(RefreshToken).where(RefreshToken.id == row.id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=now))
+        return row.user_id if result.rowcount == 1 else None
+
+    def revoke_refresh(self, token):
+        db.session.execute(
+            update(RefreshToken).where(RefreshToken.token_hash == _hash(token), RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.utcnow()))
+
+    def revoke_all(self, user_id):
+        db.session.execute(
+            update(RefreshToken).where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.utcnow()))
+
+    def maybe_prune(self, interval=3600):
+        """Deletes expired refresh tokens at most once per interval (the caller commits).
+
+        Revoked tokens are kept until they expire so their reuse can still be detected.
+        """
+        if time.monotonic() - self._last_prune < interval:
+            return 0
+        self._last_prune = time.monotonic()
+        return db.session.execute(delete(RefreshToken).where(RefreshToken.expires_at <= datetime.utcnow())).rowcount
+
+    def stats(self):
+        return {'revoked_access_tokens': len(self.revoked), 'broker': self.broker.stats()}
+
+
+token_service = TokenService()
@@ -0,0 +1,5 @@
+# my_backend_app/wsgi.py
+"""WSGI entry point for production servers (see gunicorn.conf.py)."""
+from . import create_app
+
+app = create_app()
@@ -0,0 +1,80 @@
+"""Asserts that every hot endpoint query is served by an index.
+
+Runs EXPLAIN for the statements behind get_all (first page and keyset page),
+get/<id>, search, stats, get_reminders and the login-history tail against DATABASE_URL
+(SQLite or Postgres) and exits non-zero if any of them falls back to a full
+table scan. On Postgres sequential scans are disabled for the check session so
+the planner's choice on a small dev database does not hide a missing index.
+
+    DATABASE_URL=postgresql://... python scripts/check_query_plans.py
+"""
+import json
+import os
+import sys
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select  # noqa: E402
+
+from my_backend_app import create_app  # noqa: E402
+from my_backend_app.models import db, Item, LoginHistory  # noqa: E402
+from my_backend_app.reminders import reminders_query  # noqa: E402
+from my_backend_app.routes import item_list_query  # noqa: E402
+from my_backend_app.search import build_filters  # noqa: E402
+from my_backend_app.serializers import item_serializer  # noqa: E402
+
+
+def hot_queries(user_id=1):
+    columns = item_serializer.columns()
+    return {
+        'get_all': item_list_query(user_id, columns),
+        'get_all (keyset page)': item_list_query(user_id, columns, (datetime.utcnow(), 1000)).limit(50),
+        'get/<id>': select(*columns).where(Item.id == 1, Item.user_id == user_id),
+        'search (location)': item_list_query(user_id, columns).where(*build_filters({'location': 'eu-west'})[0]).limit(100),
+        'stats by os_type': (
+            select(Item.os_type, func.count(Item.id), func.sum(Item.core))
+            .where(Item.user_id == user_id)
+            .group_by(Item.os_type)
+        ),
+        'get_reminders': reminders_query(user_id, date.today()),
+        'login_history tail': (
+            select(LoginHistory.login_time, LoginHistory.login_ip)
+            .where(LoginHistory.user_id == user_id)
+            .order_by(LoginHistory.login_time.desc())
+            .limit(20)
+        ),
+    }
+
+
+def explain(conn, stmt):
+    """Returns (uses_index, plan_text) for a statement."""
+    compiled = stmt.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True})
+    if conn.dialect.name == 'postgresql':
+        plan = conn.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {compiled}').scalar()
+        text = json.dumps(plan)
+        return 'Seq Scan' not in text and 'Index' in text, text
+    rows = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}').all()
+    text = '\n'.join(row[-1] for row in rows)
+    scans_table = any(line.startswith('SCAN ') and 'USING' not in line for line in text.splitlines())
+    return 'USING' in text and not scans_table, text
+
+
+def main():
+    app = create_app()
+    failures = 0
+    with app.app_context():
+        with db.engine.connect() as conn:
+            if conn.dialect.name == 'postgresql':
+                conn.exec_driver_sql('SET enable_seqscan = off')
+            for name, stmt in hot_queries().items():
+                ok, plan = explain(conn, stmt)
+                print(f"[{'OK' if ok else 'FAIL'}] {name}")
+                if not ok:
+                    failures += 1
+                    print('    ' + plan.replace('\n', '\n    '))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
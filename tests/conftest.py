@@ -0,0 +1,82 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Settings are read from the environment when my_backend_app.config is imported.
+os.environ.update({
+    'DATABASE_URL': 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'import.db'),
+    'SECRET_KEY': 'test-secret-key',
+    'ITEM_ENCRYPTION_KEY': 'dGVzdC1pdGVtLWVuY3J5cHRpb24ta2V5LTMyYnl0ZXM',
+    'PASSWORD_HASH_WORKERS': '0',
+    'PASSWORD_HASH_ROUNDS': '1000',
+    'LOGIN_HISTORY_ASYNC': 'false',
+    'REQUEST_LOG': 'false',
+    'LOG_LEVEL': 'WARNING',
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from my_backend_app import create_app  # noqa: E402
+from my_backend_app.config import Config  # noqa: E402
+
+
+ITEM = {
+    'customer': 'acme', 'public_ip': '203.0.113.10', 'private_ip': '10.0.0.10', 'os_type': 'linux',
+    'root_username': 'root', 'root_password': 'root-pw', 'server_username': 'deploy',
+    'server_password': 'server-pw', 'server_name': 'web-1', 'core': 4, 'ram': '8G', 'hdd': '100G',
+    'ports': '22,443', 'location': 'eu', 'applications': 'nginx', 'db_name': 'app', 'db_password': 'db-pw',
+    'db_port': 5432, 'dump_location': '/dumps', 'crontab_config': '0 3 * * *', 'backup_location': '/backups',
+    'url': 'https://web-1.example.com', 'login_name': 'admin', 'login_password': 'login-pw',
+    'db_password_set_at': '2024-01-01',
+}
+
+
+def make_item(**changes):
+    return {**ITEM, **changes}
+
+
+def create_item(client, auth, **changes):
+    response = client.post('/api/items/create', json=make_item(**changes), headers=auth)
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['item']
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'app.db'}"
+
+
+@pytest.fixture
+def app(database_url, monkeypatch):
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', database_url)
+    app = create_app()
+    yield app
+    from my_backend_app.models import db
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def sign_up(client, username='alice', password='correct horse'):
+    client.post('/api/auth/signup', json={'username': username, 'email': f'{username}@example.com',
+                                          'password': password})
+    response = client.post('/api/auth/signin', json={'username': username, 'password': password})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+@pytest.fixture
+def tokens(client):
+    return sign_up(client)
+
+
+@pytest.fixture
+def auth(tokens):
+    return {'Authorization': f"Bearer {tokens['access_token']}"}
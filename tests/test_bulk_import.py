@@ -0,0 +1,78 @@
+# tests/test_bulk_import.py
+import csv
+import io
+import json
+
+from conftest import make_item, sign_up
+from my_backend_app.models import db, Item
+
+
+def ndjson(*items):
+    return '\n'.join(json.dumps(item) for item in items).encode()
+
+
+def bulk(client, auth, body, content_type='application/x-ndjson'):
+    return client.post('/api/items/bulk', data=body, content_type=content_type, headers=auth)
+
+
+def count_items(app):
+    with app.app_context():
+        return db.session.query(Item).count()
+
+
+def test_ndjson_import_reports_invalid_rows(app, client, auth):
+    response = bulk(client, auth, ndjson(make_item(), make_item(core='many'), make_item()))
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['inserted'], body['failed']) == (2, 1)
+    assert body['errors'][0]['row'] == 2
+    assert count_items(app) == 2
+
+
+def test_a_row_the_database_rejects_fails_alone(app, client, auth):
+    # Passes validation but cannot be bound by the driver, so the multi-row INSERT fails.
+    response = bulk(client, auth, ndjson(make_item(), make_item(ram={'size': 8}), make_item()))
+    body = response.get_json()
+    assert (body['inserted'], body['failed']) == (2, 1)
+    assert [error['row'] for error in body['errors']] == [2]
+    assert count_items(app) == 2
+
+
+def test_invalid_utf8_stops_the_import_with_a_400(app, client, auth):
+    response = bulk(client, auth, ndjson(make_item(), make_item()) + b'\n{"customer": "\xff\xfe"}\n')
+    assert response.status_code == 400
+    body = response.get_json()
+    assert 'not valid UTF-8' in body['message']
+    assert body['inserted'] == count_items(app)
+
+
+def test_malformed_csv_stops_the_import_with_a_400(app, client, auth):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(make_item()))
+    writer.writeheader()
+    writer.writerows([make_item(), make_item(applications='x' * 200_000), make_item()])
+    response = bulk(client, auth, buffer.getvalue().encode(), content_type='text/csv')
+    assert response.status_code == 400
+    body = response.get_json()
+    assert 'malformed CSV' in body['message']
+    assert body['inserted'] == count_items(app) == 1
+
+
+def test_default_export_leaves_out_credentials(client, auth):
+    bulk(client, auth, ndjson(make_item()))
+    response = client.get('/api/items/export?format=csv', headers=auth)
+    assert 'root_password' not in response.get_data(as_text=True).splitlines()[0]
+    assert response.headers.get('Cache-Control') != 'no-store'
+
+
+def test_export_with_secrets_can_be_imported_again(client, auth):
+    bulk(client, auth, ndjson(make_item(server_name='web-1'), make_item(server_name='web-2')))
+    bob = {'Authorization': f"Bearer {sign_up(client, 'bob')['access_token']}"}
+    for fmt, content_type in (('csv', 'text/csv'), ('ndjson', 'application/x-ndjson')):
+        export = client.get(f'/api/items/export?format={fmt}&include_secrets=true', headers=auth)
+        assert export.headers['Cache-Control'] == 'no-store'
+        response = bulk(client, bob, export.get_data(), content_type)
+        assert (response.get_json()['inserted'], response.get_json()['failed']) == (2, 0)
+    item_id = client.get('/api/items/get_all', headers=bob).get_json()[0]['id']
+    secrets = client.get(f'/api/items/{item_id}/secrets', headers=bob).get_json()
+    assert secrets['root_password'] == make_item()['root_password']
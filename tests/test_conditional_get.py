@@ -0,0 +1,59 @@
+# tests/test_conditional_get.py
+import gzip
+
+from conftest import create_item, sign_up
+
+GET_ALL = '/api/items/get_all'
+
+
+def revalidate(client, auth, url, etag, **params):
+    return client.get(url, query_string=params, headers={**auth, 'If-None-Match': etag})
+
+
+def test_list_answers_304_until_the_collection_changes(client, auth):
+    item = create_item(client, auth)
+    first = client.get(GET_ALL, headers=auth)
+    etag = first.headers['ETag']
+    assert etag.startswith('W/') and first.headers['Cache-Control'] == 'private, no-cache'
+
+    not_modified = revalidate(client, auth, GET_ALL, etag)
+    assert not_modified.status_code == 304 and not_modified.get_data() == b''
+    assert not_modified.headers['ETag'] == etag
+
+    client.patch(f"/api/items/update/{item['id']}", json={'customer': 'globex', 'version': 1}, headers=auth)
+    assert revalidate(client, auth, GET_ALL, etag).status_code == 200
+    etag = client.get(GET_ALL, headers=auth).headers['ETag']
+    client.delete(f"/api/items/delete/{item['id']}", headers=auth)
+    assert revalidate(client, auth, GET_ALL, etag).status_code == 200
+
+
+def test_list_etag_depends_on_the_query_and_the_user(client, auth):
+    create_item(client, auth)
+    etag = client.get(GET_ALL, headers=auth).headers['ETag']
+    assert revalidate(client, auth, GET_ALL, etag, fields='id').status_code == 200
+    bob = {'Authorization': f"Bearer {sign_up(client, 'bob')['access_token']}"}
+    assert revalidate(client, bob, GET_ALL, etag).status_code == 200
+
+
+def test_single_item_answers_304_until_it_changes(client, auth):
+    item = create_item(client, auth)
+    url = f"/api/items/get/{item['id']}"
+    etag = client.get(url, headers=auth).headers['ETag']
+    assert revalidate(client, auth, url, etag).status_code == 304
+    # Another item changing does not invalidate this one.
+    create_item(client, auth)
+    assert revalidate(client, auth, url, etag).status_code == 304
+    client.patch(url.replace('/get/', '/update/'), json={'customer': 'globex', 'version': 1}, headers=auth)
+    response = revalidate(client, auth, url, etag)
+    assert response.status_code == 200 and response.get_json()['customer'] == 'globex'
+
+
+def test_etag_is_the_same_for_compressed_and_plain_bodies(client, auth):
+    for n in range(20):
+        create_item(client, auth, server_name=f'web-{n}')
+    plain = client.get(GET_ALL, headers={**auth, 'Accept-Encoding': 'identity'})
+    compressed = client.get(GET_ALL, headers={**auth, 'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.get_data()) == plain.get_data()
+    assert compressed.headers['ETag'] == plain.headers['ETag']
+    assert revalidate(client, {**auth, 'Accept-Encoding': 'gzip'}, GET_ALL, plain.headers['ETag']).status_code == 304
@@ -0,0 +1,116 @@
+# tests/test_crypto.py
+import base64
+
+import pytest
+from cryptography.exceptions import InvalidTag
+from flask import Flask
+from sqlalchemy import text
+
+from conftest import make_item
+from my_backend_app.crypto import DEV_MASTER_KEY, PREFIX, EncryptedValue, KeyRing, key_ring
+from my_backend_app.models import SECRET_FIELDS, Item, db
+
+ROOT = 'item.root_password'
+
+
+def test_round_trip(app):
+    ciphertext = key_ring.encrypt('s3cret', ROOT)
+    assert ciphertext.startswith(PREFIX)
+    assert 's3cret' not in ciphertext
+    assert key_ring.decrypt(ciphertext, ROOT) == 's3cret'
+    assert EncryptedValue(ciphertext, ROOT).reveal() == 's3cret'
+
+
+def test_nonces_are_random(app):
+    assert key_ring.encrypt('s3cret', ROOT) != key_ring.encrypt('s3cret', ROOT)
+
+
+def test_tampered_ciphertext_is_rejected(app):
+    header, payload = key_ring.encrypt('s3cret', ROOT).rsplit(':', 1)
+    raw = bytearray(base64.b64decode(payload))
+    raw[-1] ^= 1
+    tampered = f'{header}:{base64.b64encode(raw).decode()}'
+    with pytest.raises(InvalidTag):
+        key_ring.decrypt(tampered, ROOT)
+
+
+def test_ciphertext_is_bound_to_its_column_and_key_id(app):
+    ciphertext = key_ring.encrypt('s3cret', ROOT)
+    with pytest.raises(InvalidTag):
+        key_ring.decrypt(ciphertext, 'item.db_password')
+    old_key_id = key_ring._active_id
+    key_ring.rotate_data_key()
+    relabelled = ciphertext.replace(f'{PREFIX}{old_key_id}:', f'{PREFIX}{key_ring._active_id}:')
+    with pytest.raises(InvalidTag):
+        key_ring.decrypt(relabelled, ROOT)
+
+
+def test_credential_copied_into_another_column_does_not_decrypt(app, client, auth):
+    item = client.post('/api/items/create', json=make_item(), headers=auth).get_json()['item']
+    with app.app_context():
+        db.session.execute(text('UPDATE item SET db_password = root_password'))
+        db.session.commit()
+        stored = db.session.get(Item, item['id'])
+        assert stored.root_password.reveal() == make_item()['root_password']
+        with pytest.raises(InvalidTag):
+            stored.db_password.reveal()
+
+
+def test_rotation_keeps_old_values_readable(app):
+    before = key_ring.encrypt('old', ROOT)
+    old_key_id = key_ring._active_id
+    new_key_id = key_ring.rotate_data_key()
+    after = key_ring.encrypt('new', ROOT)
+    assert new_key_id != old_key_id
+    assert before.startswith(f'{PREFIX}{old_key_id}:') and after.startswith(f'{PREFIX}{new_key_id}:')
+    assert (key_ring.decrypt(before, ROOT), key_ring.decrypt(after, ROOT)) == ('old', 'new')
+
+
+def test_key_rotated_by_another_worker_is_loaded_on_demand(app):
+    other = KeyRing()
+    other.init_app(app)
+    with app.app_context():
+        other.bind(db.engine)
+    # This worker rotates after the other one loaded its keys.
+    key_ring.rotate_data_key()
+    assert other.decrypt(key_ring.encrypt('s3cret', ROOT), ROOT) == 's3cret'
+
+
+def test_encryption_key_is_required_outside_development():
+    app = Flask(__name__)
+    app.config.update(SECRET_KEY='key-one', ITEM_ENCRYPTION_KEY=None)
+    with pytest.raises(RuntimeError, match='ITEM_ENCRYPTION_KEY is not set'):
+        KeyRing().init_app(app)
+    app.testing = True
+    KeyRing().init_app(app)
+
+
+def test_encryption_key_does_not_depend_on_secret_key(app):
+    ciphertext = key_ring.encrypt('s3cret', ROOT)
+    app.config['SECRET_KEY'] = 'key-two'
+    other = KeyRing()
+    other.init_app(app)
+    with app.app_context():
+        other.bind(db.engine)
+    assert other.decrypt(ciphertext, ROOT) == 's3cret'
+
+
+def test_wrong_encryption_key_is_reported_as_a_mismatch(app):
+    app.config['ITEM_ENCRYPTION_KEY'] = base64.urlsafe_b64encode(DEV_MASTER_KEY).decode()
+    other = KeyRing()
+    other.init_app(app)
+    with app.app_context(), pytest.raises(RuntimeError, match='not the key the stored data keys were created with'):
+        other.bind(db.engine)
+
+
+def test_credentials_are_encrypted_at_rest_and_served_by_the_secrets_endpoint(app, client, auth):
+    item = client.post('/api/items/create', json=make_item(), headers=auth).get_json()['item']
+    assert not set(SECRET_FIELDS) & set(item)
+    with app.app_context():
+        stored = db.session.execute(text(f"SELECT {', '.join(SECRET_FIELDS)} FROM item")).one()
+    assert all(value.startswith(PREFIX) for value in stored)
+
+    response = client.get(f"/api/items/{item['id']}/secrets", headers=auth)
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-store'
+    assert response.get_json() == {field: make_item()[field] for field in SECRET_FIELDS}
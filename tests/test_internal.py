@@ -0,0 +1,26 @@
+# tests/test_internal.py
+POOL = '/api/_internal/pool'
+
+
+def test_loopback_alone_does_not_open_internal_endpoints(client):
+    # The test client connects from 127.0.0.1, as a reverse proxy on the same host would.
+    assert client.get(POOL).status_code == 404
+
+
+def test_shared_token_opens_internal_endpoints(app, client):
+    app.config['INTERNAL_API_TOKEN'] = 's3cret-token'
+    assert client.get(POOL).status_code == 404
+    assert client.get(POOL, headers={'X-Internal-Token': 'wrong'}).status_code == 404
+    response = client.get(POOL, headers={'X-Internal-Token': 's3cret-token'})
+    assert response.status_code == 200
+    assert 'replicas' in response.get_json()
+
+
+def test_token_is_required_even_when_enabled(app, client):
+    app.config.update(INTERNAL_API_ENABLED=True, INTERNAL_API_TOKEN='s3cret-token')
+    assert client.get(POOL).status_code == 404
+
+
+def test_explicit_opt_in_without_token(app, client):
+    app.config['INTERNAL_API_ENABLED'] = True
+    assert client.get(POOL).status_code == 200
@@ -0,0 +1,137 @@
+# tests/test_item_updates.py
+import json
+from datetime import date
+
+from conftest import create_item, make_item, sign_up
+from my_backend_app.models import db, Item
+
+
+def stored(app, item_id):
+    with app.app_context():
+        return db.session.get(Item, item_id)
+
+
+def test_new_item_starts_at_version_one(client, auth):
+    assert create_item(client, auth)['version'] == 1
+
+
+def test_patch_applies_only_the_supplied_fields(app, client, auth):
+    item = create_item(client, auth)
+    response = client.patch(f"/api/items/update/{item['id']}", json={'customer': 'globex', 'version': 1},
+                            headers=auth)
+    assert response.status_code == 200
+    assert response.get_json()['version'] == 2
+    row = stored(app, item['id'])
+    assert (row.customer, row.server_name, row.version) == ('globex', 'web-1', 2)
+
+
+def test_patch_with_a_stale_version_is_a_conflict(app, client, auth):
+    item = create_item(client, auth)
+    url = f"/api/items/update/{item['id']}"
+    assert client.patch(url, json={'customer': 'first', 'version': 1}, headers=auth).status_code == 200
+    response = client.patch(url, json={'customer': 'second', 'version': 1}, headers=auth)
+    assert response.status_code == 409
+    assert response.get_json() == {'message': 'Item was changed by someone else. Reload it and try again.',
+                                   'error': 'version_conflict', 'version': 2}
+    assert stored(app, item['id']).customer == 'first'
+
+
+def test_patch_requires_a_version(client, auth):
+    item = create_item(client, auth)
+    url = f"/api/items/update/{item['id']}"
+    assert client.patch(url, json={'customer': 'globex'}, headers=auth).status_code == 400
+    for method in (client.put, client.patch):
+        assert method(url, json={'customer': 'globex', 'version': '1'}, headers=auth).status_code == 400
+
+
+def test_put_without_a_version_still_updates(app, client, auth):
+    # Clients written before versions existed keep working; the last writer wins.
+    item = create_item(client, auth)
+    url = f"/api/items/update/{item['id']}"
+    assert client.patch(url, json={'customer': 'first', 'version': 1}, headers=auth).status_code == 200
+    response = client.put(url, json={'customer': 'second'}, headers=auth)
+    assert response.status_code == 200
+    assert response.get_json()['version'] == 3
+    assert stored(app, item['id']).customer == 'second'
+    assert client.put('/api/items/update/999', json={'customer': 'x'}, headers=auth).status_code == 404
+
+
+def test_put_with_a_stale_version_is_a_conflict(client, auth):
+    item = create_item(client, auth)
+    url = f"/api/items/update/{item['id']}"
+    assert client.put(url, json={'customer': 'first', 'version': 1}, headers=auth).status_code == 200
+    assert client.put(url, json={'customer': 'second', 'version': 1}, headers=auth).status_code == 409
+
+
+def test_update_of_someone_elses_item_is_not_found(client, auth):
+    item = create_item(client, auth)
+    other = {'Authorization': f"Bearer {sign_up(client, 'bob')['access_token']}"}
+    response = client.patch(f"/api/items/update/{item['id']}", json={'customer': 'x', 'version': 1}, headers=other)
+    assert response.status_code == 404
+
+
+def test_new_db_password_moves_set_at_to_today(app, client, auth):
+    item = create_item(client, auth)
+    response = client.patch(f"/api/items/update/{item['id']}", json={'db_password': 'rotated', 'version': 1},
+                            headers=auth)
+    assert response.status_code == 200
+    row = stored(app, item['id'])
+    assert row.db_password.reveal() == 'rotated'
+    assert row.db_password_set_at == date.today()
+
+
+def test_unchanged_db_password_keeps_set_at(app, client, auth):
+    # The edit page sends the whole form back, password included, even if it was not touched.
+    item = create_item(client, auth)
+    response = client.patch(f"/api/items/update/{item['id']}",
+                            json={'db_password': 'db-pw', 'db_password_set_at': None, 'version': 1}, headers=auth)
+    assert response.status_code == 200
+    assert stored(app, item['id']).db_password_set_at == date(2024, 1, 1)
+
+
+def test_explicit_set_at_wins_for_an_unchanged_password(app, client, auth):
+    item = create_item(client, auth)
+    response = client.patch(f"/api/items/update/{item['id']}",
+                            json={'db_password': 'db-pw', 'db_password_set_at': '2024-06-01', 'version': 1},
+                            headers=auth)
+    assert response.status_code == 200
+    assert stored(app, item['id']).db_password_set_at == date(2024, 6, 1)
+
+
+def test_fingerprint_is_written_by_the_insert(app, client, auth):
+    item = create_item(client, auth)
+    assert 'db_password_fingerprint' not in item
+    assert stored(app, item['id']).db_password_fingerprint is not None
+
+
+def test_fingerprints_differ_between_owners_sharing_a_password(app, client, auth):
+    bob = {'Authorization': f"Bearer {sign_up(client, 'bob')['access_token']}"}
+    first, second = create_item(client, auth), create_item(client, bob)
+    fingerprints = {stored(app, item['id']).db_password_fingerprint for item in (first, second)}
+    assert len(fingerprints) == 2
+
+
+def test_row_without_a_fingerprint_keeps_set_at(app, client, auth):
+    item = create_item(client, auth)
+    with app.app_context():
+        db.session.execute(db.update(Item).values(db_password_fingerprint=None))
+        db.session.commit()
+    response = client.patch(f"/api/items/update/{item['id']}", json={'db_password': 'db-pw', 'version': 1},
+                            headers=auth)
+    assert response.status_code == 200
+    row = stored(app, item['id'])
+    assert row.db_password_set_at == date(2024, 1, 1)
+    assert row.db_password_fingerprint is not None
+
+
+def test_bulk_imported_items_get_fingerprints(app, client, auth):
+    body = '\n'.join(json.dumps(make_item(server_name=f'web-{n}')) for n in range(3))
+    response = client.post('/api/items/bulk', data=body, content_type='application/x-ndjson', headers=auth)
+    assert response.get_json()['inserted'] == 3
+    with app.app_context():
+        rows = db.session.execute(db.select(Item.id, Item.version, Item.db_password_fingerprint)).all()
+    assert len(rows) == 3 and None not in {row.db_password_fingerprint for row in rows}
+    # An unchanged password is recognised on the bulk-imported rows too.
+    item_id = rows[0].id
+    client.patch(f'/api/items/update/{item_id}', json={'db_password': 'db-pw', 'version': 1}, headers=auth)
+    assert stored(app, item_id).db_password_set_at == date(2024, 1, 1)
@@ -0,0 +1,74 @@
+# tests/test_items_list.py
+import json
+from datetime import datetime
+
+from sqlalchemy import update
+
+from conftest import create_item, sign_up
+from my_backend_app.models import db, Item
+from my_backend_app.routes import _encode_cursor
+
+GET_ALL = '/api/items/get_all'
+
+
+def pages(client, auth, limit, **params):
+    """Follows next_cursor through every page; returns the pages' item ids."""
+    ids, cursor = [], None
+    while True:
+        query = {'limit': limit, 'fields': 'id', **params, **({'cursor': cursor} if cursor else {})}
+        body = client.get(GET_ALL, query_string=query, headers=auth).get_json()
+        ids.append([item['id'] for item in body['items']])
+        cursor = body['next_cursor']
+        if cursor is None:
+            return ids
+
+
+def test_unpaged_list_is_newest_first(client, auth):
+    ids = [create_item(client, auth, server_name=f'web-{n}')['id'] for n in range(3)]
+    response = client.get(GET_ALL, headers=auth)
+    assert [item['id'] for item in response.get_json()] == ids[::-1]
+
+
+def test_pages_follow_created_at_then_id_through_ties(app, client, auth):
+    ids = [create_item(client, auth, server_name=f'web-{n}')['id'] for n in range(5)]
+    # Items imported together share created_at; id breaks the tie, so no row is skipped or repeated.
+    with app.app_context():
+        db.session.execute(update(Item).where(Item.id.in_(ids[1:4])).values(created_at=datetime(2024, 5, 1)))
+        db.session.commit()
+    expected = [ids[4], ids[0], ids[3], ids[2], ids[1]]
+    assert [item['id'] for item in client.get(GET_ALL, headers=auth).get_json()] == expected
+    assert pages(client, auth, 2) == [expected[:2], expected[2:4], expected[4:]]
+    assert sum(pages(client, auth, 1), []) == expected
+
+
+def test_fields_limit_the_returned_columns(client, auth):
+    create_item(client, auth)
+    item = client.get(GET_ALL, query_string={'fields': 'id,customer'}, headers=auth).get_json()[0]
+    assert set(item) == {'id', 'customer'}
+
+
+def test_ndjson_stream_returns_one_line_per_item(client, auth):
+    for n in range(3):
+        create_item(client, auth, server_name=f'web-{n}')
+    response = client.get(GET_ALL, query_string={'format': 'ndjson', 'limit': 2}, headers=auth)
+    assert [json.loads(line)['server_name'] for line in response.get_data().splitlines()] == ['web-2', 'web-1']
+
+
+def test_invalid_parameters_are_rejected(client, auth):
+    for query in ({'cursor': 'not-a-cursor'}, {'limit': 0}, {'limit': 'many'}, {'fields': 'id,root_password'},
+                  {'format': 'xml'}):
+        assert client.get(GET_ALL, query_string=query, headers=auth).status_code == 400
+
+
+def test_cursor_from_another_user_only_positions_the_page(client, auth):
+    mine = create_item(client, auth)
+    bob = {'Authorization': f"Bearer {sign_up(client, 'bob')['access_token']}"}
+    create_item(client, bob)
+    create_item(client, bob)
+    bob_cursor = client.get(GET_ALL, query_string={'limit': 1}, headers=bob).get_json()['next_cursor']
+    body = client.get(GET_ALL, query_string={'limit': 10, 'cursor': bob_cursor}, headers=auth).get_json()
+    assert [item['id'] for item in body['items']] == [mine['id']]
+    # A cursor is only a (created_at, id) position: one past everything returns an empty page.
+    past = _encode_cursor(datetime(2000, 1, 1), 0)
+    assert client.get(GET_ALL, query_string={'limit': 10, 'cursor': past}, headers=auth).get_json() == {
+        'items': [], 'next_cursor': None}
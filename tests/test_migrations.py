@@ -0,0 +1,86 @@
+# tests/test_migrations.py
+from datetime import date, datetime
+
+import pytest
+from passlib.hash import pbkdf2_sha256
+from sqlalchemy import (Column, Date, DateTime, ForeignKey, Integer, MetaData, String, Table, Text, create_engine,
+                        inspect, text)
+
+from conftest import make_item
+from my_backend_app.config import Config
+from my_backend_app.crypto import PREFIX
+from my_backend_app.migrations import MIGRATIONS, pending_migrations, sync_schema
+from my_backend_app.models import SECRET_FIELDS, Item, db, db_password_fingerprint
+
+# The schema as it was before the first migration (models.py at the baseline commit).
+baseline = MetaData()
+Table('user', baseline,
+      Column('id', Integer, primary_key=True),
+      Column('username', String(80), unique=True, nullable=False),
+      Column('email', String(120), unique=True, nullable=False),
+      Column('password_hash', String(128), nullable=False))
+Table('login_history', baseline,
+      Column('id', Integer, primary_key=True),
+      Column('user_id', Integer, ForeignKey('user.id'), nullable=False),
+      Column('login_time', DateTime, nullable=False),
+      Column('login_ip', String(45)))
+baseline_item = Table(
+    'item', baseline,
+    Column('id', Integer, primary_key=True),
+    Column('user_id', Integer, ForeignKey('user.id'), nullable=False),
+    *(Column(name, Integer if name in ('core', 'db_port') else Text, nullable=False)
+      for name in make_item() if name != 'db_password_set_at'),
+    Column('db_password_set_at', Date, nullable=False),
+    Column('created_at', DateTime, nullable=False))
+
+
+@pytest.fixture
+def baseline_database(database_url):
+    engine = create_engine(database_url)
+    baseline.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(baseline.tables['user'].insert().values(
+            id=1, username='alice', email='alice@example.com', password_hash=pbkdf2_sha256.hash('correct horse')))
+        conn.execute(baseline_item.insert(), [
+            {**make_item(db_password_set_at=date(2024, 1, 1), db_password=f'db-pw-{n % 2}'),
+             'id': n, 'user_id': 1, 'created_at': datetime(2024, 1, 1, 12, n)}
+            for n in range(1, 4)
+        ])
+    engine.dispose()
+    return database_url
+
+
+def test_baseline_schema_is_migrated_to_head(baseline_database, monkeypatch):
+    from my_backend_app import create_app
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', baseline_database)
+    app = create_app()  # SCHEMA_CHECK_ON_STARTUP and AUTO_MIGRATE are on by default
+
+    with app.app_context():
+        assert pending_migrations(db.engine) == []
+        schema = inspect(db.engine)
+        assert {'updated_at', 'version', 'db_password_fingerprint'} <= {c['name'] for c in schema.get_columns('item')}
+        assert {'refresh_token', 'item_tombstone', 'schema_migrations'} <= set(schema.get_table_names())
+        assert 'ix_item_user_id_created_at_id' in {index['name'] for index in schema.get_indexes('item')}
+
+        raw = db.session.execute(text(f"SELECT {', '.join(SECRET_FIELDS)} FROM item")).all()
+        assert all(value.startswith(PREFIX) for row in raw for value in row)
+        items = db.session.execute(db.select(Item).order_by(Item.id)).scalars().all()
+        assert [item.db_password.reveal() for item in items] == ['db-pw-1', 'db-pw-0', 'db-pw-1']
+        assert all(item.version == 1 and item.updated_at >= item.created_at for item in items)
+        assert [item.db_password_fingerprint for item in items] == [
+            db_password_fingerprint(item.user_id, item.db_password) for item in items]
+        # Applying again finds nothing to do.
+        sync_schema(db)
+        applied = db.session.execute(text('SELECT version FROM schema_migrations ORDER BY version')).scalars().all()
+        assert applied == [version for version, _, _ in MIGRATIONS]
+
+    # Users and items from before the migrations keep working.
+    client = app.test_client()
+    tokens = client.post('/api/auth/signin', json={'username': 'alice', 'password': 'correct horse'}).get_json()
+    response = client.get('/api/items/get_all', headers={'Authorization': f"Bearer {tokens['access_token']}"})
+    assert len(response.get_json()) == 3
+
+
+def test_fresh_database_is_stamped_at_head(app):
+    with app.app_context():
+        assert pending_migrations(db.engine) == []
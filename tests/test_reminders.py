@@ -0,0 +1,96 @@
+# tests/test_reminders.py
+import json
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from conftest import create_item, make_item, sign_up
+from my_backend_app.models import db, Item
+from my_backend_app.reminders import reminder_cache, reminder_stream_slots
+
+REMINDERS = '/api/notifications/get_reminders'
+STREAM = '/api/notifications/stream'
+
+
+@pytest.fixture(autouse=True)
+def empty_reminder_cache():
+    # The cache is per process and every test database starts again at user id 1.
+    reminder_cache.clear()
+
+
+def days_ago(days):
+    return (date.today() - timedelta(days=days)).isoformat()
+
+
+def reminders(client, auth):
+    response = client.get(REMINDERS, headers=auth)
+    assert response.status_code == 200
+    return {reminder['server_name']: reminder for reminder in response.get_json()}
+
+
+def test_reminders_by_password_age(client, auth):
+    for name, age in (('fresh', 0), ('yesterday', 1), ('last-week', 6), ('week-old', 7), ('old', 89),
+                      ('expiring-today', 90), ('ancient', 400)):
+        create_item(client, auth, server_name=name, db_password_set_at=days_ago(age))
+    found = reminders(client, auth)
+    assert {name: reminder['type'] for name, reminder in found.items()} == {
+        'yesterday': 'db_password_expiry', 'last-week': 'db_password_expiry',
+        'expiring-today': 'db_password_expired', 'ancient': 'db_password_expired'}
+    assert found['yesterday']['message'] == "Change DB password for server 'yesterday'. It expires in 89 days!"
+    assert found['ancient']['date'] == date.today().isoformat()
+
+
+def test_reminders_are_per_user(client, auth):
+    create_item(client, auth, db_password_set_at=days_ago(400))
+    bob = {'Authorization': f"Bearer {sign_up(client, 'bob')['access_token']}"}
+    assert reminders(client, bob) == {}
+
+
+def test_cached_reminders_are_invalidated_by_item_writes(client, auth):
+    item = create_item(client, auth, server_name='old', db_password_set_at=days_ago(400))
+    first = client.get(REMINDERS, headers=auth)
+    assert list(reminders(client, auth)) == ['old']
+
+    client.patch(f"/api/items/update/{item['id']}", json={'db_password': 'rotated', 'version': 1}, headers=auth)
+    assert reminders(client, auth) == {}
+    body = json.dumps(make_item(server_name='imported', db_password_set_at=days_ago(3)))
+    client.post('/api/items/bulk', data=body, content_type='application/x-ndjson', headers=auth)
+    assert list(reminders(client, auth)) == ['imported']
+    client.delete(f"/api/items/delete/{client.get('/api/items/get_all', headers=auth).get_json()[0]['id']}",
+                  headers=auth)
+    assert reminders(client, auth) == {}
+    assert client.get(REMINDERS, headers={**auth, 'If-None-Match': first.headers['ETag']}).status_code == 200
+
+
+def test_writes_from_elsewhere_show_up_after_invalidation(app, client, tokens, auth):
+    create_item(client, auth, server_name='old', db_password_set_at=days_ago(400))
+    etag = client.get(REMINDERS, headers=auth).headers['ETag']
+    # Written without this worker's ORM events, as another worker would.
+    with app.app_context():
+        db.session.execute(update(Item).values(db_password_set_at=date.today()))
+        db.session.commit()
+    assert client.get(REMINDERS, headers={**auth, 'If-None-Match': etag}).status_code == 304
+    reminder_cache.invalidate(tokens['user_id'])
+    assert reminders(client, auth) == {}
+
+
+@pytest.fixture
+def one_stream_slot(app, monkeypatch):
+    monkeypatch.setattr(reminder_stream_slots, 'limit', 1)
+
+
+def test_streams_past_the_worker_limit_are_told_to_poll(client, auth, one_stream_slot):
+    first = client.get(STREAM, headers=auth, buffered=False)
+    assert first.status_code == 200
+    busy = client.get(STREAM, headers={**auth, 'Origin': 'http://localhost:3000'})
+    assert busy.status_code == 503
+    assert busy.headers['Retry-After'] == '60'
+    assert 'Retry-After' in busy.headers['Access-Control-Expose-Headers']
+    assert client.get('/api/notifications/get_reminders', headers=auth).status_code == 200
+
+    first.close()
+    again = client.get(STREAM, headers=auth, buffered=False)
+    assert again.status_code == 200
+    again.close()
+    assert reminder_stream_slots.stats() == {'open': 0, 'limit': 1}
@@ -0,0 +1,70 @@
+# tests/test_replicas.py
+import shutil
+
+import pytest
+
+from conftest import make_item, sign_up
+from my_backend_app.config import Config
+from my_backend_app.models import db
+from my_backend_app.replicas import LAST_WRITE_HEADER, replica_router
+
+
+@pytest.fixture
+def replica_path(tmp_path):
+    return tmp_path / 'replica.db'
+
+
+@pytest.fixture
+def app(database_url, replica_path, monkeypatch):
+    from my_backend_app import create_app
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', database_url)
+    monkeypatch.setattr(Config, 'SQLALCHEMY_REPLICA_URIS', [f'sqlite:///{replica_path}'])
+    app = create_app()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    replica_router.dispose()
+
+
+def snapshot_replica(app, replica_path):
+    # The "replica" is a copy of the primary that stops receiving changes from here on.
+    with app.app_context():
+        db.engine.dispose()
+    replica_router.dispose()
+    shutil.copy(app.config['SQLALCHEMY_DATABASE_URI'][len('sqlite:///'):], replica_path)
+
+
+def test_last_write_stamp_keeps_reads_on_the_primary_in_any_worker(app, client, auth, replica_path):
+    snapshot_replica(app, replica_path)
+    response = client.post('/api/items/create', json=make_item(), headers=auth)
+    item_id = response.get_json()['item']['id']
+    stamp = response.headers[LAST_WRITE_HEADER]
+    # A worker that did not take the write only knows about it from the stamp.
+    replica_router._last_write.clear()
+    assert client.get(f'/api/items/get/{item_id}', headers=auth).status_code == 404
+    assert client.get(f'/api/items/get/{item_id}', headers={**auth, LAST_WRITE_HEADER: stamp}).status_code == 200
+
+
+def test_forged_or_foreign_stamps_are_ignored(app, client, auth, replica_path):
+    snapshot_replica(app, replica_path)
+    bob = {'Authorization': f"Bearer {sign_up(client, 'bob')['access_token']}"}
+    bob_stamp = client.post('/api/items/create', json=make_item(), headers=bob).headers[LAST_WRITE_HEADER]
+    item_id = client.post('/api/items/create', json=make_item(), headers=auth).get_json()['item']['id']
+    replica_router._last_write.clear()
+    for stamp in (bob_stamp, 'forged.stamp.value'):
+        assert client.get(f'/api/items/get/{item_id}', headers={**auth, LAST_WRITE_HEADER: stamp}).status_code == 404
+
+
+def test_reads_do_not_get_a_stamp(app, client, auth):
+    assert LAST_WRITE_HEADER not in client.get('/api/items/get_all', headers=auth).headers
+
+
+def test_streamed_export_falls_back_to_the_primary(app, client, auth, replica_path):
+    client.post('/api/items/create', json=make_item(), headers=auth)
+    replica_router._last_write.clear()
+    replica_path.mkdir()  # A directory cannot be opened as a database: the replica is "down".
+    response = client.get('/api/items/export?format=ndjson', headers=auth)
+    assert response.status_code == 200
+    assert len(response.get_data().splitlines()) == 1
+    assert not replica_router.status()[0]['healthy']
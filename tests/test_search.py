@@ -0,0 +1,75 @@
+# tests/test_search.py
+import pytest
+
+from conftest import create_item, sign_up
+
+SEARCH = '/api/items/search'
+
+
+@pytest.fixture
+def fleet(client, auth):
+    rows = [
+        dict(server_name='web-1', customer='acme', location='eu', private_ip='10.0.16.5', applications='nginx, redis',
+             url='https://shop.example.com'),
+        dict(server_name='web-2', customer='acme', location='us', private_ip='10.0.31.200', applications='nginx'),
+        dict(server_name='db-1', customer='globex', location='eu', private_ip='10.0.32.1', applications='postgres'),
+        dict(server_name='mail', customer='initech', location='ap', private_ip='192.168.1.20',
+             applications='redis-sentinel'),
+    ]
+    return {row['server_name']: create_item(client, auth, **row)['id'] for row in rows}
+
+
+def names(client, auth, **params):
+    response = client.get(SEARCH, query_string={'fields': 'server_name', **params}, headers=auth)
+    assert response.status_code == 200, response.get_json()
+    return sorted(item['server_name'] for item in response.get_json()['items'])
+
+
+def test_exact_filters_combine_with_and_and_values_with_or(client, auth, fleet):
+    assert names(client, auth, customer='acme') == ['web-1', 'web-2']
+    assert names(client, auth, customer='acme', location='eu') == ['web-1']
+    assert names(client, auth, location='eu,ap') == ['db-1', 'mail', 'web-1']
+
+
+def test_private_ip_cidr(client, auth, fleet):
+    assert names(client, auth, private_ip='10.0.16.0/20') == ['web-1', 'web-2']
+    assert names(client, auth, private_ip='10.0.0.0/8') == ['db-1', 'web-1', 'web-2']
+    assert names(client, auth, private_ip='192.168.1.16/29') == ['mail']
+    assert names(client, auth, private_ip='10.0.32.1,192.168.1.20') == ['db-1', 'mail']
+
+
+def test_invalid_ip_filters_are_rejected(client, auth, fleet):
+    for value in ('10.0.0.0/33', 'not-an-ip', '2001:db8::/32'):
+        assert client.get(SEARCH, query_string={'private_ip': value}, headers=auth).status_code == 400
+
+
+def test_q_matches_substrings_case_insensitively(client, auth, fleet):
+    assert names(client, auth, q='SHOP') == ['web-1']
+    assert names(client, auth, q='glob') == ['db-1']
+    # Shorter than a trigram: prefix match only.
+    assert names(client, auth, q='we') == ['web-1', 'web-2']
+    assert names(client, auth, q='eb') == []
+    assert names(client, auth, q='100%') == []
+
+
+def test_application_matches_whole_list_entries(client, auth, fleet):
+    assert names(client, auth, application='redis') == ['web-1']
+    assert names(client, auth, application='nginx,postgres') == ['db-1', 'web-1', 'web-2']
+
+
+def test_results_are_paged_and_scoped_to_the_user(client, auth, fleet):
+    bob = {'Authorization': f"Bearer {sign_up(client, 'bob')['access_token']}"}
+    create_item(client, bob, customer='acme')
+    first = client.get(SEARCH, query_string={'customer': 'acme', 'limit': 1}, headers=auth).get_json()
+    second = client.get(SEARCH, query_string={'customer': 'acme', 'limit': 1, 'cursor': first['next_cursor']},
+                        headers=auth).get_json()
+    assert [item['id'] for item in first['items'] + second['items']] == [fleet['web-2'], fleet['web-1']]
+    assert second['next_cursor'] is None
+
+
+def test_stats_group_the_filtered_items(client, auth, fleet):
+    stats = client.get('/api/items/stats', query_string={'customer': 'acme,globex'}, headers=auth).get_json()
+    assert stats['total'] == {'items': 3, 'cores': 12}
+    assert stats['by_location'] == [{'location': 'eu', 'items': 2, 'cores': 8},
+                                    {'location': 'us', 'items': 1, 'cores': 4}]
+    assert client.get('/api/items/stats', query_string={'group_by': 'customer'}, headers=auth).status_code == 400
@@ -0,0 +1,45 @@
+# tests/test_security.py
+import os
+import time
+
+import pytest
+
+from my_backend_app.security import HashingBusy, PasswordHasher
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher()
+    hasher.rounds = 1000
+    hasher.workers = 1
+    hasher.max_pending = 1
+    hasher.timeout = 5
+    yield hasher
+    hasher.shutdown()
+
+
+def test_hash_and_verify_on_the_pool(hasher):
+    password_hash = hasher.hash('s3cret')
+    assert hasher.verify_and_update('s3cret', password_hash)[0]
+    assert not hasher.verify_and_update('wrong', password_hash)[0]
+
+
+def test_timed_out_work_keeps_its_slot_until_it_finishes(hasher):
+    hasher.timeout = 0.2
+    with pytest.raises(HashingBusy):
+        hasher._run(time.sleep, 1)
+    # Still running in the pool: a new request must not pile up behind it.
+    with pytest.raises(HashingBusy):
+        hasher.hash('s3cret')
+    hasher.timeout = 5
+    deadline = time.monotonic() + 5
+    while hasher._pending and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert hasher.hash('s3cret')
+
+
+def test_pool_is_replaced_after_a_worker_dies(hasher):
+    with pytest.raises(HashingBusy):
+        hasher._run(os._exit, 1)
+    assert hasher._pending == 0
+    assert hasher.hash('s3cret')
@@ -0,0 +1,39 @@
+# tests/test_serving.py
+from sqlalchemy import create_engine, event, inspect
+
+from my_backend_app.migrations import MIGRATIONS, pending_migrations
+from my_backend_app.serving import worker_settings
+
+
+def test_workers_are_capped_by_the_default_connection_limit():
+    sizing = worker_settings({}, cpu_count=8)
+    assert sizing['threads'] == sizing['pool_capacity'] == 15
+    assert sizing['workers'] == 6  # 90 // 15, not 2 x 8 + 1
+    assert sizing['max_total_connections'] == 90
+
+
+def test_replica_pools_count_against_the_limit():
+    sizing = worker_settings({'DATABASE_REPLICA_URLS': 'postgresql://r1/db, postgresql://r2/db'}, cpu_count=8)
+    assert sizing['connections_per_worker'] == 45
+    assert sizing['workers'] == 2
+
+
+def test_the_cap_can_be_turned_off():
+    assert worker_settings({'DB_MAX_CONNECTIONS': '0'}, cpu_count=8)['workers'] == 17
+    assert worker_settings({'WEB_CONCURRENCY': '3'}, cpu_count=8)['workers'] == 3
+
+
+def test_pending_migrations_does_not_touch_the_schema(database_url):
+    engine = create_engine(database_url)
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda conn, cursor, statement, *args: statements.append(statement))
+    assert pending_migrations(engine) == MIGRATIONS
+    assert not any(statement.lstrip().upper().startswith(('CREATE', 'ALTER', 'INSERT')) for statement in statements)
+    assert inspect(engine).get_table_names() == []
+    engine.dispose()
+
+
+def test_readyz(client):
+    response = client.get('/readyz')
+    assert response.status_code == 200
+    assert response.get_json()['checks'] == {'database': 'ok', 'schema': 'ok'}
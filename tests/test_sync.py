@@ -0,0 +1,75 @@
+# tests/test_sync.py
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import create_item, sign_up
+from my_backend_app.routes import _encode_cursor
+
+
+@pytest.fixture(autouse=True)
+def no_overlap(app):
+    # Without the overlap window a caught-up token returns exactly the later changes.
+    app.config['SYNC_OVERLAP_SECONDS'] = 0
+
+
+def changes(client, auth, token=None, **params):
+    if token is not None:
+        params['since'] = token
+    response = client.get('/api/items/changes', query_string=params, headers=auth)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_first_call_asks_for_a_full_resync(client, auth):
+    body = changes(client, auth)
+    assert body['resync_required'] and body['token']
+    assert body['changed'] == [] and body['deleted'] == []
+
+
+def test_changes_and_tombstones_since_the_last_token(client, auth):
+    token = changes(client, auth)['token']
+    kept, removed = create_item(client, auth, server_name='kept'), create_item(client, auth, server_name='removed')
+
+    body = changes(client, auth, token)
+    assert not body['resync_required']
+    assert [row['id'] for row in body['changed']] == [kept['id'], removed['id']]
+    assert body['deleted'] == []
+
+    client.patch(f"/api/items/update/{kept['id']}", json={'customer': 'globex', 'version': 1}, headers=auth)
+    client.delete(f"/api/items/delete/{removed['id']}", headers=auth)
+    body = changes(client, auth, body['token'])
+    assert [(row['id'], row['customer']) for row in body['changed']] == [(kept['id'], 'globex')]
+    assert body['deleted'] == [removed['id']]
+
+    body = changes(client, auth, body['token'])
+    assert body['changed'] == [] and body['deleted'] == []
+
+
+def test_changes_are_paged_with_the_cursor(client, auth):
+    token = changes(client, auth)['token']
+    ids = [create_item(client, auth, server_name=f'web-{n}')['id'] for n in range(3)]
+
+    first = changes(client, auth, token, limit=2, fields='id,server_name')
+    assert first['has_more'] and [row['id'] for row in first['changed']] == ids[:2]
+    assert set(first['changed'][0]) == {'id', 'server_name'}
+    second = changes(client, auth, first['token'], limit=2, fields='id,server_name')
+    assert not second['has_more'] and [row['id'] for row in second['changed']] == ids[2:]
+
+
+def test_other_users_changes_are_not_visible(client, auth):
+    token = changes(client, auth)['token']
+    bob = {'Authorization': f"Bearer {sign_up(client, 'bob')['access_token']}"}
+    item = create_item(client, bob)
+    client.delete(f"/api/items/delete/{item['id']}", headers=bob)
+    body = changes(client, auth, token)
+    assert body['changed'] == [] and body['deleted'] == []
+
+
+def test_invalid_and_expired_tokens(client, auth):
+    response = client.get('/api/items/changes?since=not-a-token', headers=auth)
+    assert response.status_code == 400
+    expired = _encode_cursor(datetime.utcnow() - timedelta(days=30), 0)
+    response = client.get(f'/api/items/changes?since={expired}', headers=auth)
+    assert response.status_code == 410
+    assert response.get_json()['resync_required']
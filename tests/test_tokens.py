@@ -0,0 +1,131 @@
+# tests/test_tokens.py
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from conftest import sign_up
+from my_backend_app.config import Config
+
+
+def bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_signin_issues_a_working_token_pair(client, tokens):
+    assert tokens['token_type'] == 'Bearer'
+    assert tokens['refresh_token']
+    response = client.get('/api/items/get_all', headers=bearer(tokens['access_token']))
+    assert response.status_code == 200
+
+
+def test_tampered_token_is_rejected(client, tokens):
+    response = client.get('/api/items/get_all', headers=bearer(tokens['access_token'][:-2] + 'xx'))
+    assert response.status_code == 401
+    assert response.get_json()['error'] == 'invalid_token'
+
+
+def test_expired_token_asks_for_refresh(client, tokens, monkeypatch):
+    from my_backend_app.tokens import token_service
+    monkeypatch.setattr(token_service, 'access_ttl', -1)
+    response = client.get('/api/items/get_all', headers=bearer(tokens['access_token']))
+    assert response.status_code == 401
+    assert response.get_json()['error'] == 'token_expired'
+
+
+def test_refresh_rotates_the_refresh_token(client, tokens):
+    response = client.post('/api/auth/refresh', json={'refresh_token': tokens['refresh_token']})
+    assert response.status_code == 200
+    rotated = response.get_json()
+    assert rotated['refresh_token'] != tokens['refresh_token']
+    assert client.get('/api/items/get_all', headers=bearer(rotated['access_token'])).status_code == 200
+
+
+def test_reusing_a_rotated_refresh_token_revokes_every_session(client, tokens):
+    rotated = client.post('/api/auth/refresh', json={'refresh_token': tokens['refresh_token']}).get_json()
+    reused = client.post('/api/auth/refresh', json={'refresh_token': tokens['refresh_token']})
+    assert reused.status_code == 401
+    # The reuse looks like theft, so the legitimately rotated token is revoked as well.
+    response = client.post('/api/auth/refresh', json={'refresh_token': rotated['refresh_token']})
+    assert response.status_code == 401
+
+
+def test_logout_revokes_the_access_and_refresh_token(client, tokens):
+    headers = bearer(tokens['access_token'])
+    response = client.post('/api/auth/logout', json={'refresh_token': tokens['refresh_token']}, headers=headers)
+    assert response.status_code == 200
+    assert client.get('/api/items/get_all', headers=headers).status_code == 401
+    assert client.post('/api/auth/refresh', json={'refresh_token': tokens['refresh_token']}).status_code == 401
+
+
+def test_legacy_user_id_header_is_rejected_by_default(client, tokens):
+    assert client.get('/api/items/get_all', headers={'X-User-ID': str(tokens['user_id'])}).status_code == 401
+
+
+def test_legacy_user_id_header_when_allowed(app, client, tokens):
+    app.config['AUTH_ALLOW_USER_ID_HEADER'] = True
+    assert client.get('/api/items/get_all', headers={'X-User-ID': str(tokens['user_id'])}).status_code == 200
+
+
+# --- Revocation across processes (Redis broker) ---
+_OTHER_WORKER = '''
+import sys
+from my_backend_app import create_app
+client = create_app().test_client()
+print('ready', flush=True)
+for token in sys.stdin:
+    response = client.get('/api/items/get_all', headers={'Authorization': 'Bearer ' + token.strip()})
+    print(response.status_code, flush=True)
+'''
+
+
+@pytest.fixture(scope='module')
+def redis_url():
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('redis')
+    server = fakeredis.TcpFakeServer(('127.0.0.1', 0), server_type='redis')
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'redis://127.0.0.1:{server.server_address[1]}/0'
+    server.shutdown()
+    server.server_close()
+
+
+def test_revocation_reaches_another_process(redis_url, database_url, monkeypatch):
+    from my_backend_app import create_app
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', database_url)
+    monkeypatch.setattr(Config, 'BROKER_BACKEND', 'redis')
+    monkeypatch.setattr(Config, 'BROKER_REDIS_URL', redis_url)
+    client = create_app().test_client()
+    tokens = sign_up(client)
+
+    env = dict(os.environ, DATABASE_URL=database_url, BROKER_BACKEND='redis', BROKER_REDIS_URL=redis_url,
+               PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    other = subprocess.Popen([sys.executable, '-c', _OTHER_WORKER], env=env, text=True,
+                             stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    try:
+        assert other.stdout.readline().strip() == 'ready'
+
+        def status_in_other_process():
+            other.stdin.write(tokens['access_token'] + '\n')
+            other.stdin.flush()
+            return int(other.stdout.readline())
+
+        assert status_in_other_process() == 200
+        assert client.post('/api/auth/logout', headers=bearer(tokens['access_token'])).status_code == 200
+        deadline = time.monotonic() + 5
+        while status_in_other_process() != 401:
+            assert time.monotonic() < deadline, 'revocation never reached the other process'
+            time.sleep(0.05)
+    finally:
+        other.stdin.close()
+        other.wait(timeout=10)
+
+
+def test_memory_broker_with_several_workers_is_reported(app):
+    from my_backend_app.serving import warn_unshared_state
+    assert 'revoked_tokens' in warn_unshared_state(workers=4)
+    assert warn_unshared_state(workers=1) == []